@@ -1,5 +1,5 @@
 # app/api/v1/auth_router.py
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from pydantic import ValidationError
@@ -8,8 +8,12 @@ from app.db.session import get_session
 from app.models.user import User
 from app.schemas.user_schema import UserCreate, UserLogin, TokenResponse, UserResponse
 from app.schemas.user_schema import UserUpdateRole
-from app.controllers.user_controller import create_user, authenticate_user, update_user_role, get_all_users
-from app.core.security import decode_token, create_access_token, get_current_user, admin_required
+from app.controllers.user_controller import create_user_async, authenticate_user_async, update_user_role, get_all_users, \
+    refresh_access_token
+from app.controllers.token_controller import revoke_token
+from app.core import token_denylist
+from app.core.rate_limit import throttle_auth
+from app.core.security import decode_token, get_current_user, admin_required, get_optional_token
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlmodel import paginate
 from dotenv import load_dotenv
@@ -23,22 +27,26 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(data: UserCreate, session: Session = Depends(get_session)):
+async def register(data: UserCreate, request: Request, session: Session = Depends(get_session)):
     """Регистрация нового пользователя"""
-    user = create_user(data, session)
+    throttle_auth(request, data.username, scope="register")
+    user = await create_user_async(data, session)
     return UserResponse(id=user.id, username=user.username, role=user.role)
 
 
 @router.post("/login", response_model=TokenResponse)
 async def login(
         data: UserLogin,  # ИСПРАВЛЕНО: принимаем данные напрямую через Pydantic
+        request: Request,
         response: Response,
         session: Session = Depends(get_session),
 ):
     """Авторизация (JSON) и установка access_token в cookie."""
+    # Лимит попыток - до проверки пароля и запросов к БД
+    throttle_auth(request, data.username)
 
     # Аутентификация по username и password
-    tokens = authenticate_user(data.username, data.password, session)
+    tokens = await authenticate_user_async(data.username, data.password, session)
 
     response.set_cookie(
         key="access_token",
@@ -54,8 +62,9 @@ async def login(
 
 
 @router.post("/refresh", response_model=dict)
-def refresh_token(refresh_token: str):
+def refresh_token(refresh_token: str, session: Session = Depends(get_session)):
     """Обновление access токена"""
+    token_denylist.sync(session)
     username = decode_token(refresh_token, expected_type="refresh")
     if not username:
         raise HTTPException(
@@ -63,7 +72,7 @@ def refresh_token(refresh_token: str):
             detail="Невалидный токен"
         )
 
-    new_access_token = create_access_token(data={"sub": username})
+    new_access_token = refresh_access_token(username, session)
     return {"accessToken": new_access_token, "tokenType": "bearer"}
 
 
@@ -99,8 +108,15 @@ def get_all_users_paginated(session: Session = Depends(get_session)):
 
 
 @router.post("/logout")
-def logout(response: Response):
-    """Выход из системы - удаление cookie"""
+def logout(
+        response: Response,
+        refresh_token: Optional[str] = None,
+        token: Optional[str] = Depends(get_optional_token),
+        session: Session = Depends(get_session)
+):
+    """Выход из системы - отзыв access-токена (и refresh-токена, если передан) и удаление cookie"""
+    revoke_token(token, session)
+    revoke_token(refresh_token, session, expected_type="refresh")
     response.delete_cookie(
         key="access_token",
         path="/"
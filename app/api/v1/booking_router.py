@@ -7,15 +7,19 @@ from app.db.session import get_session
 from app.schemas.booking_schema import BookingCreate, BookingResponse, ConnectionAddPayload
 from app.controllers.booking_controller import *
 from app.core.security import get_current_user, admin_required, dispatcher_or_higher
-from typing import List
+from app.core.idempotency import idempotent, idempotency_key_header
+from typing import List, Optional
 
 router = APIRouter(prefix="", tags=["Бронирование"])
 
 
 @router.post("/", response_model=List[BookingResponse], status_code=status.HTTP_201_CREATED)
-def sell_ticket_endpoint(data: BookingCreate, session: Session = Depends(get_session), current_user=Depends(dispatcher_or_higher)):
-    bookings = sell_ticket(data, session)
-    return [BookingResponse.model_validate(b, from_attributes=True) for b in bookings]
+def sell_ticket_endpoint(data: BookingCreate, session: Session = Depends(get_session), current_user=Depends(dispatcher_or_higher),
+                         idempotency_key: Optional[str] = Depends(idempotency_key_header)):
+    def handler():
+        bookings = sell_ticket(data, session)
+        return [BookingResponse.model_validate(b, from_attributes=True) for b in bookings]
+    return idempotent("v1:bookings", idempotency_key, current_user.id, data, status.HTTP_201_CREATED, handler)
 
 @router.post("/{booking_code}/connections", response_model=List[BookingResponse], status_code=status.HTTP_201_CREATED)
 def add_connections_endpoint(booking_code: str, data: ConnectionAddPayload, session: Session = Depends(get_session), current_user=Depends(dispatcher_or_higher)):
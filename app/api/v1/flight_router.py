@@ -1,18 +1,22 @@
-from fastapi import APIRouter, Depends, status, HTTPException, Response
+from fastapi import APIRouter, Depends, Query, status, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select
 from app.db.session import get_session
 from app.schemas.flight_schema import FlightCreate, FlightUpdate, FlightResponse, FlightWithPassengersResponse, \
     PassengerBrief, BookingPassengerResponse
 from app.models.flight import Flight
 from app.controllers.flight_controller import (
-    create_flight, get_flight_by_id, get_flight_by_number,
+    create_flight, get_flight_by_number,
     update_flight, delete_flight, search_flights_by_arrival,
-    get_flight_with_passengers_by_number, delete_all_flights
+    get_flight_with_passengers_by_number, delete_all_flights, iter_flight_manifest
 )
+from app.controllers.inventory_controller import get_flight_snapshot
+from app.core.export import csv_stream, ndjson_stream
 from app.core.security import get_current_user, admin_required, dispatcher_or_higher
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlmodel import paginate
-from typing import List
+from typing import List, Optional
+from datetime import date
 
 router = APIRouter(prefix="", tags=["Авиарейсы"])
 
@@ -31,8 +35,11 @@ def get_flights_endpoint(session: Session = Depends(get_session), current_user =
 
 @router.get("/{flight_id}", response_model=FlightResponse)
 def get_flight_endpoint(flight_id: int, session: Session = Depends(get_session), current_user = Depends(get_current_user)):
-    flight = get_flight_by_id(flight_id, session)
-    return FlightResponse.model_validate(flight, from_attributes=True)
+    # Горячие рейсы отдаются из кэша доступности без обращения к БД
+    flight = get_flight_snapshot(flight_id, session)
+    if flight is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Рейс не найден")
+    return FlightResponse.model_validate(flight)
 
 @router.put("/{flight_id}", response_model=FlightResponse)
 def update_flight_endpoint(
@@ -58,10 +65,11 @@ def search_flights_by_arrival_endpoint(airport_query: str, session: Session = De
 @router.get("/by-number/{flight_number}", response_model=FlightWithPassengersResponse)
 def get_flight_by_number_with_passengers_endpoint(
         flight_number: str,
+        departure_date: Optional[date] = Query(None, alias="date", description="Дата вылета (номер повторяется по расписанию)"),
         session: Session = Depends(get_session),
         current_user=Depends(dispatcher_or_higher)
 ):
-    flight, bookings_data = get_flight_with_passengers_by_number(flight_number, session)
+    flight, bookings_data = get_flight_with_passengers_by_number(flight_number, session, departure_date)
     flight_response = FlightResponse.model_validate(flight, from_attributes=True)
 
     # Преобразуем список словарей в Pydantic-модели
@@ -69,13 +77,47 @@ def get_flight_by_number_with_passengers_endpoint(
 
     return FlightWithPassengersResponse(flight=flight_response, passengers=passengers_list)
 
+
+MANIFEST_COLUMNS = ["id", "booking_code", "booked_at", "seat", "class_type", "full_name", "passport_number"]
+
+
+@router.get("/by-number/{flight_number}/manifest.csv", response_class=StreamingResponse)
+def export_manifest_csv_endpoint(
+        flight_number: str,
+        departure_date: Optional[date] = Query(None, alias="date", description="Дата вылета (номер повторяется по расписанию)"),
+        session: Session = Depends(get_session),
+        current_user=Depends(dispatcher_or_higher)
+):
+    """Список пассажиров рейса в CSV; строки отдаются по мере чтения из БД"""
+    rows = iter_flight_manifest(flight_number, session, departure_date)
+    values = lambda r: [r["id"], r["booking_code"], r["booked_at"], r["seat"], r["class_type"],
+                        r["passenger"]["full_name"], r["passenger"]["passport_number"]]
+    return StreamingResponse(
+        csv_stream(rows, MANIFEST_COLUMNS, values),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{flight_number.upper()}-manifest.csv"'}
+    )
+
+
+@router.get("/by-number/{flight_number}/manifest.ndjson", response_class=StreamingResponse)
+def export_manifest_ndjson_endpoint(
+        flight_number: str,
+        departure_date: Optional[date] = Query(None, alias="date", description="Дата вылета (номер повторяется по расписанию)"),
+        session: Session = Depends(get_session),
+        current_user=Depends(dispatcher_or_higher)
+):
+    """Список пассажиров рейса в NDJSON (объект на строку)"""
+    return StreamingResponse(ndjson_stream(iter_flight_manifest(flight_number, session, departure_date)),
+                             media_type="application/x-ndjson")
+
 @router.delete("/", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(admin_required)])
 def delete_all_flights_endpoint(
     confirm: bool = False,
+    chunk_size: Optional[int] = Query(None, ge=1, le=100000, description="Удалять порциями по chunk_size рейсов"),
     session: Session = Depends(get_session),
     current_user=Depends(admin_required)
 ):
     if not confirm:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Подтвердите удаление: ?confirm=true")
-    delete_all_flights(session)
+    delete_all_flights(session, chunk_size)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
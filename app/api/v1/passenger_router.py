@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, status, HTTPException
 from sqlmodel import Session, select
-from typing import List
+from typing import List, Optional
 
 from app.db.session import get_session
 from app.schemas.passenger_schema import (
@@ -19,6 +19,7 @@ from app.controllers.passenger_controller import (
     update_passenger as ctrl_update_passenger # Добавлен импорт
 )
 from app.core.security import get_current_user, admin_required, dispatcher_or_higher
+from app.core.idempotency import idempotent, idempotency_key_header
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlmodel import paginate
 
@@ -29,10 +30,13 @@ router = APIRouter(prefix="", tags=["Пассажиры"])
 def create_passenger_endpoint(
     data: PassengerCreate,
     session: Session = Depends(get_session),
-    current_user = Depends(dispatcher_or_higher)
+    current_user = Depends(dispatcher_or_higher),
+    idempotency_key: Optional[str] = Depends(idempotency_key_header)
 ):
-    passenger = ctrl_create_passenger(data, session)
-    return PassengerResponse.model_validate(passenger, from_attributes=True)
+    def handler():
+        passenger = ctrl_create_passenger(data, session)
+        return PassengerResponse.model_validate(passenger, from_attributes=True)
+    return idempotent("v1:passengers", idempotency_key, current_user.id, data, status.HTTP_201_CREATED, handler)
 
 
 @router.get("", response_model=Page[PassengerResponse]) # Используем Page для пагинации
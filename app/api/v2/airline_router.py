@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, Query, status
 from sqlmodel import Session, select
 from app.db.session import get_session
+from app.db.bulk import bulk_insert
 from app.models.airline import Airline
 from app.schemas.airline_schema import AirlineCreate, AirlineResponse
 from app.core.security import admin_required, get_current_user
@@ -25,7 +26,9 @@ def get_airline(code: str, session: Session = Depends(get_session), _=Depends(ge
 @router.post("", response_model=AirlineResponse, status_code=201, dependencies=[Depends(admin_required)])
 def create_airline(data: AirlineCreate, session: Session = Depends(get_session)):
     al = Airline(code=data.code.upper(), name=data.name)
-    session.add(al); session.commit(); session.refresh(al)
+    bulk_insert(session, [al]); session.commit()
+    from app.controllers.reference_controller import remember_airline
+    remember_airline(al.code)
     return al
 
 @router.put("/{code}", response_model=AirlineResponse, dependencies=[Depends(admin_required)])
@@ -40,4 +43,6 @@ def update_airline(code: str, data: AirlineCreate, session: Session = Depends(ge
 def delete_airline(code: str, session: Session = Depends(get_session)):
     al = session.get(Airline, code.upper())
     if not al: raise status.HTTP_404_NOT_FOUND
-    session.delete(al); session.commit()
\ No newline at end of file
+    session.delete(al); session.commit()
+    from app.controllers.reference_controller import forget_airline
+    forget_airline(code.upper())
\ No newline at end of file
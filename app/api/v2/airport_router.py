@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, Query, status, HTTPException
 from sqlmodel import Session, select, col, or_
 from app.db.session import get_session
+from app.db.bulk import bulk_insert
 from app.models.airport import Airport
-from app.schemas.airport_schema import AirportCreate, AirportUpdate, AirportResponse
+from app.schemas.airport_schema import AirportCreate, AirportUpdate, AirportResponse, BoardResponse
 from app.core.security import admin_required, get_current_user
 from fastapi_pagination import Page
+from datetime import datetime, timedelta
+from typing import Literal, Optional
 from fastapi_pagination.ext.sqlmodel import paginate
 
 router = APIRouter()
@@ -41,7 +44,28 @@ def create_airport(data: AirportCreate, session: Session = Depends(get_session))
     if session.exec(select(Airport).where(Airport.icao_code == data.icaoCode.upper())).first():
         raise HTTPException(status_code=400, detail="ICAO код уже занят")
     ap = Airport(icao_code=data.icaoCode.upper(), name=data.name)
-    session.add(ap)
+    bulk_insert(session, [ap])
     session.commit()
-    session.refresh(ap)
-    return ap
\ No newline at end of file
+    from app.controllers.airport_controller import airport_index_upsert
+    from app.controllers.reference_controller import remember_airport
+    airport_index_upsert(ap)
+    remember_airport(ap.icao_code)
+    return ap
+
+
+@router.get("/{icao}/board", response_model=BoardResponse)
+def get_board(
+        icao: str,
+        direction: Literal["departures", "arrivals"] = Query("departures"),
+        start: Optional[datetime] = Query(None, alias="from"),
+        end: Optional[datetime] = Query(None, alias="to"),
+        session: Session = Depends(get_session),
+        _=Depends(get_current_user)
+):
+    """Табло вылетов/прилётов аэропорта; по умолчанию - с двух часов назад на 12 часов вперёд"""
+    from app.controllers.board_controller import get_airport_board
+    if start is None:
+        start = end - timedelta(hours=14) if end else datetime.now() - timedelta(hours=2)
+    if end is None:
+        end = start + timedelta(hours=14)
+    return get_airport_board(icao, direction, start, end, session)
@@ -1,68 +1,96 @@
-from fastapi import APIRouter, Depends, status, Response, HTTPException
-from sqlmodel import Session, select
+from typing import Optional
+
+from fastapi import APIRouter, Depends, status, Request, Response, HTTPException
+from sqlmodel import Session
 from app.db.session import get_session
 from app.models.user import User
 from app.schemas.user_schema import UserCreate, UserLogin, UserResponse, TokenResponse, UserUpdateRole
 from app.core.security import (
-    hash_password, verify_password, create_access_token,
-    create_refresh_token, decode_token, get_current_user, admin_required
+    decode_token, get_current_user, admin_required, get_optional_token, Principal
 )
+from app.core import token_denylist
+from app.core.rate_limit import throttle_auth
+from app.controllers.token_controller import revoke_token, revoke_user_tokens
+from app.core.password_pool import pool_stats
+from app.controllers.user_controller import create_user_async, authenticate_user_async, refresh_access_token, \
+    after_role_change
 
 router = APIRouter()
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(data: UserCreate, session: Session = Depends(get_session)):
-    if session.exec(select(User).where(User.username == data.username)).first():
-        raise HTTPException(status_code=400, detail="Пользователь уже существует")
-    user = User(username=data.username, password=hash_password(data.password), role="guest")
-    session.add(user)
-    session.commit()
-    session.refresh(user)
-    return user
+async def register(data: UserCreate, request: Request, session: Session = Depends(get_session)):
+    throttle_auth(request, data.username, scope="register")
+    return await create_user_async(data, session)
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(data: UserLogin, response: Response, session: Session = Depends(get_session)):
-    user = session.exec(select(User).where(User.username == data.username)).first()
-    if not user or not verify_password(data.password, user.password):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Неверные учетные данные")
-
-    access_token = create_access_token({"sub": user.username})
-    refresh_token = create_refresh_token({"sub": user.username})
+async def login(data: UserLogin, request: Request, response: Response, session: Session = Depends(get_session)):
+    # Лимит попыток - до проверки пароля и запросов к БД
+    throttle_auth(request, data.username)
+    tokens = await authenticate_user_async(data.username, data.password, session)
 
     # Установка токена в куки для тестов, которые это проверяют
-    response.set_cookie(key="access_token", value=access_token, httponly=True)
+    response.set_cookie(key="access_token", value=tokens["access_token"], httponly=True)
 
-    return {
-        "access_token": access_token,
-        "refreshToken": refresh_token,
-        "tokenType": "bearer"
-    }
+    return tokens
 
 
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
+def get_me(current_user: Principal = Depends(get_current_user)):
     return current_user
 
 
 @router.post("/refresh", response_model=TokenResponse)
 def refresh(refresh_token: str, session: Session = Depends(get_session)):
+    token_denylist.sync(session)
     username = decode_token(refresh_token, expected_type="refresh")
     if not username:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Невалидный refresh токен")
     return {
-        "access_token": create_access_token({"sub": username}),
+        "access_token": refresh_access_token(username, session),
         "tokenType": "bearer"
     }
 
 
 @router.post("/logout")
-def logout(response: Response):
+def logout(
+    response: Response,
+    refresh_token: Optional[str] = None,
+    token: Optional[str] = Depends(get_optional_token),
+    session: Session = Depends(get_session)
+):
+    """Отзывает access-токен запроса (и refresh-токен, если передан) и удаляет cookie"""
+    revoke_token(token, session)
+    revoke_token(refresh_token, session, expected_type="refresh")
     response.delete_cookie(key="access_token")
     return {"detail": "Logged out"}
 
 
+@router.post("/logout-all", status_code=status.HTTP_204_NO_CONTENT)
+def logout_all(response: Response, current_user: Principal = Depends(get_current_user),
+               session: Session = Depends(get_session)):
+    """Отзывает все выданные пользователю токены (на всех устройствах)"""
+    revoke_user_tokens(current_user.username, session)
+    response.delete_cookie(key="access_token")
+
+
+@router.post("/{user_id}/revoke", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(admin_required)])
+def revoke_user(user_id: int, session: Session = Depends(get_session)):
+    """Отзывает все токены пользователя (администратор)"""
+    user = session.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="Пользователь не найден")
+    revoke_user_tokens(user.username, session)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/password-pool", dependencies=[Depends(admin_required)])
+def password_pool_metrics():
+    """Счётчики пула хеширования паролей: очередь, отказы, время ожидания"""
+    return pool_stats()
+
+
 @router.put("/{user_id}/role", response_model=UserResponse, dependencies=[Depends(admin_required)])
 def change_role(user_id: int, data: UserUpdateRole, session: Session = Depends(get_session)):
     user = session.get(User, user_id)
@@ -72,4 +100,5 @@ def change_role(user_id: int, data: UserUpdateRole, session: Session = Depends(g
     session.add(user)
     session.commit()
     session.refresh(user)
+    after_role_change(user, session)
     return user
\ No newline at end of file
@@ -1,13 +1,16 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, Query, status, HTTPException
 from sqlmodel import Session, select
 from app.db.session import get_session
 from app.models.booking import Booking, generate_booking_code
-from app.models.flight import Flight
 from app.models.passenger import Passenger
-from app.schemas.booking_schema import BookingCreate, BookingResponse
+from app.schemas.booking_schema import (
+    BookingCreate, BookingResponse, BookingBulkCreate, BookingBulkCancel, BookingCancelResult, ItineraryResponse, BookingBulkItemResult, SeatHoldCreate, SeatHoldConfirm, SeatHoldResponse, SeatHoldLegResponse
+)
+from app.controllers import hold_controller
 from app.core.security import dispatcher_or_higher, get_current_user, admin_required
+from app.core.idempotency import idempotent, idempotency_key_header
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlmodel import paginate
 
@@ -30,31 +33,102 @@ def list_bookings(
     return paginate(session, query.order_by(Booking.created_at.desc()))
 
 
+@router.get("/pnr/{booking_code}", response_model=ItineraryResponse)
+def get_itinerary(booking_code: str, session: Session = Depends(get_session), _=Depends(get_current_user)):
+    """Полный маршрут по коду бронирования: рейсы, пассажиры и места"""
+    from app.controllers.booking_controller import get_itinerary as controller_get_itinerary
+    return controller_get_itinerary(booking_code, session)
+
+
 @router.post("", response_model=list[BookingResponse], status_code=status.HTTP_201_CREATED)
 def create_bookings(
         data: BookingCreate,
         session: Session = Depends(get_session),
-        _=Depends(dispatcher_or_higher)
+        current_user=Depends(dispatcher_or_higher),
+        idempotency_key: Optional[str] = Depends(idempotency_key_header)
 ):
     from app.controllers.booking_controller import sell_ticket as controller_sell_ticket
-    # Используем контроллер для продажи билетов с проверкой мест
-    bookings = controller_sell_ticket(data, session)
-    return bookings
 
+    def handler():
+        # Используем контроллер для продажи билетов с проверкой мест
+        bookings = controller_sell_ticket(data, session)
+        return [BookingResponse.model_validate(b, from_attributes=True) for b in bookings]
+    return idempotent("v2:bookings", idempotency_key, current_user.id, data, status.HTTP_201_CREATED, handler)
+
+
+@router.post("/bulk", response_model=List[BookingBulkItemResult])
+def create_bookings_bulk(
+        data: BookingBulkCreate,
+        session: Session = Depends(get_session),
+        _=Depends(dispatcher_or_higher)
+):
+    """Пакетная продажа билетов одной транзакцией с результатом по каждому элементу"""
+    from app.controllers.booking_controller import sell_tickets_bulk
+    results = sell_tickets_bulk(data.items, session, all_or_nothing=data.allOrNothing)
+    return [
+        BookingBulkItemResult(
+            index=r["index"],
+            success=r["success"],
+            bookings=[BookingResponse.model_validate(b, from_attributes=True) for b in r["bookings"]],
+            error=r["error"]
+        )
+        for r in results
+    ]
+
+
+def _hold_response(holds) -> SeatHoldResponse:
+    return SeatHoldResponse(
+        holdCode=holds[0].hold_code,
+        expiresAt=holds[0].expires_at,
+        legs=[SeatHoldLegResponse(flightId=h.flight_id, seats=h.seat_list) for h in holds]
+    )
 
-@router.delete("/{booking_id}", status_code=status.HTTP_204_NO_CONTENT)
-def cancel_booking(booking_id: int, session: Session = Depends(get_session), _=Depends(admin_required)):
-    booking = session.get(Booking, booking_id)
-    if not booking:
-        raise HTTPException(status_code=404, detail="Бронирование не найдено")
 
-    flight = session.get(Flight, booking.flight_id)
-    if flight:
-        flight.free_seats += 1
-        session.add(flight)
+@router.post("/holds", response_model=SeatHoldResponse, status_code=status.HTTP_201_CREATED)
+def create_hold(data: SeatHoldCreate, session: Session = Depends(get_session), _=Depends(dispatcher_or_higher)):
+    """Временное удержание мест на рейсе и пересадках (снимается автоматически по истечении ttlSeconds)"""
+    return _hold_response(hold_controller.create_hold(data, session))
 
-    session.delete(booking)
-    session.commit()
+
+@router.post("/holds/sweep")
+def sweep_holds(session: Session = Depends(get_session), _=Depends(admin_required)):
+    """Принудительное освобождение всех просроченных удержаний"""
+    return {"released": hold_controller.sweep_expired_holds(session)}
+
+
+@router.get("/holds/{hold_code}", response_model=SeatHoldResponse)
+def get_hold(hold_code: str, session: Session = Depends(get_session), _=Depends(dispatcher_or_higher)):
+    return _hold_response(hold_controller.get_hold(hold_code, session))
+
+
+@router.post("/holds/{hold_code}/confirm", response_model=list[BookingResponse], status_code=status.HTTP_201_CREATED)
+def confirm_hold(hold_code: str, data: SeatHoldConfirm, session: Session = Depends(get_session),
+                 _=Depends(dispatcher_or_higher)):
+    """Оформление бронирований на удерживаемые места"""
+    return hold_controller.confirm_hold(hold_code, data, session)
+
+
+@router.delete("/holds/{hold_code}", status_code=status.HTTP_204_NO_CONTENT)
+def release_hold(hold_code: str, session: Session = Depends(get_session), _=Depends(dispatcher_or_higher)):
+    hold_controller.release_hold(hold_code, session)
+
+
+@router.post("/cancel", response_model=BookingCancelResult)
+def cancel_bookings(data: BookingBulkCancel, session: Session = Depends(get_session), _=Depends(admin_required)):
+    """Групповая отмена бронирований по коду (целиком, по пассажирам или плечам) или списку id"""
+    from app.controllers.booking_controller import cancel_tickets
+    deleted = cancel_tickets(data, session)
+    released = {}
+    for row in deleted:
+        released[row["flight_id"]] = released.get(row["flight_id"], 0) + 1
+    return BookingCancelResult(cancelled=len(deleted), bookingIds=[row["id"] for row in deleted], releasedSeats=released)
+
+
+@router.delete("/{booking_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_booking(booking_id: int, session: Session = Depends(get_session), _=Depends(admin_required)):
+    from app.controllers.booking_controller import cancel_ticket as controller_cancel_ticket
+    # Контроллер возвращает место в карту мест рейса и увеличивает free_seats
+    controller_cancel_ticket(booking_id, session)
 
 
 @router.get("/by-flight/{flight_id}", response_model=List[BookingResponse])
@@ -1,63 +1,154 @@
-from fastapi import APIRouter, Depends, Query, status, HTTPException
+from typing import List, Optional
+
+from fastapi import APIRouter, Body, Depends, Query, status, HTTPException
 from sqlmodel import Session, select
 from datetime import date
 from app.db.session import get_session
 from app.models.flight import Flight
-from app.schemas.flight_schema import FlightCreate, FlightResponse
-from app.core.security import admin_required, get_current_user
+from app.schemas.flight_schema import FlightCreate, FlightResponse, SeatMapResponse, RouteResponse, \
+    FlightScheduleCreate, FlightScheduleResult, FlightOccupancyResponse
+from app.core.security import admin_required, get_current_user, dispatcher_or_higher
+from app.controllers.inventory_controller import describe_seat_map
+from app.controllers.route_controller import search_routes
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlmodel import paginate
 
 router = APIRouter()
 
 
+# Допустимые ключи сортировки (camelCase из запроса -> колонки модели)
+FLIGHT_SORT_KEYS = {
+    "departureDate": (Flight.departure_date, Flight.departure_time),
+    "departureTime": (Flight.departure_time,),
+    "flightNumber": (Flight.flight_number,),
+    "basePrice": (Flight.base_price,),
+    "freeSeats": (Flight.free_seats,),
+}
+
+
 @router.get("", response_model=Page[FlightResponse])
-def list_flights(session: Session = Depends(get_session), _=Depends(get_current_user)):
-    return paginate(session, select(Flight).order_by(Flight.departure_date))
+def list_flights(
+        origin: Optional[str] = Query(None, min_length=2, max_length=4, description="ICAO аэропорта вылета"),
+        destination: Optional[str] = Query(None, min_length=2, max_length=4, description="ICAO аэропорта прибытия"),
+        date_from: Optional[date] = Query(None, alias="dateFrom"),
+        date_to: Optional[date] = Query(None, alias="dateTo"),
+        airline: Optional[str] = Query(None, min_length=3, max_length=3, description="Код авиакомпании"),
+        min_free_seats: Optional[int] = Query(None, alias="minFreeSeats", ge=1),
+        min_price: Optional[float] = Query(None, alias="minPrice", ge=0),
+        max_price: Optional[float] = Query(None, alias="maxPrice", ge=0),
+        sort_by: str = Query("departureDate"),
+        order: str = Query("asc"),
+        session: Session = Depends(get_session),
+        _=Depends(get_current_user)
+):
+    """
+    Рейсы с фильтрами. Условия - равенства и диапазоны по самим колонкам (без функций),
+    поэтому маршрут + даты и авиакомпания + даты выбираются по составным индексам.
+    """
+    if sort_by not in FLIGHT_SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort_by должен быть одним из: {', '.join(FLIGHT_SORT_KEYS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order должен быть asc или desc")
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="dateFrom не может быть позже dateTo")
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=400, detail="minPrice не может превышать maxPrice")
+
+    query = select(Flight)
+    # Коды хранятся в верхнем регистре - приводим параметр, а не колонку
+    if origin:
+        query = query.where(Flight.departure_airport_icao == origin.upper())
+    if destination:
+        query = query.where(Flight.arrival_airport_icao == destination.upper())
+    if airline:
+        query = query.where(Flight.airline_code == airline.upper())
+    if date_from:
+        query = query.where(Flight.departure_date >= date_from)
+    if date_to:
+        query = query.where(Flight.departure_date <= date_to)
+    if min_free_seats is not None:
+        query = query.where(Flight.free_seats >= min_free_seats)
+    if min_price is not None:
+        query = query.where(Flight.base_price >= min_price)
+    if max_price is not None:
+        query = query.where(Flight.base_price <= max_price)
+
+    # id в конце - стабильный порядок между страницами
+    columns = FLIGHT_SORT_KEYS[sort_by] + (Flight.id,)
+    query = query.order_by(*(column.asc() if order == "asc" else column.desc() for column in columns))
+    return paginate(session, query)
+
+
+@router.get("/routes", response_model=List[RouteResponse])
+def find_routes(
+        origin: str = Query(..., min_length=4, max_length=4, description="ICAO аэропорта вылета"),
+        destination: str = Query(..., min_length=4, max_length=4, description="ICAO аэропорта прибытия"),
+        day: date = Query(..., alias="date", description="Дата вылета"),
+        passengers: int = Query(1, ge=1, le=50),
+        max_legs: int = Query(3, alias="maxLegs", ge=1, le=5),
+        min_connection: int = Query(60, alias="minConnectionMinutes", ge=0, le=1440),
+        max_connection: int = Query(1440, alias="maxConnectionMinutes", ge=1, le=2880),
+        limit: int = Query(5, ge=1, le=20),
+        session: Session = Depends(get_session),
+        _=Depends(get_current_user)
+):
+    """Поиск маршрутов с пересадками: лучшие варианты по времени прилёта с учётом свободных мест"""
+    if min_connection > max_connection:
+        raise HTTPException(status_code=400, detail="minConnectionMinutes не может превышать maxConnectionMinutes")
+    return search_routes(origin, destination, day, session, passengers, max_legs, min_connection, max_connection, limit)
 
 
 @router.post("", response_model=FlightResponse, status_code=status.HTTP_201_CREATED)
 def create_flight(data: FlightCreate, session: Session = Depends(get_session), _=Depends(admin_required)):
-    # Проверяем существование зависимостей
-    from app.models.airline import Airline
-    from app.models.airport import Airport
-    from sqlmodel import select
-    
-    airline = session.exec(select(Airline).where(Airline.code == data.airlineCode.upper())).first()
-    if not airline:
-        raise HTTPException(status_code=400, detail="Авиакомпания не найдена")
-    
-    dep_airport = session.exec(select(Airport).where(Airport.icao_code == data.departureAirportIcao.upper())).first()
-    if not dep_airport:
-        raise HTTPException(status_code=400, detail="Аэропорт отправления не найден")
-    
-    arr_airport = session.exec(select(Airport).where(Airport.icao_code == data.arrivalAirportIcao.upper())).first()
-    if not arr_airport:
-        raise HTTPException(status_code=400, detail="Аэропорт прибытия не найден")
-    
-    if dep_airport.icao_code == arr_airport.icao_code:
-        raise HTTPException(status_code=400, detail="Аэропорты отправления и прибытия не могут совпадать")
-    
-    flight = Flight(
-        flight_number=data.flightNumber,
-        airline_code=data.airlineCode,
-        departure_airport_icao=data.departureAirportIcao,
-        arrival_airport_icao=data.arrivalAirportIcao,
-        departure_date=data.departureDate,
-        departure_time=data.departureTime,
-        arrival_time=data.arrivalTime,
-        total_seats=data.totalSeats,
-        free_seats=data.totalSeats  # ✅ Всегда устанавливаем максимальное количество
-    )
-    session.add(flight)
-    session.commit()
-    session.refresh(flight)
-    return flight
+    from app.controllers.flight_controller import create_flight as controller_create_flight
+    return controller_create_flight(data, session)
 
-@router.delete("/{flight_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_flight(flight_id: int, session: Session = Depends(get_session), _=Depends(admin_required)):
+
+@router.get("/occupancy", response_model=List[FlightOccupancyResponse])
+def get_occupancy(
+        flight_ids: Optional[List[int]] = Query(None, alias="flightIds"),
+        departure_date: Optional[date] = Query(None, alias="date"),
+        airline: Optional[str] = Query(None, min_length=3, max_length=3),
+        origin: Optional[str] = Query(None, max_length=4),
+        destination: Optional[str] = Query(None, max_length=4),
+        session: Session = Depends(get_session),
+        _=Depends(dispatcher_or_higher)
+):
+    """Загрузка рейсов в разрезе класса и багажа: по списку id или по дате (с авиакомпанией/маршрутом)"""
+    from app.controllers.occupancy_controller import get_occupancy as controller_get_occupancy
+    return controller_get_occupancy(session, flight_ids, departure_date, airline, origin, destination)
+
+
+@router.get("/{flight_id}/occupancy", response_model=FlightOccupancyResponse)
+def get_flight_occupancy(flight_id: int, session: Session = Depends(get_session), _=Depends(dispatcher_or_higher)):
+    from app.controllers.occupancy_controller import get_occupancy as controller_get_occupancy
+    stats = controller_get_occupancy(session, [flight_id])
+    if not stats:
+        raise HTTPException(status_code=404, detail="Рейс не найден")
+    return stats[0]
+
+
+@router.post("/schedule", response_model=FlightScheduleResult, status_code=status.HTTP_201_CREATED)
+def create_schedule(
+        data: List[FlightScheduleCreate] = Body(..., min_length=1, max_length=500),
+        session: Session = Depends(get_session),
+        _=Depends(admin_required)
+):
+    """Пакетное создание рейсов по расписаниям (дни недели в диапазоне дат)"""
+    from app.controllers.flight_controller import create_flight_schedule
+    return create_flight_schedule(data, session)
+
+
+@router.get("/{flight_id}/seat-map", response_model=SeatMapResponse)
+def get_seat_map(flight_id: int, session: Session = Depends(get_session), _=Depends(get_current_user)):
+    """Компоновка салона и свободные места по рядам"""
     flight = session.get(Flight, flight_id)
     if not flight:
         raise HTTPException(status_code=404, detail="Рейс не найден")
-    session.delete(flight)
-    session.commit()
\ No newline at end of file
+    return describe_seat_map(flight, session)
+
+
+@router.delete("/{flight_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_flight(flight_id: int, session: Session = Depends(get_session), _=Depends(admin_required)):
+    from app.controllers.flight_controller import delete_flight as controller_delete_flight
+    controller_delete_flight(flight_id, session)
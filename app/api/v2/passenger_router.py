@@ -1,13 +1,15 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, Query, status, HTTPException
 from sqlmodel import Session, select, or_, col
 from app.db.session import get_session
+from app.db.bulk import bulk_insert
 from app.models.booking import Booking
 from app.models.passenger import Passenger
 from app.schemas.booking_schema import BookingResponse
 from app.schemas.passenger_schema import PassengerCreate, PassengerUpdate, PassengerResponse
 from app.core.security import dispatcher_or_higher, get_current_user
+from app.core.idempotency import idempotent, idempotency_key_header
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlmodel import paginate
 
@@ -40,18 +42,20 @@ def get_passenger(passenger_id: int, session: Session = Depends(get_session), _=
 
 
 @router.post("", response_model=PassengerResponse, status_code=201)
-def create_passenger(data: PassengerCreate, session: Session = Depends(get_session), _=Depends(dispatcher_or_higher)):
-    if session.exec(select(Passenger).where(Passenger.passport_number == data.passportNumber)).first():
-        raise HTTPException(status_code=400, detail="Duplicate passport")
-
-    p = Passenger(
-        passport_number=data.passportNumber,
-        full_name=data.fullName,
-        birth_date=data.birthDate,
-        passport_issued_by=data.passportIssuedBy,
-        passport_issue_date=data.passportIssueDate
-    )
-    session.add(p)
-    session.commit()
-    session.refresh(p)
-    return p
+def create_passenger(data: PassengerCreate, session: Session = Depends(get_session), current_user=Depends(dispatcher_or_higher),
+                     idempotency_key: Optional[str] = Depends(idempotency_key_header)):
+    def handler():
+        if session.exec(select(Passenger).where(Passenger.passport_number == data.passportNumber)).first():
+            raise HTTPException(status_code=400, detail="Duplicate passport")
+
+        p = Passenger(
+            passport_number=data.passportNumber,
+            full_name=data.fullName,
+            birth_date=data.birthDate,
+            passport_issued_by=data.passportIssuedBy,
+            passport_issue_date=data.passportIssueDate
+        )
+        bulk_insert(session, [p])
+        session.commit()
+        return PassengerResponse.model_validate(p, from_attributes=True)
+    return idempotent("v2:passengers", idempotency_key, current_user.id, data, 201, handler)
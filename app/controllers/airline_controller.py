@@ -2,6 +2,8 @@ from sqlmodel import Session, select
 from fastapi import HTTPException, status
 from app.models.airline import Airline
 from app.schemas.airline_schema import AirlineCreate
+from app.db.bulk import bulk_insert
+from app.controllers.reference_controller import remember_airline, forget_airline
 from typing import List
 
 
@@ -22,9 +24,9 @@ def create_airline(data: AirlineCreate, session: Session) -> Airline:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Авиакомпания с таким кодом уже существует")
 
     airline = Airline(code=data.code, name=data.name)
-    session.add(airline)
+    bulk_insert(session, [airline])
     session.commit()
-    session.refresh(airline)
+    remember_airline(airline.code)
     return airline
 
 
@@ -43,4 +45,5 @@ def delete_airline(code: str, session: Session):
     if not airline:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Авиакомпания не найдена")
     session.delete(airline)
-    session.commit()
\ No newline at end of file
+    session.commit()
+    forget_airline(code.upper())
\ No newline at end of file
@@ -4,8 +4,45 @@ from sqlmodel import Session, select
 from fastapi import HTTPException, status
 from app.models.airport import Airport
 from app.schemas.airport_schema import AirportCreate, AirportUpdate
+from app.db.bulk import bulk_insert
+from app.core.cache import TTLCache
+from app.controllers.reference_controller import remember_airport, forget_airport
+from app.core.ngram_index import NgramIndex
 from typing import List
 
+# Индекс названий и кодов аэропортов для поиска по подстроке. Справочник небольшой и меняется редко:
+# изменения в этом процессе применяются сразу, из других воркеров - после перечитывания по TTL
+_name_index_cache = TTLCache(maxsize=1, ttl=300)
+
+
+def airport_name_index(session: Session) -> NgramIndex:
+    index = _name_index_cache.get("airports")
+    if index is None:
+        index = NgramIndex()
+        for icao_code, name in session.exec(select(Airport.icao_code, Airport.name)).all():
+            index.add(icao_code, icao_code, name)
+        _name_index_cache.set("airports", index)
+    return index
+
+
+def airport_index_upsert(airport: Airport):
+    """Обновляет аэропорт в индексе поиска (вызывать после commit)"""
+    index = _name_index_cache.get("airports")
+    if index is not None:
+        index.add(airport.icao_code, airport.icao_code, airport.name)
+
+
+def airport_index_remove(icao_code: str):
+    index = _name_index_cache.get("airports")
+    if index is not None:
+        index.remove(icao_code)
+
+
+def match_airports(query: str, session: Session) -> List[str]:
+    """ICAO-коды аэропортов, название или код которых содержит query (без учёта регистра)"""
+    return sorted(airport_name_index(session).search(query))
+
+
 def get_all_airports(session: Session) -> List[Airport]:
     """
     Возвращает список всех аэропортов (id, ИКАО и название) из БД.
@@ -58,9 +95,10 @@ def create_airport(data: AirportCreate, session: Session) -> Airport:
         icao_code=data.icaoCode.upper(), # Сохраняем в верхнем регистре для консистентности
         name=data.name
     )
-    session.add(airport)
+    bulk_insert(session, [airport])
     session.commit()
-    session.refresh(airport)
+    airport_index_upsert(airport)
+    remember_airport(airport.icao_code)
     return airport
 
 def update_airport(airport_id: int, data: AirportUpdate, session: Session) -> Airport:
@@ -81,6 +119,7 @@ def update_airport(airport_id: int, data: AirportUpdate, session: Session) -> Ai
     session.add(airport)
     session.commit()
     session.refresh(airport)
+    airport_index_upsert(airport)
     return airport
 
 def delete_airport(airport_id: int, session: Session):
@@ -94,5 +133,8 @@ def delete_airport(airport_id: int, session: Session):
             detail="Аэропорт не найден"
         )
 
+    icao_code = airport.icao_code
     session.delete(airport)
-    session.commit()
\ No newline at end of file
+    session.commit()
+    airport_index_remove(icao_code)
+    forget_airport(icao_code)
\ No newline at end of file
@@ -0,0 +1,135 @@
+# app/controllers/board_controller.py
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+from fastapi import HTTPException, status
+
+from app.core.cache import TTLCache
+from app.controllers.reference_controller import airport_exists
+from app.models.flight import Flight
+
+DIRECTIONS = ("departures", "arrivals")
+# Страховка от изменений, сделанных другими воркерами: снимок живёт не дольше этого срока
+BOARD_SNAPSHOT_TTL = 15
+BOARD_MAX_WINDOW = timedelta(days=3)
+
+_PENDING_KEY = "board_airports"
+
+# Поколение табло аэропорта растёт при каждом изменении его рейсов или свободных мест;
+# снимок с устаревшим поколением не используется
+_generations: Dict[str, int] = defaultdict(int)
+_epoch = 0
+_generations_lock = threading.Lock()
+_snapshots = TTLCache(maxsize=4096, ttl=BOARD_SNAPSHOT_TTL)
+
+
+def touch_airports(session: Session, *icao_codes: str):
+    """
+    Помечает табло аэропортов устаревшими после commit текущей транзакции
+    (до commit параллельный запрос мог бы снова закэшировать старые данные).
+    """
+    session.info.setdefault(_PENDING_KEY, set()).update(code for code in icao_codes if code)
+
+
+def touch_all_airports():
+    """Сбрасывает табло всех аэропортов (массовые изменения рейсов)"""
+    global _epoch
+    with _generations_lock:
+        _epoch += 1
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _bump_generations(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        with _generations_lock:
+            for code in pending:
+                _generations[code] += 1
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _drop_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _generation(icao: str):
+    return _epoch, _generations[icao]
+
+
+def _day_snapshot(icao: str, direction: str, day: date, session: Session) -> List[dict]:
+    """Рейсы табло аэропорта за сутки (по времени вылета или прилёта), из кэша или одним запросом по индексу"""
+    key = (icao, direction, day)
+    generation = _generation(icao)
+    cached = _snapshots.get(key)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+
+    if direction == "departures":
+        query = (
+            select(Flight)
+            .where(Flight.departure_airport_icao == icao, Flight.departure_date == day)
+            .order_by(Flight.departure_time)
+        )
+    else:
+        # Рейсы, вылетевшие накануне, могут прилететь после полуночи
+        query = (
+            select(Flight)
+            .where(Flight.arrival_airport_icao == icao, Flight.departure_date.in_([day - timedelta(days=1), day]))
+            .order_by(Flight.departure_date, Flight.arrival_time)
+        )
+    rows = []
+    for flight in session.exec(query).all():
+        departure = datetime.combine(flight.departure_date, flight.departure_time)
+        arrival = datetime.combine(flight.departure_date, flight.arrival_time)
+        if arrival <= departure:
+            arrival += timedelta(days=1)
+        if direction == "arrivals" and arrival.date() != day:
+            continue
+        rows.append({
+            "flightId": flight.id,
+            "flightNumber": flight.flight_number,
+            "airlineCode": flight.airline_code,
+            "departureAirportIcao": flight.departure_airport_icao,
+            "arrivalAirportIcao": flight.arrival_airport_icao,
+            "departure": departure,
+            "arrival": arrival,
+            "totalSeats": flight.total_seats,
+            "freeSeats": flight.free_seats,
+        })
+    time_key = "departure" if direction == "departures" else "arrival"
+    rows.sort(key=lambda row: (row[time_key], row["flightNumber"]))
+    _snapshots.set(key, (generation, rows))
+    return rows
+
+
+def get_airport_board(icao: str, direction: str, start: datetime, end: datetime, session: Session) -> dict:
+    """
+    Табло вылетов или прилётов аэропорта за интервал [start, end].
+    Собирается из суточных снимков, которые сбрасываются только при изменении рейсов
+    этого аэропорта или их свободных мест.
+    """
+    icao = icao.upper()
+    # Время рейсов хранится как местное время аэропорта без зоны: смещение в запросе
+    # (…Z, +03:00) отбрасывается, часы и минуты сравниваются как есть
+    start, end = start.replace(tzinfo=None), end.replace(tzinfo=None)
+    if direction not in DIRECTIONS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="direction должен быть departures или arrivals")
+    if end < start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Конец интервала раньше начала")
+    if end - start > BOARD_MAX_WINDOW:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Интервал табло не может превышать 3 суток")
+    if not airport_exists(icao, session):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Аэропорт не найден")
+
+    time_key = "departure" if direction == "departures" else "arrival"
+    flights = []
+    day = start.date()
+    while day <= end.date():
+        flights.extend(row for row in _day_snapshot(icao, direction, day, session) if start <= row[time_key] <= end)
+        day += timedelta(days=1)
+    return {"airportIcao": icao, "direction": direction, "from": start, "to": end, "flights": flights}
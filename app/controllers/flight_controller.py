@@ -1,13 +1,43 @@
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select, delete
 from fastapi import HTTPException, status
 
-from app.models.airline import Airline
 from app.models.booking import Booking
 from app.models.flight import Flight
 from app.models.airport import Airport
 from app.models.passenger import Passenger
-from app.schemas.flight_schema import FlightCreate, FlightUpdate
-from typing import List, Optional
+from app.models.seat_hold import SeatHold
+from app.schemas.flight_schema import FlightCreate, FlightUpdate, FlightScheduleCreate
+from app.db.bulk import bulk_insert
+from app.controllers.airport_controller import match_airports
+from app.controllers.inventory_controller import (
+    create_seat_inventory, create_seat_inventories, resize_seat_inventory, delete_seat_maps,
+    forget_flights, forget_all_flights
+)
+from app.controllers.booking_controller import invalidate_all_itineraries
+from app.controllers.board_controller import touch_airports, touch_all_airports
+from app.controllers.occupancy_controller import invalidate_occupancy, invalidate_all_occupancy
+from app.controllers.reference_controller import check_airline, check_airports, airport_exists, forget_references
+from app.controllers.route_controller import route_index_upsert, route_index_remove, route_index_clear
+from datetime import date, timedelta
+from typing import Iterator, List, Optional
+
+
+def _raise_flight_conflict(error: IntegrityError):
+    """Ошибка по нарушенному ограничению при записи рейса (вызывать после rollback)"""
+    # Сообщение СУБД о нарушении uq_flight_number_date перечисляет колонки ограничения
+    if "flight_number" in str(error.orig):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Рейс с таким номером уже существует на эту дату"
+        )
+    # Иначе - ссылка на авиакомпанию или аэропорт, удалённые другим воркером
+    forget_references()
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Авиакомпания или аэропорт рейса не найдены"
+    )
 
 
 def create_flight(data: FlightCreate, session: Session) -> Flight:
@@ -15,57 +45,21 @@ def create_flight(data: FlightCreate, session: Session) -> Flight:
     Создание нового авиарейса с полной валидацией.
     При создании рейса free_seats автоматически устанавливается равным total_seats.
     """
-    airline = session.exec(
-        select(Airline).where(Airline.code == data.airlineCode.upper())
-    ).first()
-    if not airline:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Авиакомпания с кодом {data.airlineCode} не зарегистрирована в системе"
-        )
-    dep_airport = session.exec(
-        select(Airport).where(Airport.icao_code == data.departureAirportIcao.upper())
-    ).first()
-
-    if not dep_airport:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Аэропорт отправления с ICAO-кодом {data.departureAirportIcao} не найден"
-        )
-    arr_airport = session.exec(
-        select(Airport).where(Airport.icao_code == data.arrivalAirportIcao.upper())
-    ).first()
-
-    if not arr_airport:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Аэропорт прибытия с ICAO-кодом {data.arrivalAirportIcao} не найден"
-        )
-    if dep_airport.icao_code == arr_airport.icao_code:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Аэропорты отправления и прибытия не могут совпадать"
-        )
+    # Справочники проверяются по наборам кодов в памяти; уникальность номера на дату - ограничением БД при вставке
+    check_airline(data.airlineCode.upper(), session)
+    check_airports(data.departureAirportIcao.upper(), data.arrivalAirportIcao.upper(), session)
     flight_prefix = data.flightNumber.split('-')[0].upper()
     if flight_prefix != data.airlineCode.upper():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Префикс номера рейса ({flight_prefix}) должен совпадать с кодом авиакомпании ({data.airlineCode})"
         )
-    existing_flight = session.exec(
-        select(Flight).where(Flight.flight_number == data.flightNumber.upper())
-    ).first()
-    if existing_flight:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Рейс с таким номером уже существует"
-        )
     # ✅ free_seats всегда равно total_seats при создании рейса
     flight = Flight(
         flight_number=data.flightNumber.upper(),
         airline_code=data.airlineCode.upper(),
-        departure_airport_icao=dep_airport.icao_code,
-        arrival_airport_icao=arr_airport.icao_code,
+        departure_airport_icao=data.departureAirportIcao.upper(),
+        arrival_airport_icao=data.arrivalAirportIcao.upper(),
         departure_date=data.departureDate,
         departure_time=data.departureTime,
         arrival_time=data.arrivalTime,
@@ -75,13 +69,101 @@ def create_flight(data: FlightCreate, session: Session) -> Flight:
         baggage_price=data.baggagePrice
     )
 
-    session.add(flight)
-    session.commit()
-    session.refresh(flight)
+    try:
+        bulk_insert(session, [flight])
+        # Карта мест создаётся вместе с рейсом, чтобы продажи сразу блокировали существующую строку
+        create_seat_inventory(flight, session, data.cabinLayout)
+        touch_airports(session, flight.departure_airport_icao, flight.arrival_airport_icao)
+        session.commit()
+    except IntegrityError as e:
+        session.rollback()
+        _raise_flight_conflict(e)
+    route_index_upsert(flight)
 
     return flight
 
 
+def create_flight_schedule(schedules: List[FlightScheduleCreate], session: Session) -> dict:
+    """
+    Создание рейсов по расписаниям (номер, дни недели, диапазон дат) одной транзакцией.
+    Справочники проверяются по наборам кодов в памяти, рейсы и карты мест
+    вставляются пакетно. Даты, на которые рейс с этим номером уже существует, пропускаются.
+    """
+    if not schedules:
+        return {"created": 0, "flightIds": [], "skipped": []}
+
+    # Справочники - по наборам кодов в памяти, без запросов на каждое расписание
+    for s in schedules:
+        check_airline(s.airlineCode, session)
+        check_airports(s.departureAirportIcao, s.arrivalAirportIcao, session)
+    airport_codes = {code for s in schedules for code in (s.departureAirportIcao, s.arrivalAirportIcao)}
+
+    # Даты вылетов каждого расписания
+    planned = []
+    seen = set()
+    for s in schedules:
+        days = set(s.daysOfWeek)
+        day = s.dateFrom
+        while day <= s.dateTo:
+            if day.isoweekday() in days:
+                if (s.flightNumber, day) in seen:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Рейс {s.flightNumber} на {day} повторяется в расписании"
+                    )
+                seen.add((s.flightNumber, day))
+                planned.append((s, day))
+            day += timedelta(days=1)
+
+    existing = set(session.exec(
+        select(Flight.flight_number, Flight.departure_date).where(
+            Flight.flight_number.in_({s.flightNumber for s in schedules}),
+            Flight.departure_date.between(min(s.dateFrom for s in schedules), max(s.dateTo for s in schedules))
+        )
+    ).all())
+
+    # Рейсы по расписаниям: у рейсов одного расписания одинаковая карта мест
+    groups = {id(s): (s, []) for s in schedules}
+    for s, day in planned:
+        if (s.flightNumber, day) in existing:
+            continue
+        groups[id(s)][1].append(Flight(
+            flight_number=s.flightNumber,
+            airline_code=s.airlineCode,
+            departure_airport_icao=s.departureAirportIcao,
+            arrival_airport_icao=s.arrivalAirportIcao,
+            departure_date=day,
+            departure_time=s.departureTime,
+            arrival_time=s.arrivalTime,
+            total_seats=s.totalSeats,
+            free_seats=s.totalSeats,
+            base_price=s.basePrice,
+            baggage_price=s.baggagePrice
+        ))
+
+    flights = [flight for _, group in groups.values() for flight in group]
+    try:
+        bulk_insert(session, flights)
+        for s, group in groups.values():
+            create_seat_inventories(group, session, s.cabinLayout)
+        touch_airports(session, *airport_codes)
+        session.commit()
+    except IntegrityError as e:
+        # Рейс на одну из дат успел создать другой запрос после проверки existing
+        session.rollback()
+        _raise_flight_conflict(e)
+    route_index_upsert(*flights)
+
+    return {
+        "created": len(flights),
+        "flightIds": [flight.id for flight in flights],
+        "skipped": [
+            {"flightNumber": s.flightNumber, "departureDate": day}
+            for s, day in planned if (s.flightNumber, day) in existing
+        ],
+    }
+
+
 def get_all_flights(session: Session) -> List[Flight]:
     return session.exec(select(Flight)).all()
 
@@ -93,8 +175,12 @@ def get_flight_by_id(flight_id: int, session: Session) -> Flight:
     return flight
 
 
-def get_flight_by_number(flight_number: str, session: Session) -> Flight:
-    flight = session.exec(select(Flight).where(Flight.flight_number == flight_number.upper())).first()
+def get_flight_by_number(flight_number: str, session: Session, departure_date: Optional[date] = None) -> Flight:
+    """Рейс по номеру; номер повторяется по датам расписания - без даты берётся самый ранний"""
+    query = select(Flight).where(Flight.flight_number == flight_number.upper())
+    if departure_date:
+        query = query.where(Flight.departure_date == departure_date)
+    flight = session.exec(query.order_by(Flight.departure_date)).first()
     if not flight:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Рейс не найден")
     return flight
@@ -119,80 +205,163 @@ def update_flight(flight_id: int, data: FlightUpdate, session: Session) -> Fligh
 
     #  Валидация новых аэропортов при изменении
     if 'departure_airport_icao' in snake_case_update_data:
-        dep = session.exec(
-            select(Airport).where(Airport.icao_code == snake_case_update_data['departure_airport_icao'])).first()
-        if not dep: raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                                        detail="Аэропорт отправления не найден")
+        if not airport_exists(snake_case_update_data['departure_airport_icao'], session):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Аэропорт отправления не найден")
 
     if 'arrival_airport_icao' in snake_case_update_data:
-        arr = session.exec(
-            select(Airport).where(Airport.icao_code == snake_case_update_data['arrival_airport_icao'])).first()
-        if not arr: raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Аэропорт прибытия не найден")
+        if not airport_exists(snake_case_update_data['arrival_airport_icao'], session):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Аэропорт прибытия не найден")
 
+    # Табло сбрасываются и у прежних аэропортов рейса, и у новых
+    touch_airports(session, flight.departure_airport_icao, flight.arrival_airport_icao)
     for key, value in snake_case_update_data.items():
         setattr(flight, key, value)
+    touch_airports(session, flight.departure_airport_icao, flight.arrival_airport_icao)
+
+    # Карта мест следует за изменением вместимости
+    if 'total_seats' in snake_case_update_data:
+        resize_seat_inventory(flight, session)
 
     session.add(flight)
-    session.commit()
+    try:
+        session.commit()
+    except IntegrityError as e:
+        session.rollback()
+        _raise_flight_conflict(e)
     session.refresh(flight)
+    forget_flights(flight.id)
+    invalidate_occupancy(flight.id)
+    invalidate_all_itineraries()
+    route_index_upsert(flight)
     return flight
 
 
 def delete_flight(flight_id: int, session: Session):
-    """Удаление рейса с каскадным удалением связанных бронирований"""
-    flight = session.get(Flight, flight_id)
-    if not flight:
+    """Удаление рейса с каскадным удалением связанных бронирований (пакетными DELETE, без загрузки строк)"""
+    airports = session.exec(
+        select(Flight.departure_airport_icao, Flight.arrival_airport_icao).where(Flight.id == flight_id)
+    ).first()
+    if not airports:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Рейс не найден")
 
-    # 1️⃣ Сначала удаляем все бронирования, привязанные к этому рейсу
-    bookings_to_delete = session.exec(
-        select(Booking).where(Booking.flight_id == flight_id)
-    ).all()
-
-    for booking in bookings_to_delete:
-        session.delete(booking)
-
-    # 2️⃣ Только теперь удаляем сам рейс
-    session.delete(flight)
+    # Сначала зависимые строки: бронирования, карта мест и удержания мест рейса, затем сам рейс
+    session.exec(delete(Booking).where(Booking.flight_id == flight_id))
+    delete_seat_maps(session, flight_id)
+    session.exec(delete(SeatHold).where(SeatHold.flight_id == flight_id))
+    session.exec(delete(Flight).where(Flight.id == flight_id))
+    touch_airports(session, *airports)
     session.commit()
+    forget_flights(flight_id)
+    invalidate_occupancy(flight_id)
+    invalidate_all_itineraries()
+    route_index_remove(flight_id)
 
 
 def search_flights_by_arrival(airport_query: str, session: Session) -> List[Flight]:
-    matching_airports = session.exec(
-        select(Airport.icao_code).where(
-            (Airport.name.contains(airport_query)) |
-            (Airport.icao_code.contains(airport_query.upper()))
-        )
-    ).all()
+    """
+    Рейсы в аэропорты, название или ICAO-код которых содержит airport_query (без учёта регистра).
+    В PostgreSQL - один запрос с join, условие обслуживается trigram-индексами (pg_trgm);
+    в остальных СУБД аэропорты подбираются по n-граммному индексу в памяти.
+    """
+    if not airport_query.strip():
+        return []
+    if session.get_bind().dialect.name == "postgresql":
+        return session.exec(
+            select(Flight)
+            .join(Airport, Airport.icao_code == Flight.arrival_airport_icao)
+            .where(
+                func.lower(Airport.name).contains(airport_query.lower(), autoescape=True) |
+                Airport.icao_code.contains(airport_query.upper(), autoescape=True)
+            )
+        ).all()
+    matching_airports = match_airports(airport_query, session)
     if not matching_airports:
         return []
     return session.exec(select(Flight).where(Flight.arrival_airport_icao.in_(matching_airports))).all()
 
 
-def get_flight_with_passengers_by_number(flight_number: str, session: Session):
-    flight = session.exec(select(Flight).where(Flight.flight_number == flight_number.upper())).first()
-    if not flight:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Рейс не найден")
-
-    bookings = session.exec(select(Booking).where(Booking.flight_id == flight.id)).all()
-    result = []
-    for b in bookings:
-        p = session.get(Passenger, b.passenger_id)
-        result.append({
-            "id": b.id,
-            "booking_code": b.booking_code,
-            "booked_at": b.created_at.isoformat() if b.created_at else None,
+def _manifest_rows(flight_id: int, session: Session, batch_size: Optional[int] = None) -> Iterator[dict]:
+    """
+    Строки списка пассажиров рейса одним запросом (бронирования + пассажиры через join).
+    С batch_size строки читаются из курсора порциями и не накапливаются в памяти.
+    """
+    query = (
+        select(Booking.id, Booking.booking_code, Booking.created_at, Booking.seat, Booking.class_type,
+               Passenger.full_name, Passenger.passport_number)
+        .outerjoin(Passenger, Passenger.id == Booking.passenger_id)
+        .where(Booking.flight_id == flight_id)
+        .order_by(Booking.id)
+    )
+    if batch_size:
+        query = query.execution_options(yield_per=batch_size)
+    for booking_id, code, created_at, seat, class_type, full_name, passport_number in session.exec(query):
+        yield {
+            "id": booking_id,
+            "booking_code": code,
+            "booked_at": created_at.isoformat() if created_at else None,
+            "seat": seat,
+            "class_type": class_type,
             "passenger": {
-                "full_name": p.full_name if p else "Пассажир удалён",
-                "passport_number": p.passport_number if p else "N/A"
+                "full_name": full_name if full_name is not None else "Пассажир удалён",
+                "passport_number": passport_number if passport_number is not None else "N/A"
             }
-        })
-    return flight, result
+        }
+
+
+def get_flight_with_passengers_by_number(flight_number: str, session: Session, departure_date: Optional[date] = None):
+    flight = get_flight_by_number(flight_number, session, departure_date)
+    return flight, list(_manifest_rows(flight.id, session))
 
 
-def delete_all_flights(session: Session):
-    flight_ids = session.exec(select(Flight.id)).all()
+def iter_flight_manifest(flight_number: str, session: Session, departure_date: Optional[date] = None,
+                         batch_size: int = 500) -> Iterator[dict]:
+    """Потоковый вариант списка пассажиров для выгрузки; рейс проверяется сразу, строки - по мере чтения"""
+    flight = get_flight_by_number(flight_number, session, departure_date)
+    return _manifest_rows(flight.id, session, batch_size)
+
+
+def _delete_flights_chunk(session: Session, chunk_size: int) -> int:
+    """Удаляет до chunk_size рейсов с наименьшими id вместе с зависимыми строками; возвращает их число"""
+    flight_ids = session.exec(select(Flight.id).order_by(Flight.id).limit(chunk_size)).all()
     if flight_ids:
         session.exec(delete(Booking).where(Booking.flight_id.in_(flight_ids)))
-    session.exec(delete(Flight))
-    session.commit()
\ No newline at end of file
+        delete_seat_maps(session, *flight_ids)
+        session.exec(delete(SeatHold).where(SeatHold.flight_id.in_(flight_ids)))
+        session.exec(delete(Flight).where(Flight.id.in_(flight_ids)))
+    return len(flight_ids)
+
+
+def delete_all_flights(session: Session, chunk_size: Optional[int] = None) -> int:
+    """
+    Удаление всех рейсов с бронированиями, картами и удержаниями мест.
+    Без chunk_size - четыре DELETE без условий в одной транзакции. С chunk_size рейсы
+    удаляются порциями, каждая в своей короткой транзакции, чтобы не держать блокировки
+    на всё время удаления. Возвращает число удалённых рейсов.
+    """
+    deleted = 0
+    if chunk_size:
+        while True:
+            count = _delete_flights_chunk(session, chunk_size)
+            if not count:
+                break
+            session.commit()
+            deleted += count
+            # Кэши сбрасываются после каждой порции - читатели не видят уже удалённые рейсы
+            forget_all_flights()
+            invalidate_all_occupancy()
+            invalidate_all_itineraries()
+            touch_all_airports()
+            route_index_clear()
+        return deleted
+
+    session.exec(delete(Booking))
+    delete_seat_maps(session)
+    session.exec(delete(SeatHold))
+    deleted = session.exec(delete(Flight)).rowcount
+    session.commit()
+    forget_all_flights()
+    invalidate_all_occupancy()
+    invalidate_all_itineraries()
+    touch_all_airports()
+    route_index_clear()
+    return deleted
@@ -0,0 +1,253 @@
+# app/controllers/hold_controller.py
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlmodel import Session, select, delete
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.models.booking import Booking, generate_booking_code
+from app.models.flight import Flight
+from app.models.passenger import Passenger
+from app.models.seat_hold import SeatHold
+from app.db.bulk import bulk_insert
+from app.schemas.booking_schema import SeatHoldCreate, SeatHoldConfirm
+from app.controllers.booking_controller import pick_seats, invalidate_itineraries
+from app.controllers.occupancy_controller import touch_occupancy
+from app.controllers.inventory_controller import (
+    get_seat_inventory, lock_seat_inventories, save_seat_inventory, reserve_seats, release_seats
+)
+
+SWEEP_BATCH_SIZE = 500
+# Период фоновой очистки просроченных удержаний (см. sweep_holds_periodically)
+HOLD_SWEEP_SECONDS = 30
+
+logger = logging.getLogger(__name__)
+
+
+def _seats_by_flight(holds: List[SeatHold], start: int = 0) -> Dict[int, List[str]]:
+    """Группирует удерживаемые места по рейсам, пропуская первые start мест каждой строки"""
+    seats_by_flight: Dict[int, List[str]] = defaultdict(list)
+    for hold in holds:
+        seats_by_flight[hold.flight_id].extend(hold.seat_list[start:])
+    return {flight_id: seats for flight_id, seats in seats_by_flight.items() if seats}
+
+
+def _release_held_seats(seats_by_flight: Dict[int, List[str]], session: Session):
+    """Возвращает места снятых удержаний в карты мест и в free_seats рейсов"""
+    if not seats_by_flight:
+        return
+    flights = session.exec(select(Flight).where(Flight.id.in_(seats_by_flight.keys()))).all()
+    for flight_id, (seat_map, inventory) in lock_seat_inventories(flights, session).items():
+        for seat in seats_by_flight[flight_id]:
+            inventory.release(seat)
+        save_seat_inventory(seat_map, inventory, session)
+    release_seats({flight_id: len(seats) for flight_id, seats in seats_by_flight.items()}, session)
+
+
+def release_expired_holds(flight_ids: Iterable[int], session: Session, now: Optional[datetime] = None) -> int:
+    """
+    Освобождает просроченные брони рейсов в транзакции вызывающего кода (без commit):
+    места возвращаются в продажу вместе с продажей или удержанием и откатываются вместе с ними.
+    Возвращает количество освобождённых строк.
+    """
+    expired = session.exec(
+        select(SeatHold)
+        .where(SeatHold.expires_at <= (now or datetime.utcnow()), SeatHold.flight_id.in_(list(flight_ids)))
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not expired:
+        return 0
+    _release_held_seats(_seats_by_flight(expired), session)
+    session.exec(delete(SeatHold).where(SeatHold.id.in_([h.id for h in expired])))
+    return len(expired)
+
+
+def sweep_expired_holds(session: Session, batch_size: int = SWEEP_BATCH_SIZE, now: Optional[datetime] = None) -> int:
+    """
+    Освобождает просроченные брони пачками по batch_size строк, каждая пачка - отдельная короткая транзакция.
+    Строки, заблокированные подтверждением брони, пропускаются (SKIP LOCKED).
+    Возвращает количество освобождённых строк.
+    """
+    now = now or datetime.utcnow()
+    released = 0
+    while True:
+        expired = session.exec(
+            select(SeatHold)
+            .where(SeatHold.expires_at <= now)
+            .order_by(SeatHold.expires_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not expired:
+            break
+        _release_held_seats(_seats_by_flight(expired), session)
+        session.exec(delete(SeatHold).where(SeatHold.id.in_([h.id for h in expired])))
+        session.commit()
+        released += len(expired)
+        if len(expired) < batch_size:
+            break
+    return released
+
+
+def _sweep_once(engine):
+    with Session(engine) as session:
+        return sweep_expired_holds(session)
+
+
+async def sweep_holds_periodically(engine, interval: float = HOLD_SWEEP_SECONDS):
+    """Фоновая задача приложения: места просроченных удержаний возвращаются в продажу без внешних вызовов"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(_sweep_once, engine)
+        except Exception:
+            logger.exception("Ошибка фоновой очистки удержаний мест")
+
+
+def _get_active_holds(hold_code: str, session: Session) -> List[SeatHold]:
+    holds = session.exec(
+        select(SeatHold)
+        .where(SeatHold.hold_code == hold_code, SeatHold.expires_at > datetime.utcnow())
+        .order_by(SeatHold.id)
+        .with_for_update()
+    ).all()
+    if not holds:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Удержание мест не найдено или истекло"
+        )
+    return holds
+
+
+def create_hold(data: SeatHoldCreate, session: Session) -> List[SeatHold]:
+    """Удерживает seatCount мест на рейсе и рейсах пересадки на ttlSeconds секунд"""
+    flight_ids = [data.flightId] + list(data.connectionFlightIds or [])
+    if len(set(flight_ids)) != len(flight_ids):
+        raise HTTPException(status_code=400, detail="Рейсы в удержании не должны повторяться")
+    # Места просроченных удержаний этих рейсов возвращаются в той же транзакции
+    release_expired_holds(flight_ids, session)
+
+    flights = {f.id: f for f in session.exec(select(Flight).where(Flight.id.in_(flight_ids))).all()}
+    for fid in flight_ids:
+        if fid not in flights:
+            raise HTTPException(status_code=404, detail=f"Рейс {fid} не найден")
+        if flights[fid].free_seats < data.seatCount:
+            raise HTTPException(status_code=400, detail=f"Недостаточно мест на рейсе {flights[fid].flight_number}")
+
+    hold_code = generate_booking_code(8)
+    expires_at = datetime.utcnow() + timedelta(seconds=data.ttlSeconds)
+    try:
+        inventories = lock_seat_inventories(flights.values(), session)
+        holds = []
+        for fid in flight_ids:
+            seat_map, inventory = inventories[fid]
+            seats = pick_seats(inventory, data.seatCount, data.seats if fid == data.flightId else None)
+            reserve_seats(fid, data.seatCount, session)
+            save_seat_inventory(seat_map, inventory, session)
+            holds.append(SeatHold(
+                hold_code=hold_code,
+                flight_id=fid,
+                seats=",".join(seats),
+                seat_count=data.seatCount,
+                expires_at=expires_at
+            ))
+        bulk_insert(session, holds)
+        session.commit()
+        return holds
+    except HTTPException:
+        session.rollback()
+        raise
+    except Exception as e:
+        session.rollback()
+        raise HTTPException(status_code=500, detail=f"Ошибка при удержании мест: {str(e)}")
+
+
+def get_hold(hold_code: str, session: Session) -> List[SeatHold]:
+    holds = session.exec(
+        select(SeatHold)
+        .where(SeatHold.hold_code == hold_code, SeatHold.expires_at > datetime.utcnow())
+        .order_by(SeatHold.id)
+    ).all()
+    if not holds:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Удержание мест не найдено или истекло")
+    return holds
+
+
+def release_hold(hold_code: str, session: Session):
+    """Досрочное снятие удержания: места возвращаются в продажу"""
+    holds = _get_active_holds(hold_code, session)
+    _release_held_seats(_seats_by_flight(holds), session)
+    session.exec(delete(SeatHold).where(SeatHold.id.in_([h.id for h in holds])))
+    session.commit()
+
+
+def _check_held_class(holds: List[SeatHold], p_count: int, class_type: str, session: Session):
+    """Места, которые получат пассажиры, должны быть в зоне класса (если она есть в салоне рейса)"""
+    flights = session.exec(select(Flight).where(Flight.id.in_([h.flight_id for h in holds]))).all()
+    inventories = {flight.id: get_seat_inventory(flight, session)[1] for flight in flights}
+    for hold in holds:
+        inventory = inventories[hold.flight_id]
+        if not inventory.layout.has_class(class_type):
+            continue
+        for seat in hold.seat_list[:p_count]:
+            if inventory.class_of(seat) != class_type:
+                raise HTTPException(status_code=400, detail=f"Место {seat} не относится к классу {class_type}")
+
+
+def confirm_hold(hold_code: str, data: SeatHoldConfirm, session: Session) -> List[Booking]:
+    """
+    Превращает удержание в бронирования. Места уже списаны при удержании,
+    поэтому проверка наличия мест не выполняется; лишние места освобождаются.
+    """
+    holds = _get_active_holds(hold_code, session)
+    p_count = len(data.passengerIds)
+    if p_count > holds[0].seat_count:
+        raise HTTPException(status_code=400, detail="Пассажиров больше, чем удерживаемых мест")
+
+    passengers = session.exec(select(Passenger.id).where(Passenger.id.in_(data.passengerIds))).all()
+    if len(set(passengers)) != p_count:
+        raise HTTPException(status_code=400, detail="Один или несколько пассажиров не найдены")
+
+    flight_ids = [h.flight_id for h in holds]
+    _check_held_class(holds, p_count, data.classType, session)
+    duplicate = session.exec(select(Booking.id).where(
+        Booking.flight_id.in_(flight_ids),
+        Booking.passenger_id.in_(data.passengerIds)
+    )).first()
+    if duplicate:
+        raise HTTPException(status_code=400, detail="Один из пассажиров уже имеет билет на рейс из удержания")
+
+    booking_code = data.bookingCode or generate_booking_code()
+    try:
+        created_bookings = []
+        for idx, p_id in enumerate(data.passengerIds):
+            for hold in holds:
+                created_bookings.append(Booking(
+                    booking_code=booking_code,
+                    flight_id=hold.flight_id,
+                    passenger_id=p_id,
+                    seat=hold.seat_list[idx],
+                    baggage_allowed=data.baggageAllowed,
+                    payment_type=data.paymentType,
+                    additional_fees=data.additionalFees,
+                    class_type=data.classType
+                ))
+        # Места сверх числа пассажиров возвращаются в продажу
+        _release_held_seats(_seats_by_flight(holds, start=p_count), session)
+
+        session.exec(delete(SeatHold).where(SeatHold.id.in_([h.id for h in holds])))
+        bulk_insert(session, created_bookings)
+        touch_occupancy(session, *flight_ids)
+        session.commit()
+        invalidate_itineraries(booking_code)
+        return created_bookings
+    except HTTPException:
+        session.rollback()
+        raise
+    except Exception as e:
+        session.rollback()
+        raise HTTPException(status_code=500, detail=f"Ошибка при подтверждении удержания: {str(e)}")
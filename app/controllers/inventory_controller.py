@@ -0,0 +1,267 @@
+# app/controllers/inventory_controller.py
+from sqlalchemy import case, event
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select, delete, update
+from fastapi import HTTPException, status
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.controllers.board_controller import touch_airports
+from app.controllers.occupancy_controller import touch_occupancy
+from app.core.cabin_layout import CabinLayout, parse_layout
+from app.core.cache import TTLCache
+from app.core.seat_inventory import SeatInventory
+from app.db.bulk import bulk_insert
+from app.models.booking import Booking
+from app.models.flight import Flight
+from app.models.seat_map import FlightSeatMap
+
+
+# Кэш доступности рейсов: строка рейса (значения колонок) по id. Продажи и возвраты этого процесса
+# записывают новое free_seats сразу после commit (write-through в reserve_seats/release_seats);
+# TTL ограничивает устаревание из-за продаж в других воркерах. Окончательная проверка мест -
+# всегда условный UPDATE в reserve_seats
+AVAILABILITY_CACHE_SIZE = 4096
+AVAILABILITY_TTL = 30
+_PENDING_AVAILABILITY = "availability"
+_availability = TTLCache(maxsize=AVAILABILITY_CACHE_SIZE, ttl=AVAILABILITY_TTL)
+
+
+def _flight_row(flight: Flight) -> dict:
+    return {column.key: getattr(flight, column.key) for column in Flight.__table__.columns}
+
+
+def get_flight_snapshot(flight_id: int, session: Session) -> Optional[dict]:
+    """Значения колонок рейса из кэша доступности или из БД (None - рейса нет)"""
+    row = _availability.get(flight_id)
+    if row is None:
+        flight = session.get(Flight, flight_id)
+        if flight is None:
+            return None
+        row = _flight_row(flight)
+        _availability.set(flight_id, row)
+    return dict(row)
+
+
+def cached_free_seats(flight_id: int) -> Optional[int]:
+    """free_seats рейса, если он есть в кэше доступности (без обращения к БД)"""
+    row = _availability.get(flight_id)
+    return None if row is None else row["free_seats"]
+
+
+def get_free_seats(flight_ids: Iterable[int], session: Session) -> Dict[int, int]:
+    """free_seats рейсов: из кэша, недостающие - одним запросом (несуществующие рейсы не попадают в ответ)"""
+    result, missing = {}, []
+    for flight_id in set(flight_ids):
+        free = cached_free_seats(flight_id)
+        if free is None:
+            missing.append(flight_id)
+        else:
+            result[flight_id] = free
+    if missing:
+        for flight in session.exec(select(Flight).where(Flight.id.in_(missing))).all():
+            _availability.set(flight.id, _flight_row(flight))
+            result[flight.id] = flight.free_seats
+    return result
+
+
+def forget_flights(*flight_ids: int):
+    """Убирает рейсы из кэша доступности после изменения или удаления (вызывать после commit)"""
+    for flight_id in flight_ids:
+        _availability.pop(flight_id)
+
+
+def forget_all_flights():
+    _availability.clear()
+
+
+def _record_free_seats(session: Session, values: Dict[int, int]):
+    session.info.setdefault(_PENDING_AVAILABILITY, {}).update(values)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _write_through_availability(session):
+    pending = session.info.pop(_PENDING_AVAILABILITY, None)
+    for flight_id, free_seats in (pending or {}).items():
+        row = _availability.get(flight_id)
+        if row is not None:
+            # Новый словарь вместо изменения старого - читатели видят согласованную строку
+            _availability.set(flight_id, {**row, "free_seats": free_seats})
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _drop_pending_availability(session):
+    session.info.pop(_PENDING_AVAILABILITY, None)
+
+
+def _inventory_of(seat_map: FlightSeatMap) -> SeatInventory:
+    layout = parse_layout(seat_map.layout, seat_map.capacity)
+    return SeatInventory(seat_map.capacity, seat_map.bitmap, seat_map.first_free, layout)
+
+
+def _select_seat_maps(flight_ids: Iterable[int], session: Session) -> List[FlightSeatMap]:
+    """Карты мест рейсов с блокировкой строк (SELECT ... FOR UPDATE) в порядке возрастания id"""
+    return session.exec(
+        select(FlightSeatMap)
+        .where(FlightSeatMap.flight_id.in_(list(flight_ids)))
+        .order_by(FlightSeatMap.flight_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).all()
+
+
+def _build_seat_map(flight: Flight, session: Session) -> Tuple[FlightSeatMap, SeatInventory]:
+    """Строит карту мест рейса по его бронированиям (рейсы, созданные до появления карт)"""
+    inventory = SeatInventory.for_total_seats(flight.total_seats)
+    inventory.fill(session.exec(select(Booking.seat).where(Booking.flight_id == flight.id)).all())
+    seat_map = FlightSeatMap(flight_id=flight.id, capacity=inventory.capacity, bitmap=inventory.to_bytes())
+    return seat_map, inventory
+
+
+def get_seat_inventory(flight: Flight, session: Session, lock: bool = False) -> Tuple[FlightSeatMap, SeatInventory]:
+    """
+    Возвращает карту мест рейса.
+    lock=True блокирует строку карты (SELECT ... FOR UPDATE) до конца транзакции,
+    чтобы параллельные продажи на рейс не выдали одно и то же место.
+    Если карты ещё нет (рейс создан до её появления), она однократно строится по бронированиям.
+    """
+    if lock:
+        return lock_seat_inventories([flight], session)[flight.id]
+    seat_map = session.get(FlightSeatMap, flight.id)
+    if seat_map:
+        return seat_map, _inventory_of(seat_map)
+    return _build_seat_map(flight, session)
+
+
+def lock_seat_inventories(flights: Iterable[Flight], session: Session) -> Dict[int, Tuple[FlightSeatMap, SeatInventory]]:
+    """
+    Блокирует карты мест нескольких рейсов одним запросом в порядке возрастания id
+    (одинаковый порядок блокировок исключает взаимные блокировки между воркерами).
+    """
+    flights = {flight.id: flight for flight in flights}
+    if not flights:
+        return {}
+    inventories = {m.flight_id: (m, _inventory_of(m)) for m in _select_seat_maps(flights.keys(), session)}
+    missing = sorted(flights.keys() - inventories.keys())
+    if missing:
+        # Карты ещё нет - блокируем строки рейсов, чтобы параллельные транзакции не построили
+        # её дважды по одним и тем же бронированиям, и перечитываем: пока ждали блокировку,
+        # карту мог сохранить другой воркер
+        session.exec(select(Flight.id).where(Flight.id.in_(missing)).order_by(Flight.id).with_for_update()).all()
+        for m in _select_seat_maps(missing, session):
+            inventories[m.flight_id] = (m, _inventory_of(m))
+        for flight_id in missing:
+            if flight_id not in inventories:
+                inventories[flight_id] = _build_seat_map(flights[flight_id], session)
+    return dict(sorted(inventories.items()))
+
+
+def describe_seat_map(flight: Flight, session: Session) -> dict:
+    """Компоновка салона рейса и свободные места по рядам"""
+    _, inventory = get_seat_inventory(flight, session)
+    return {
+        "flightId": flight.id,
+        "cabinLayout": inventory.layout.spec,
+        "capacity": inventory.capacity,
+        "rows": [
+            {
+                "row": row.number,
+                "classType": row.class_type,
+                "freeSeats": [f"{row.number}{row.letters[i]}" for i in range(len(row.letters)) if free >> i & 1]
+            }
+            for row, free in inventory.free_rows()
+        ]
+    }
+
+
+def create_seat_inventory(flight: Flight, session: Session, layout: Optional[str] = None):
+    """
+    Создаёт пустую карту мест для нового рейса (flight.id уже должен быть назначен).
+    layout - описание компоновки салона (см. CabinLayout), без него - типовая компоновка.
+    """
+    create_seat_inventories([flight], session, layout)
+
+
+def create_seat_inventories(flights: Iterable[Flight], session: Session, layout: Optional[str] = None):
+    """Пустые карты мест для рейсов с одинаковыми вместимостью и компоновкой - одним INSERT"""
+    flights = list(flights)
+    if not flights:
+        return
+    inventory = SeatInventory(flights[0].total_seats, layout=CabinLayout.parse(layout) if layout else None)
+    spec, bitmap = (inventory.layout.spec if layout else None), inventory.to_bytes()
+    bulk_insert(session, [
+        FlightSeatMap(flight_id=flight.id, capacity=inventory.capacity, layout=spec, bitmap=bitmap)
+        for flight in flights
+    ])
+
+
+def save_seat_inventory(seat_map: FlightSeatMap, inventory: SeatInventory, session: Session):
+    """Записывает изменения карты мест в сессию (commit выполняет вызывающий код)"""
+    seat_map.capacity = inventory.capacity
+    seat_map.first_free = inventory.first_free
+    seat_map.bitmap = inventory.to_bytes()
+    session.add(seat_map)
+
+
+def resize_seat_inventory(flight: Flight, session: Session):
+    """Приводит карту мест к новому total_seats рейса"""
+    seat_map, inventory = get_seat_inventory(flight, session)
+    if seat_map.layout:
+        # Вместимость рейса с заданной компоновкой определяется самой компоновкой
+        if inventory.capacity != flight.total_seats:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Количество мест рейса задано компоновкой салона ({inventory.capacity})"
+            )
+        return
+    save_seat_inventory(seat_map, inventory.resized(flight.total_seats), session)
+
+
+def delete_seat_maps(session: Session, *flight_ids: int):
+    """Удаляет карты мест рейсов; без аргументов - все карты"""
+    statement = delete(FlightSeatMap)
+    if flight_ids:
+        statement = statement.where(FlightSeatMap.flight_id.in_(flight_ids))
+    session.exec(statement)
+
+
+def reserve_seats(flight_id: int, count: int, session: Session) -> int:
+    """
+    Атомарно списывает count мест рейса одним условным UPDATE.
+    Проверка и списание выполняются в БД (free_seats >= count), поэтому параллельные
+    воркеры не могут продать больше мест, чем есть. Возвращает новое значение free_seats.
+    """
+    row = session.exec(
+        update(Flight)
+        .where(Flight.id == flight_id, Flight.free_seats >= count)
+        .values(free_seats=Flight.free_seats - count)
+        .returning(Flight.free_seats, Flight.departure_airport_icao, Flight.arrival_airport_icao)
+    ).first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Недостаточно мест на рейсе {flight_id}"
+        )
+    new_free_seats, departure_icao, arrival_icao = row
+    touch_airports(session, departure_icao, arrival_icao)
+    _record_free_seats(session, {flight_id: new_free_seats})
+    touch_occupancy(session, flight_id)
+    return new_free_seats
+
+
+def release_seats(counts: Dict[int, int], session: Session):
+    """
+    Атомарно возвращает места рейсам: {flight_id: количество}.
+    Один UPDATE на все рейсы: free_seats + CASE id WHEN ... THEN ... END.
+    """
+    counts = {flight_id: count for flight_id, count in counts.items() if count}
+    if not counts:
+        return
+    rows = session.exec(
+        update(Flight)
+        .where(Flight.id.in_(counts.keys()))
+        .values(free_seats=Flight.free_seats + case(counts, value=Flight.id, else_=0))
+        .returning(Flight.id, Flight.free_seats, Flight.departure_airport_icao, Flight.arrival_airport_icao)
+    ).all()
+    touch_airports(session, *(icao for row in rows for icao in row[2:]))
+    _record_free_seats(session, {row[0]: row[1] for row in rows})
+    touch_occupancy(session, *counts)
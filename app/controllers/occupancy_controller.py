@@ -0,0 +1,140 @@
+# app/controllers/occupancy_controller.py
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+from fastapi import HTTPException, status
+
+from app.core.cache import TTLCache
+from app.models.booking import Booking
+from app.models.flight import Flight
+
+# Не больше стольких рейсов в одном ответе
+MAX_OCCUPANCY_FLIGHTS = 2000
+_PENDING_KEY = "occupancy_flights"
+
+# Статистика загрузки по id рейса; сбрасывается после commit изменений бронирований рейса
+_occupancy_cache = TTLCache(maxsize=8192, ttl=300)
+
+
+def touch_occupancy(session: Session, *flight_ids: int):
+    """Помечает статистику загрузки рейсов устаревшей после commit текущей транзакции"""
+    session.info.setdefault(_PENDING_KEY, set()).update(flight_ids)
+
+
+def invalidate_occupancy(*flight_ids: int):
+    for flight_id in flight_ids:
+        _occupancy_cache.pop(flight_id)
+
+
+def invalidate_all_occupancy():
+    _occupancy_cache.clear()
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _drop_committed_occupancy(session):
+    invalidate_occupancy(*session.info.pop(_PENDING_KEY, ()))
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _drop_pending_occupancy(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _occupancy_query():
+    """
+    Рейсы с числом бронирований в разрезе класса и багажа - один GROUP BY.
+    outer join оставляет в выборке рейсы без бронирований (строка с NULL-классом).
+    """
+    return (
+        select(Flight.id, Flight.flight_number, Flight.departure_date, Flight.total_seats, Flight.free_seats,
+               Booking.class_type, Booking.baggage_allowed, func.count(Booking.id))
+        .outerjoin(Booking, Booking.flight_id == Flight.id)
+        .group_by(Flight.id, Flight.flight_number, Flight.departure_date, Flight.total_seats, Flight.free_seats,
+                  Booking.class_type, Booking.baggage_allowed)
+    )
+
+
+def _collect(rows: Iterable) -> Dict[int, dict]:
+    stats: Dict[int, dict] = {}
+    for flight_id, number, departure_date, total_seats, free_seats, class_type, baggage, count in rows:
+        item = stats.get(flight_id)
+        if item is None:
+            item = stats[flight_id] = {
+                "flightId": flight_id,
+                "flightNumber": number,
+                "departureDate": departure_date,
+                "totalSeats": total_seats,
+                "freeSeats": free_seats,
+                "bookedSeats": 0,
+                "byClass": {},
+                "withBaggage": 0,
+                "withoutBaggage": 0,
+            }
+        if not count:
+            continue
+        item["bookedSeats"] += count
+        item["byClass"][class_type] = item["byClass"].get(class_type, 0) + count
+        item["withBaggage" if baggage else "withoutBaggage"] += count
+    for item in stats.values():
+        # Места, списанные из продажи, но ещё не оформленные (удержания)
+        item["heldSeats"] = max(item["totalSeats"] - item["freeSeats"] - item["bookedSeats"], 0)
+        item["loadFactor"] = round(item["bookedSeats"] / item["totalSeats"], 4) if item["totalSeats"] else 0.0
+    return stats
+
+
+def get_occupancy(
+    session: Session,
+    flight_ids: Optional[List[int]] = None,
+    departure_date: Optional[date] = None,
+    airline: Optional[str] = None,
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+) -> List[dict]:
+    """
+    Загрузка рейсов: по списку id (из кэша, недостающие - одним запросом) или по фильтрам
+    дата/авиакомпания/маршрут (один запрос на всю выборку, результат кладётся в кэш по рейсам).
+    """
+    filters = []
+    if departure_date:
+        filters.append(Flight.departure_date == departure_date)
+    if airline:
+        filters.append(Flight.airline_code == airline.upper())
+    if origin:
+        filters.append(Flight.departure_airport_icao == origin.upper())
+    if destination:
+        filters.append(Flight.arrival_airport_icao == destination.upper())
+    if not flight_ids and not departure_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Укажите flightIds или дату вылета")
+    if flight_ids and len(set(flight_ids)) > MAX_OCCUPANCY_FLIGHTS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Не больше {MAX_OCCUPANCY_FLIGHTS} рейсов в запросе")
+
+    if flight_ids and not filters:
+        result = {}
+        missing = []
+        for flight_id in dict.fromkeys(flight_ids):
+            cached = _occupancy_cache.get(flight_id)
+            if cached is None:
+                missing.append(flight_id)
+            else:
+                result[flight_id] = cached
+        if missing:
+            fresh = _collect(session.exec(_occupancy_query().where(Flight.id.in_(missing))).all())
+            for flight_id, item in fresh.items():
+                _occupancy_cache.set(flight_id, item)
+            result.update(fresh)
+        return [result[flight_id] for flight_id in dict.fromkeys(flight_ids) if flight_id in result]
+
+    query = _occupancy_query().where(*filters)
+    if flight_ids:
+        query = query.where(Flight.id.in_(flight_ids))
+    stats = _collect(session.exec(query).all())
+    if len(stats) > MAX_OCCUPANCY_FLIGHTS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Под фильтр попадает больше {MAX_OCCUPANCY_FLIGHTS} рейсов, уточните запрос")
+    for flight_id, item in stats.items():
+        _occupancy_cache.set(flight_id, item)
+    return sorted(stats.values(), key=lambda item: (item["departureDate"], item["flightNumber"]))
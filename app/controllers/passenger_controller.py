@@ -2,6 +2,9 @@ from sqlmodel import Session, select
 from fastapi import HTTPException, status
 from app.models.passenger import Passenger
 from app.schemas.passenger_schema import PassengerCreate, PassengerUpdate
+from app.db.bulk import bulk_insert
+from app.controllers.booking_controller import invalidate_all_itineraries
+from app.controllers.occupancy_controller import invalidate_all_occupancy
 from typing import List
 
 
@@ -24,9 +27,8 @@ def create_passenger(data: PassengerCreate, session: Session) -> Passenger:
         full_name=data.fullName,
         birth_date=data.birthDate
     )
-    session.add(passenger)
+    bulk_insert(session, [passenger])
     session.commit()
-    session.refresh(passenger)
     return passenger
 
 
@@ -79,6 +81,10 @@ def delete_passenger(passenger_id: int, session: Session):
 
     session.delete(passenger)
     session.commit()
+    invalidate_all_itineraries()
+    # Бронирования пассажира удаляются каскадно
+    invalidate_all_occupancy()
+
 
 def update_passenger(passenger_id: int, data: PassengerUpdate, session: Session) -> Passenger:
     """Обновление данных пассажира по ID."""
@@ -105,6 +111,7 @@ def update_passenger(passenger_id: int, data: PassengerUpdate, session: Session)
     session.add(passenger)
     session.commit()
     session.refresh(passenger)
+    invalidate_all_itineraries()
     return passenger
 
 
@@ -0,0 +1,105 @@
+# app/controllers/reference_controller.py
+from typing import FrozenSet
+
+from sqlmodel import Session, select
+from fastapi import HTTPException, status
+
+from app.core.cache import TTLCache
+from app.models.airline import Airline
+from app.models.airport import Airport
+
+# Коды авиакомпаний и аэропортов для проверки ссылок рейсов без запросов к БД.
+# Изменения справочников в этом процессе применяются сразу (после commit),
+# из других воркеров - после перечитывания по TTL
+_references = TTLCache(maxsize=2, ttl=300)
+
+_COLUMNS = {"airlines": Airline.code, "airports": Airport.icao_code}
+
+
+def _codes(kind: str, session: Session) -> FrozenSet[str]:
+    codes = _references.get(kind)
+    if codes is None:
+        codes = frozenset(session.exec(select(_COLUMNS[kind])).all())
+        _references.set(kind, codes)
+    return codes
+
+
+def _known(kind: str, code: str, session: Session) -> bool:
+    if code in _codes(kind, session):
+        return True
+    # Промах может означать запись, добавленную другим воркером, - проверяем в БД только в этом случае
+    column = _COLUMNS[kind]
+    if session.exec(select(column).where(column == code)).first() is None:
+        return False
+    _remember(kind, code)
+    return True
+
+
+def _remember(kind: str, code: str):
+    codes = _references.get(kind)
+    if codes is not None:
+        _references.set(kind, codes | {code})
+
+
+def _forget(kind: str, code: str):
+    codes = _references.get(kind)
+    if codes is not None:
+        _references.set(kind, codes - {code})
+
+
+def remember_airline(code: str):
+    """Добавляет авиакомпанию в справочник процесса (вызывать после commit)"""
+    _remember("airlines", code)
+
+
+def forget_airline(code: str):
+    _forget("airlines", code)
+
+
+def remember_airport(icao_code: str):
+    """Добавляет аэропорт в справочник процесса (вызывать после commit)"""
+    _remember("airports", icao_code)
+
+
+def forget_airport(icao_code: str):
+    _forget("airports", icao_code)
+
+
+def forget_references():
+    """Сбрасывает справочники процесса (перечитаются при следующей проверке)"""
+    _references.clear()
+
+
+def airline_exists(code: str, session: Session) -> bool:
+    return _known("airlines", code, session)
+
+
+def airport_exists(icao_code: str, session: Session) -> bool:
+    return _known("airports", icao_code, session)
+
+
+def check_airline(code: str, session: Session):
+    if not airline_exists(code, session):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Авиакомпания с кодом {code} не зарегистрирована в системе"
+        )
+
+
+def check_airports(departure_icao: str, arrival_icao: str, session: Session):
+    """Оба аэропорта существуют и не совпадают"""
+    if not airport_exists(departure_icao, session):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Аэропорт отправления с ICAO-кодом {departure_icao} не найден"
+        )
+    if not airport_exists(arrival_icao, session):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Аэропорт прибытия с ICAO-кодом {arrival_icao} не найден"
+        )
+    if departure_icao == arrival_icao:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Аэропорты отправления и прибытия не могут совпадать"
+        )
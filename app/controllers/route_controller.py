@@ -0,0 +1,100 @@
+# app/controllers/route_controller.py
+from datetime import date, timedelta
+from typing import List
+
+from sqlmodel import Session, select
+from fastapi import HTTPException, status
+
+from app.controllers.inventory_controller import get_free_seats
+from app.core.route_graph import RouteGraph
+from app.models.flight import Flight
+
+# Не больше стольких повторных поисков, если в найденных маршрутах оказались рейсы без мест
+_AVAILABILITY_ROUNDS = 3
+
+route_graph = RouteGraph()
+
+
+def route_index_upsert(*flights: Flight):
+    """Обновляет граф маршрутов после создания или изменения рейсов (вызывать после commit)"""
+    for flight in flights:
+        route_graph.upsert(flight)
+
+
+def route_index_remove(*flight_ids: int):
+    """Убирает рейсы из графа маршрутов"""
+    for flight_id in flight_ids:
+        route_graph.remove(flight_id)
+
+
+def route_index_clear():
+    """Сбрасывает весь граф маршрутов (дни перечитаются из БД при следующем поиске)"""
+    route_graph.clear()
+
+
+def search_routes(
+    origin: str,
+    destination: str,
+    day: date,
+    session: Session,
+    passengers: int = 1,
+    max_legs: int = 3,
+    min_connection_minutes: int = 60,
+    max_connection_minutes: int = 1440,
+    limit: int = 5,
+) -> List[dict]:
+    """
+    Лучшие маршруты (по времени прилёта, затем по числу пересадок) из origin в destination
+    с вылетом в день day и не менее passengers свободных мест на каждом плече.
+    """
+    origin, destination = origin.upper(), destination.upper()
+    if origin == destination:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Аэропорты отправления и прибытия не могут совпадать")
+
+    def load_day(d: date):
+        return session.exec(select(Flight).where(Flight.departure_date == d)).all()
+
+    # Свободные места меняются при каждой продаже, поэтому в графе не хранятся:
+    # найденные плечи проверяются по кэшу доступности (недостающие - одним запросом),
+    # рейсы без мест исключаются и поиск повторяется
+    exclude = set()
+    free_seats = {}
+    for _ in range(_AVAILABILITY_ROUNDS):
+        routes = route_graph.search(
+            origin, destination, day, load_day,
+            max_legs=max_legs,
+            min_connection=timedelta(minutes=min_connection_minutes),
+            max_connection=timedelta(minutes=max_connection_minutes),
+            limit=limit,
+            exclude=exclude,
+        )
+        unknown = {leg.flight_id for route in routes for leg in route} - free_seats.keys()
+        if unknown:
+            free_seats.update(get_free_seats(unknown, session))
+        full = {fid for route in routes for fid in (leg.flight_id for leg in route) if free_seats.get(fid, 0) < passengers}
+        if not full:
+            break
+        exclude |= full
+    routes = [route for route in routes if all(free_seats.get(leg.flight_id, 0) >= passengers for leg in route)]
+
+    return [
+        {
+            "departure": route[0].departs,
+            "arrival": route[-1].arrives,
+            "durationMinutes": int((route[-1].arrives - route[0].departs).total_seconds() // 60),
+            "connections": len(route) - 1,
+            "legs": [
+                {
+                    "flightId": leg.flight_id,
+                    "flightNumber": leg.flight_number,
+                    "departureAirportIcao": leg.origin,
+                    "arrivalAirportIcao": leg.destination,
+                    "departure": leg.departs,
+                    "arrival": leg.arrives,
+                    "freeSeats": free_seats[leg.flight_id],
+                }
+                for leg in route
+            ],
+        }
+        for route in routes
+    ]
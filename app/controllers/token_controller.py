@@ -0,0 +1,39 @@
+# app/controllers/token_controller.py
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlmodel import Session, delete
+
+from app.core import token_denylist
+from app.core.security import REFRESH_TOKEN_EXPIRE_DAYS, token_claims
+from app.models.revoked_token import RevokedToken
+
+
+def _save(row: RevokedToken, session: Session):
+    # Таблица не растёт: строки истёкших токенов удаляются при каждом новом отзыве (индекс по expires_at)
+    session.exec(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+    session.add(row)
+    session.commit()
+    session.refresh(row)
+    token_denylist.apply(row)
+
+
+def revoke_token(token: Optional[str], session: Session, expected_type: str = "access") -> bool:
+    """Отзывает токен по jti до истечения его срока; False - токен уже невалиден или без jti"""
+    claims = token_claims(token, expected_type) if token else None
+    if not claims or not claims.get("jti"):
+        return False
+    _save(RevokedToken(jti=claims["jti"], expires_at=datetime.utcfromtimestamp(claims["exp"])), session)
+    return True
+
+
+def revoke_user_tokens(username: str, session: Session):
+    """Отзывает все токены пользователя, выданные до этого момента (access и refresh)"""
+    now = datetime.utcnow()
+    _save(RevokedToken(
+        username=username,
+        revoked_before=now,
+        # Позже этого срока не доживёт ни один токен, выданный до now
+        expires_at=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ), session)
+
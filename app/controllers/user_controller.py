@@ -1,41 +1,78 @@
 from sqlmodel import Session, select
 from fastapi import HTTPException, status # Убедитесь, что импортированы
+from fastapi.concurrency import run_in_threadpool
 from app.models.user import User
 from app.schemas.user_schema import UserCreate
-from app.core.security import hash_password, verify_password, create_access_token, create_refresh_token
-from typing import List
+from app.db.bulk import bulk_insert
+from app.core.security import hash_password, verify_password, create_user_access_token, create_refresh_token, \
+    invalidate_principal, hash_password_async, verify_password_async, create_access_token, forget_decoded_tokens
+from app.core import security
+from app.controllers.token_controller import revoke_user_tokens
+from typing import List, Optional
 
 
-def create_user(data: UserCreate, session: Session) -> User:
-    """Создание пользователя"""
-    existing_user = session.exec(select(User).where(User.username == data.username)).first()
-    if existing_user:
+def get_user_by_username(username: str, session: Session) -> Optional[User]:
+    return session.exec(select(User).where(User.username == username)).first()
+
+
+def _check_username_free(username: str, session: Session):
+    if get_user_by_username(username, session):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Пользователь с таким именем уже существует"
         )
 
-    user = User(
-        username=data.username,
-        password=hash_password(data.password),
-        role="guest"
-    )
-    session.add(user)
+
+def insert_user(username: str, password_hash: str, session: Session) -> User:
+    """Сохраняет нового пользователя с ролью guest (пароль уже захеширован)"""
+    user = User(username=username, password=password_hash, role="guest")
+    bulk_insert(session, [user])
     session.commit()
-    session.refresh(user)
     return user
 
 
+def create_user(data: UserCreate, session: Session) -> User:
+    """Создание пользователя"""
+    _check_username_free(data.username, session)
+    return insert_user(data.username, hash_password(data.password), session)
+
+
+async def create_user_async(data: UserCreate, session: Session) -> User:
+    """
+    Создание пользователя из async-обработчика: запросы к БД - в пуле потоков starlette,
+    хеширование - в пуле password_pool
+    """
+    await run_in_threadpool(_check_username_free, data.username, session)
+    password_hash = await hash_password_async(data.password)
+    return await run_in_threadpool(insert_user, data.username, password_hash, session)
+
+
+def _invalid_credentials():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Неверный логин или пароль"
+    )
+
+
 def authenticate_user(username: str, password: str, session: Session):
     """Аутентификация пользователя"""
-    user = session.exec(select(User).where(User.username == username)).first()
+    user = get_user_by_username(username, session)
     if not user or not verify_password(password, user.password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Неверный логин или пароль"
-        )
+        raise _invalid_credentials()
+    return issue_tokens(user)
 
-    access_token = create_access_token(data={"sub": user.username})
+
+async def authenticate_user_async(username: str, password: str, session: Session):
+    """Аутентификация из async-обработчика (Argon2 не выполняется в цикле событий)"""
+    user = await run_in_threadpool(get_user_by_username, username, session)
+    if not user or not await verify_password_async(password, user.password):
+        raise _invalid_credentials()
+    return issue_tokens(user)
+
+
+def issue_tokens(user: User) -> dict:
+    """Пара access/refresh токенов пользователя"""
+    access_token = create_user_access_token(user)
     refresh_token = create_refresh_token(data={"sub": user.username})
 
     return {
@@ -46,11 +83,33 @@ def authenticate_user(username: str, password: str, session: Session):
     }
 
 
+def refresh_access_token(username: str, session: Session) -> str:
+    """Новый access-токен по refresh-токену; в режиме AUTH_ROLE_CLAIMS роль берётся из БД"""
+    if not security.AUTH_ROLE_CLAIMS:
+        return create_access_token(data={"sub": username})
+    user = get_user_by_username(username, session)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Пользователь не найден"
+        )
+    return create_user_access_token(user)
+
+
 def get_all_users(session: Session) -> List[User]:
     """Получение всех пользователей"""
     return session.exec(select(User)).all()
 
 # --- НОВАЯ ФУНКЦИЯ ---
+def after_role_change(user: User, session: Session):
+    """Сбрасывает закэшированные права пользователя после смены роли (вызывать после commit)"""
+    invalidate_principal(user.username)
+    if security.AUTH_ROLE_CLAIMS:
+        # Выданные токены несут прежнюю роль: отзываем их и забываем уже проверенные
+        revoke_user_tokens(user.username, session)
+        forget_decoded_tokens()
+
+
 def update_user_role(user_id: int, new_role: str, session: Session) -> User:
     """Обновление роли пользователя (только для администратора)"""
     user = session.get(User, user_id)
@@ -73,4 +132,5 @@ def update_user_role(user_id: int, new_role: str, session: Session) -> User:
     session.add(user)
     session.commit()
     session.refresh(user)
+    after_role_change(user, session)
     return user
\ No newline at end of file
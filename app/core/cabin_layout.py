@@ -0,0 +1,122 @@
+# app/core/cabin_layout.py
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+CLASS_TYPES = ("first", "business", "economy")
+DEFAULT_CLASS = "economy"
+DEFAULT_SCHEME = "ABC-DEF"
+
+_SEAT_RE = re.compile(r'^(\d+)([A-Z])$')
+_SCHEME_RE = re.compile(r'^[A-Z]+(-[A-Z]+)*$')
+
+
+class CabinRow(NamedTuple):
+    """Ряд салона. Бит i масок соответствует букве letters[i]."""
+    number: int
+    class_type: str
+    letters: str
+    offset: int  # индекс первого места ряда в карте мест
+    full_mask: int
+    window_mask: int
+    aisle_mask: int
+    segments: Tuple[int, ...]  # маски блоков кресел между проходами
+
+
+def _build_row(number: int, class_type: str, scheme: str, offset: int) -> CabinRow:
+    blocks = scheme.split("-")
+    letters = "".join(blocks)
+    segments, aisle_mask, pos = [], 0, 0
+    for i, block in enumerate(blocks):
+        segments.append(((1 << len(block)) - 1) << pos)
+        if i > 0:
+            aisle_mask |= 1 << pos
+        if i < len(blocks) - 1:
+            aisle_mask |= 1 << (pos + len(block) - 1)
+        pos += len(block)
+    window_mask = 1 | (1 << (len(letters) - 1))
+    return CabinRow(number, class_type, letters, offset, (1 << len(letters)) - 1,
+                    window_mask, aisle_mask & ~window_mask, tuple(segments))
+
+
+class CabinLayout:
+    """Компоновка салона рейса: зоны классов, в каждой зоне ряды одинаковой схемы.
+
+    Формат описания: зоны через ';', зона - 'класс:рядов:схема', в схеме '-' обозначает проход.
+    Например 'business:3:AC-DF;economy:25:ABC-DEF'. Ряды нумеруются подряд с 1.
+    Места в карте нумеруются построчно в порядке рядов и букв.
+    """
+
+    def __init__(self, zones: List[Tuple[str, int, str]]):
+        self.zones = [(c, n, s) for c, n, s in zones if n > 0]
+        self.rows: List[CabinRow] = []
+        offset = 0
+        for class_type, row_count, scheme in self.zones:
+            for _ in range(row_count):
+                row = _build_row(len(self.rows) + 1, class_type, scheme, offset)
+                self.rows.append(row)
+                offset += len(row.letters)
+        self.capacity = offset
+        self._offsets = [row.offset for row in self.rows]
+        self.class_types = frozenset(c for c, _, _ in self.zones)
+
+    @classmethod
+    def parse(cls, spec: str) -> "CabinLayout":
+        """Разбор описания компоновки; ValueError при ошибке формата."""
+        zones = []
+        for part in (spec or "").split(";"):
+            fields = part.strip().split(":")
+            if len(fields) != 3:
+                raise ValueError(f"Зона компоновки '{part}' должна иметь вид класс:рядов:схема")
+            class_type, rows, scheme = fields[0].strip().lower(), fields[1].strip(), fields[2].strip().upper()
+            if class_type not in CLASS_TYPES:
+                raise ValueError(f"Неизвестный класс обслуживания '{class_type}'")
+            if not rows.isdigit() or int(rows) < 1:
+                raise ValueError(f"Количество рядов зоны '{part}' должно быть положительным числом")
+            letters = scheme.replace("-", "")
+            if not _SCHEME_RE.match(scheme) or len(set(letters)) != len(letters):
+                raise ValueError(f"Схема ряда '{scheme}' должна состоять из неповторяющихся букв и проходов '-'")
+            zones.append((class_type, int(rows), scheme))
+        return cls(zones)
+
+    @classmethod
+    def default(cls, total_seats: int) -> "CabinLayout":
+        """Типовая компоновка: эконом, 6 мест в ряду, неполный последний ряд - остаток мест."""
+        rows, rest = divmod(max(total_seats, 0), 6)
+        zones = [(DEFAULT_CLASS, rows, DEFAULT_SCHEME)]
+        if rest:
+            zones.append((DEFAULT_CLASS, 1, DEFAULT_SCHEME[:rest + (rest > 3)]))
+        return cls(zones)
+
+    @property
+    def spec(self) -> str:
+        return ";".join(f"{c}:{n}:{s}" for c, n, s in self.zones)
+
+    def has_class(self, class_type: Optional[str]) -> bool:
+        return class_type in self.class_types
+
+    def row_of(self, index: int) -> CabinRow:
+        return self.rows[bisect_right(self._offsets, index) - 1]
+
+    def index_of(self, seat: str) -> Optional[int]:
+        """Индекс места '12C' в карте или None, если такого места в салоне нет."""
+        match = _SEAT_RE.match(seat.strip().upper()) if seat else None
+        if not match:
+            return None
+        number, letter = int(match.group(1)), match.group(2)
+        if not 1 <= number <= len(self.rows):
+            return None
+        row = self.rows[number - 1]
+        pos = row.letters.find(letter)
+        return None if pos < 0 else row.offset + pos
+
+    def seat_at(self, index: int) -> str:
+        row = self.row_of(index)
+        return f"{row.number}{row.letters[index - row.offset]}"
+
+
+@lru_cache(maxsize=256)
+def parse_layout(spec: Optional[str], total_seats: int = 0) -> CabinLayout:
+    """Компоновка по описанию из карты мест (разобранные описания кэшируются); без описания - типовая."""
+    return CabinLayout.parse(spec) if spec else CabinLayout.default(total_seats)
@@ -0,0 +1,40 @@
+# app/core/export.py
+import csv
+import io
+import json
+from typing import Callable, Iterable, Iterator, List, Sequence
+
+# Строк в одном фрагменте ответа: StreamingResponse отдаёт каждый фрагмент отдельной
+# итерацией в пуле потоков, поэтому строки не отправляются по одной
+CHUNK_ROWS = 500
+
+
+def csv_stream(rows: Iterable, columns: Sequence[str], row_values: Callable[[object], List],
+               chunk_rows: int = CHUNK_ROWS) -> Iterator[str]:
+    """CSV по мере чтения строк: заголовок columns, значения строки - row_values(row)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 1
+    for row in rows:
+        writer.writerow(row_values(row))
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+
+def ndjson_stream(rows: Iterable, chunk_rows: int = CHUNK_ROWS) -> Iterator[str]:
+    """NDJSON (объект JSON на строку) по мере чтения строк"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=False, default=str))
+        if len(lines) >= chunk_rows:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
@@ -0,0 +1,91 @@
+# app/core/idempotency.py
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from fastapi import Header, HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.cache import TTLCache
+
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    status_code: int
+    body: Any
+
+
+_responses = TTLCache(maxsize=IDEMPOTENCY_MAX_KEYS, ttl=IDEMPOTENCY_TTL_SECONDS)
+_in_progress = set()
+_in_progress_lock = threading.Lock()
+
+
+def idempotency_key_header(
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
+) -> Optional[str]:
+    return idempotency_key
+
+
+def _fingerprint(payload: BaseModel) -> str:
+    raw = json.dumps(payload.model_dump(mode="json"), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def idempotent(
+    scope: str,
+    key: Optional[str],
+    owner: Hashable,
+    payload: BaseModel,
+    status_code: int,
+    handler: Callable[[], Any],
+):
+    """
+    Выполняет handler не более одного раза на заголовок Idempotency-Key.
+
+    Первый успешный ответ сохраняется (scope, owner, key) на IDEMPOTENCY_TTL_SECONDS и
+    возвращается повторным запросам без выполнения handler. Ошибки не сохраняются -
+    повтор после ошибки выполняется заново. Без ключа handler выполняется как обычно.
+    """
+    if not key:
+        return handler()
+
+    cache_key = (scope, owner, key)
+    fingerprint = _fingerprint(payload)
+    stored = _responses.get(cache_key)
+    if stored is None:
+        with _in_progress_lock:
+            stored = _responses.get(cache_key)
+            if stored is None:
+                if cache_key in _in_progress:
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="Запрос с этим Idempotency-Key ещё выполняется"
+                    )
+                _in_progress.add(cache_key)
+
+    if stored is not None:
+        if stored.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key уже использован с другим телом запроса"
+            )
+        return JSONResponse(stored.body, status_code=stored.status_code, headers={"Idempotent-Replayed": "true"})
+
+    try:
+        body = jsonable_encoder(handler())
+        _responses.set(cache_key, StoredResponse(fingerprint, status_code, body))
+        return JSONResponse(body, status_code=status_code)
+    finally:
+        with _in_progress_lock:
+            _in_progress.discard(cache_key)
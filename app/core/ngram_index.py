@@ -0,0 +1,63 @@
+# app/core/ngram_index.py
+import threading
+from typing import Dict, Hashable, Iterable, Set
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+class NgramIndex:
+    """
+    Индекс подстрок по n-граммам для небольших справочников (аналог pg_trgm в памяти).
+
+    Для каждого ключа индексируются все подстроки длины 1..n его текстов. Запрос длиной до n
+    символов берётся из индекса напрямую; более длинный - пересечением списков его n-грамм
+    с проверкой кандидатов на вхождение. Поиск без учёта регистра.
+    """
+
+    def __init__(self, n: int = 3):
+        self.n = n
+        self._postings: Dict[str, Set[Hashable]] = {}
+        self._texts: Dict[Hashable, tuple] = {}
+        self._lock = threading.RLock()
+
+    def _grams(self, text: str, sizes: Iterable[int]) -> Set[str]:
+        return {text[i:i + size] for size in sizes for i in range(len(text) - size + 1)}
+
+    def add(self, key: Hashable, *texts: str):
+        """Добавляет или заменяет тексты ключа"""
+        normalized = tuple(_normalize(text) for text in texts if text)
+        with self._lock:
+            self.remove(key)
+            self._texts[key] = normalized
+            # Граммы считаются по каждому тексту отдельно - совпадение не склеивает поля
+            for text in normalized:
+                for gram in self._grams(text, range(1, self.n + 1)):
+                    self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key: Hashable):
+        with self._lock:
+            texts = self._texts.pop(key, None)
+            for text in texts or ():
+                for gram in self._grams(text, range(1, self.n + 1)):
+                    keys = self._postings.get(gram)
+                    if keys is not None:
+                        keys.discard(key)
+                        if not keys:
+                            del self._postings[gram]
+
+    def search(self, query: str) -> Set[Hashable]:
+        """Ключи, один из текстов которых содержит query"""
+        query = _normalize(query)
+        if not query:
+            return set()
+        with self._lock:
+            if len(query) <= self.n:
+                return set(self._postings.get(query, ()))
+            postings = sorted((self._postings.get(gram, set()) for gram in self._grams(query, (self.n,))), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+            return {key for key in candidates if any(query in text for text in self._texts[key])}
+
+    def __len__(self):
+        return len(self._texts)
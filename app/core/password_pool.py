@@ -0,0 +1,90 @@
+# app/core/password_pool.py
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict
+
+from fastapi import HTTPException, status
+
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# Argon2 (argon2-cffi) отпускает GIL на время вычисления, поэтому хватает потоков.
+# Отдельный пул ограничивает число одновременных хешей и не занимает потоки,
+# которые starlette выделяет под обычные (работающие с БД) обработчики
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Сколько задач может ждать в очереди сверх работающих; остальные получают 503
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "64"))
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_lock = threading.Lock()
+_stats = {
+    "submitted": 0,
+    "completed": 0,
+    "failed": 0,
+    "rejected": 0,
+    "running": 0,
+    "queued": 0,
+    "waitSecondsTotal": 0.0,
+    "waitSecondsMax": 0.0,
+    "runSecondsTotal": 0.0,
+}
+
+
+def _run(fn: Callable, args: tuple, submitted_at: float):
+    started_at = time.monotonic()
+    wait = started_at - submitted_at
+    with _lock:
+        _stats["queued"] -= 1
+        _stats["running"] += 1
+        _stats["waitSecondsTotal"] += wait
+        _stats["waitSecondsMax"] = max(_stats["waitSecondsMax"], wait)
+    failed = True
+    try:
+        result = fn(*args)
+        failed = False
+        return result
+    finally:
+        with _lock:
+            _stats["running"] -= 1
+            _stats["completed" if not failed else "failed"] += 1
+            _stats["runSecondsTotal"] += time.monotonic() - started_at
+
+
+def submit(fn: Callable, *args) -> Future:
+    """Ставит задачу в пул; при переполненной очереди - 503 без ожидания"""
+    with _lock:
+        if _stats["queued"] >= PASSWORD_HASH_QUEUE:
+            _stats["rejected"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Сервис авторизации перегружен, повторите попытку",
+                headers={"Retry-After": "1"}
+            )
+        _stats["submitted"] += 1
+        _stats["queued"] += 1
+    return _executor.submit(_run, fn, args, time.monotonic())
+
+
+def run(fn: Callable, *args):
+    """Выполняет fn в пуле и ждёт результат (для синхронного кода)"""
+    return submit(fn, *args).result()
+
+
+async def run_async(fn: Callable, *args):
+    """Выполняет fn в пуле, не блокируя цикл событий"""
+    return await asyncio.wrap_future(submit(fn, *args))
+
+
+def pool_stats() -> Dict[str, float]:
+    """Снимок счётчиков пула: очередь, время ожидания и выполнения"""
+    with _lock:
+        stats = dict(_stats)
+    stats["workers"] = PASSWORD_HASH_WORKERS
+    stats["queueLimit"] = PASSWORD_HASH_QUEUE
+    done = stats["completed"] + stats["failed"]
+    stats["waitSecondsAvg"] = round(stats["waitSecondsTotal"] / done, 6) if done else 0.0
+    return stats
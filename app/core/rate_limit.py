@@ -0,0 +1,93 @@
+# app/core/rate_limit.py
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# Попыток входа/регистрации: запас (burst) и пополнение в минуту - отдельно по имени и по IP
+AUTH_RATE_USER_BURST = int(os.getenv("AUTH_RATE_USER_BURST", "5"))
+AUTH_RATE_USER_PER_MINUTE = float(os.getenv("AUTH_RATE_USER_PER_MINUTE", "5"))
+AUTH_RATE_IP_BURST = int(os.getenv("AUTH_RATE_IP_BURST", "20"))
+AUTH_RATE_IP_PER_MINUTE = float(os.getenv("AUTH_RATE_IP_PER_MINUTE", "20"))
+AUTH_RATE_MAX_KEYS = int(os.getenv("AUTH_RATE_MAX_KEYS", "100000"))
+
+
+class MemoryBucketBackend:
+    """
+    Корзины токенов в памяти процесса: ключ -> (токены, момент обновления), LRU-вытеснение.
+    Вытесненный ключ начинает с полной корзины, поэтому maxsize должен покрывать активных клиентов.
+    """
+
+    def __init__(self, maxsize: int = AUTH_RATE_MAX_KEYS, timer: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self._timer = timer
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, burst: int, per_second: float) -> float:
+        """Списывает токен; 0 - разрешено, иначе - через сколько секунд появится токен"""
+        with self._lock:
+            now = self._timer()
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * per_second)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / per_second
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# Общее для воркеров хранилище подключается через set_backend: объект с методами
+# take(key, burst, per_second) -> float и clear() (например, поверх Redis)
+_backend = MemoryBucketBackend()
+
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
+
+
+def reset_rate_limits():
+    _backend.clear()
+
+
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def throttle_auth(request: Request, username: Optional[str], scope: str = "login"):
+    """
+    Проверка лимита попыток по IP клиента и по имени пользователя - до хеширования и запросов к БД.
+    Превышение - 429 с Retry-After.
+    """
+    checks = [(f"{scope}:ip:{_client_ip(request)}", AUTH_RATE_IP_BURST, AUTH_RATE_IP_PER_MINUTE)]
+    if username:
+        checks.append((f"{scope}:user:{username.lower()}", AUTH_RATE_USER_BURST, AUTH_RATE_USER_PER_MINUTE))
+    for key, burst, per_minute in checks:
+        retry_after = _backend.take(key, burst, per_minute / 60)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Слишком много попыток, повторите позже",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
@@ -0,0 +1,156 @@
+# app/core/route_graph.py
+import heapq
+import threading
+from bisect import bisect_left, insort
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from app.core.cache import TTLCache
+
+DayLoader = Callable[[date], Iterable]
+
+
+class Leg(NamedTuple):
+    """Плечо маршрута - рейс как ребро графа аэропортов с абсолютным временем вылета и прилёта"""
+    departs: datetime
+    flight_id: int
+    flight_number: str
+    origin: str
+    destination: str
+    arrives: datetime
+
+    @classmethod
+    def of(cls, flight) -> "Leg":
+        departs = datetime.combine(flight.departure_date, flight.departure_time)
+        arrives = datetime.combine(flight.departure_date, flight.arrival_time)
+        # Время прилёта не позже вылета - прилёт на следующие сутки
+        if arrives <= departs:
+            arrives += timedelta(days=1)
+        return cls(departs, flight.id, flight.flight_number, flight.departure_airport_icao,
+                   flight.arrival_airport_icao, arrives)
+
+
+class RouteGraph:
+    """
+    Граф рейсов с привязкой ко времени, разбитый по дням вылета.
+
+    Для каждого дня хранится индекс смежности: аэропорт вылета -> плечи, отсортированные по
+    времени вылета, поэтому стыковки ищутся бинарным поиском. День загружается через loader
+    при первом обращении и перечитывается не реже чем раз в ttl секунд (изменения из других
+    воркеров); изменения рейсов в этом процессе применяются к загруженным дням сразу.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_days: int = 400):
+        self._days = TTLCache(maxsize=max_days, ttl=ttl)
+        self._legs: Dict[int, Leg] = {}
+        self._lock = threading.RLock()
+
+    # --- Индекс ---
+
+    def _day(self, day: date, loader: DayLoader) -> Dict[str, List[Leg]]:
+        adjacency = self._days.get(day)
+        if adjacency is not None:
+            return adjacency
+        with self._lock:
+            adjacency = self._days.get(day)
+            if adjacency is not None:
+                return adjacency
+            adjacency = {}
+            for flight in loader(day):
+                leg = Leg.of(flight)
+                adjacency.setdefault(leg.origin, []).append(leg)
+                self._legs[leg.flight_id] = leg
+            for legs in adjacency.values():
+                legs.sort()
+            self._days.set(day, adjacency)
+            return adjacency
+
+    def upsert(self, flight):
+        """Добавляет или обновляет рейс в загруженном дне (незагруженные дни прочитаются из БД при поиске)"""
+        with self._lock:
+            self.remove(flight.id)
+            leg = Leg.of(flight)
+            adjacency = self._days.get(leg.departs.date())
+            if adjacency is not None:
+                # Список заменяется копией - поиски, идущие параллельно, видят согласованный снимок
+                legs = list(adjacency.get(leg.origin, []))
+                insort(legs, leg)
+                adjacency[leg.origin] = legs
+                self._legs[leg.flight_id] = leg
+
+    def remove(self, flight_id: int):
+        with self._lock:
+            leg = self._legs.pop(flight_id, None)
+            adjacency = self._days.get(leg.departs.date()) if leg else None
+            if adjacency and leg.origin in adjacency:
+                adjacency[leg.origin] = [item for item in adjacency[leg.origin] if item.flight_id != flight_id]
+
+    def clear(self):
+        with self._lock:
+            self._days.clear()
+            self._legs.clear()
+
+    def departures(self, origin: str, start: datetime, end: datetime, loader: DayLoader) -> List[Leg]:
+        """Плечи из аэропорта с вылетом в интервале [start, end]"""
+        result = []
+        day = start.date()
+        while day <= end.date():
+            legs = self._day(day, loader).get(origin, [])
+            lo = bisect_left(legs, (start,))
+            for leg in legs[lo:]:
+                if leg.departs > end:
+                    break
+                result.append(leg)
+            day += timedelta(days=1)
+        return result
+
+    # --- Поиск ---
+
+    def search(
+        self,
+        origin: str,
+        destination: str,
+        day: date,
+        loader: DayLoader,
+        max_legs: int = 3,
+        min_connection: timedelta = timedelta(minutes=60),
+        max_connection: timedelta = timedelta(hours=24),
+        limit: int = 5,
+        exclude: Optional[set] = None,
+    ) -> List[List[Leg]]:
+        """
+        До limit маршрутов из origin в destination с вылетом в день day.
+
+        Поиск по меткам в порядке времени прибытия (аналог Дейкстры для k лучших путей):
+        маршруты выдаются по возрастанию времени прилёта, затем по числу плеч. Каждый аэропорт
+        раскрывается не более limit раз, аэропорты в маршруте не повторяются.
+        loader(day) возвращает рейсы дня, если день ещё не загружен.
+        exclude - id рейсов, которые нельзя использовать (например, без свободных мест).
+        """
+        exclude = exclude or set()
+        start = datetime.combine(day, datetime.min.time())
+        queue = []
+        counter = 0
+        for leg in self.departures(origin, start, start + timedelta(days=1) - timedelta(microseconds=1), loader):
+            if leg.flight_id not in exclude:
+                heapq.heappush(queue, (leg.arrives, 1, counter, (leg,)))
+                counter += 1
+
+        expanded: Dict[str, int] = {}
+        routes = []
+        while queue and len(routes) < limit:
+            arrives, legs_count, _, path = heapq.heappop(queue)
+            airport = path[-1].destination
+            if airport == destination:
+                routes.append(list(path))
+                continue
+            if legs_count >= max_legs or expanded.get(airport, 0) >= limit:
+                continue
+            expanded[airport] = expanded.get(airport, 0) + 1
+            visited = {origin} | {leg.destination for leg in path}
+            for leg in self.departures(airport, arrives + min_connection, arrives + max_connection, loader):
+                if leg.destination in visited or leg.flight_id in exclude:
+                    continue
+                heapq.heappush(queue, (leg.arrives, legs_count + 1, counter, path + (leg,)))
+                counter += 1
+        return routes
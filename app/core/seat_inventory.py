@@ -0,0 +1,216 @@
+# app/core/seat_inventory.py
+from typing import Iterable, List, Optional
+
+from app.core.cabin_layout import CabinLayout, CabinRow
+
+SEAT_LETTERS = "ABCDEF"
+SEATS_PER_ROW = len(SEAT_LETTERS)
+
+
+def _lowest_bits(mask: int, count: int) -> List[int]:
+    """Позиции count младших установленных битов маски."""
+    positions = []
+    while mask and len(positions) < count:
+        low = mask & -mask
+        positions.append(low.bit_length() - 1)
+        mask ^= low
+    return positions
+
+
+class SeatInventory:
+    """Битовая карта мест рейса: один бит на место, 1 - место занято.
+
+    Места нумеруются построчно по компоновке салона (см. app.core.cabin_layout);
+    без компоновки используется типовая - 6 мест в ряду.
+    Подсказка first_free хранит наименьший индекс, который может быть свободен,
+    поэтому поиск следующего свободного места не перебирает карту с начала.
+    Дополнительно по каждому ряду хранится маска свободных мест - по ней
+    подбираются места рядом, у окна или у прохода без перебора отдельных мест.
+    """
+
+    def __init__(self, capacity: int, bitmap: Optional[bytes] = None, first_free: int = 0,
+                 layout: Optional[CabinLayout] = None):
+        self.layout = layout or CabinLayout.default(capacity)
+        self.capacity = self.layout.capacity
+        size = (self.capacity + 7) // 8
+        self._bits = bytearray(bitmap or b"")[:size].ljust(size, b"\x00")
+        # Биты за пределами вместимости не относятся к местам
+        for index in range(self.capacity, size * 8):
+            self._bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+        self._row_free = [
+            row.full_mask & ~sum(1 << i for i in range(len(row.letters)) if self._is_set(row.offset + i))
+            for row in self.layout.rows
+        ]
+        self.first_free = min(max(first_free, 0), self.capacity)
+        self._advance_hint()
+
+    @classmethod
+    def for_total_seats(cls, total_seats: int) -> "SeatInventory":
+        """Пустая карта для рейса с типовой компоновкой."""
+        return cls(total_seats)
+
+    # --- Преобразование номера места ---
+
+    def index_of(self, seat: str) -> Optional[int]:
+        """Индекс места '12C' в карте или None, если такого места на рейсе нет."""
+        return self.layout.index_of(seat)
+
+    def seat_at(self, index: int) -> str:
+        return self.layout.seat_at(index)
+
+    # --- Операции с битами ---
+
+    def _is_set(self, index: int) -> bool:
+        return bool(self._bits[index >> 3] & (1 << (index & 7)))
+
+    def _advance_hint(self):
+        while self.first_free < self.capacity and self._is_set(self.first_free):
+            self.first_free += 1
+
+    def _set(self, index: int, occupied: bool):
+        row = self.layout.row_of(index)
+        bit = 1 << (index - row.offset)
+        if occupied:
+            self._bits[index >> 3] |= 1 << (index & 7)
+            self._row_free[row.number - 1] &= ~bit
+        else:
+            self._bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+            self._row_free[row.number - 1] |= bit
+
+    def exists(self, seat: str) -> bool:
+        return self.index_of(seat) is not None
+
+    def is_free(self, seat: str) -> bool:
+        index = self.index_of(seat)
+        return index is not None and not self._is_set(index)
+
+    def class_of(self, seat: str) -> Optional[str]:
+        index = self.index_of(seat)
+        return None if index is None else self.layout.row_of(index).class_type
+
+    def occupy(self, seat: str) -> bool:
+        """Помечает место занятым. Возвращает False, если места нет или оно уже занято."""
+        index = self.index_of(seat)
+        if index is None or self._is_set(index):
+            return False
+        self._set(index, True)
+        if index == self.first_free:
+            self._advance_hint()
+        return True
+
+    def release(self, seat: str) -> bool:
+        """Освобождает место. Возвращает False, если места нет или оно уже свободно."""
+        index = self.index_of(seat)
+        if index is None or not self._is_set(index):
+            return False
+        self._set(index, False)
+        if index < self.first_free:
+            self.first_free = index
+        return True
+
+    def next_free(self) -> Optional[str]:
+        """Ближайшее к началу салона свободное место или None, если мест нет."""
+        if self.first_free >= self.capacity:
+            return None
+        return self.seat_at(self.first_free)
+
+    def occupied_count(self) -> int:
+        return sum(bin(b).count("1") for b in self._bits)
+
+    def free_count(self, class_type: Optional[str] = None) -> int:
+        return sum(free.bit_count() for row, free in self.free_rows(class_type))
+
+    def fill(self, seats: Iterable[str]):
+        """Занимает перечисленные места (неизвестные номера пропускаются)."""
+        for seat in seats:
+            if seat:
+                self.occupy(seat)
+
+    # --- Подбор мест ---
+
+    def free_rows(self, class_type: Optional[str] = None):
+        """Ряды зоны класса с масками свободных мест; если такого класса в салоне нет - все ряды."""
+        rows = zip(self.layout.rows, self._row_free)
+        if self.layout.has_class(class_type):
+            return [(row, free) for row, free in rows if row.class_type == class_type]
+        return list(rows)
+
+    def _take(self, row: CabinRow, positions: List[int]) -> List[str]:
+        seats = [f"{row.number}{row.letters[pos]}" for pos in positions]
+        for seat in seats:
+            self.occupy(seat)
+        return seats
+
+    def allocate(self, count: int, class_type: Optional[str] = None, preference: Optional[str] = None) -> Optional[List[str]]:
+        """
+        Подбирает и занимает count мест в зоне класса class_type.
+
+        Порядок поиска: count кресел подряд без прохода между ними (в ряду ближе к началу салона,
+        с учётом preference 'window'/'aisle'), затем count мест в одном ряду, затем наименьшее
+        число соседних рядов. Возвращает None, если свободных мест в зоне меньше count.
+        """
+        if count < 1:
+            return []
+        rows = self.free_rows(class_type)
+        if sum(free.bit_count() for _, free in rows) < count:
+            return None
+
+        run = (1 << count) - 1
+        fallback = None
+        for row, free in rows:
+            if free.bit_count() < count:
+                continue
+            pref_mask = {"window": row.window_mask, "aisle": row.aisle_mask}.get(preference, 0)
+            for segment in row.segments:
+                seg_free = free & segment
+                # Бит i в starts - с позиции i свободны count кресел подряд
+                starts = seg_free
+                for k in range(1, count):
+                    starts &= seg_free >> k
+                while starts:
+                    start = (starts & -starts).bit_length() - 1
+                    if not pref_mask or (run << start) & pref_mask:
+                        return self._take(row, list(range(start, start + count)))
+                    if fallback is None:
+                        fallback = (row, list(range(start, start + count)))
+                    starts &= starts - 1
+        if fallback:
+            return self._take(*fallback)
+
+        # Блока подряд нет - места в одном ряду
+        for row, free in rows:
+            if free.bit_count() >= count:
+                return self._take(row, _lowest_bits(free, count))
+
+        # Наименьшее окно соседних рядов, в котором хватает мест
+        best, lo, total = None, 0, 0
+        for hi, (_, free) in enumerate(rows):
+            total += free.bit_count()
+            while total - rows[lo][1].bit_count() >= count:
+                total -= rows[lo][1].bit_count()
+                lo += 1
+            if total >= count and (best is None or hi - lo < best[1] - best[0]):
+                best = (lo, hi)
+        seats = []
+        for row, free in rows[best[0]:best[1] + 1]:
+            seats.extend(self._take(row, _lowest_bits(free, count - len(seats))))
+        return seats
+
+    def pick(self, class_type: Optional[str] = None, preference: Optional[str] = None) -> Optional[str]:
+        """Одно место: у окна/прохода, если есть, иначе ближайшее к началу зоны."""
+        seats = self.allocate(1, class_type, preference)
+        return seats[0] if seats else None
+
+    def relayout(self, layout: CabinLayout) -> "SeatInventory":
+        """Копия карты с другой компоновкой; занятые места, существующие в новой компоновке, сохраняются."""
+        occupied = [self.seat_at(i) for i in range(self.capacity) if self._is_set(i)]
+        inventory = SeatInventory(layout.capacity, layout=layout)
+        inventory.fill(occupied)
+        return inventory
+
+    def resized(self, capacity: int) -> "SeatInventory":
+        """Копия карты с типовой компоновкой новой вместимости."""
+        return self.relayout(CabinLayout.default(capacity))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._bits)
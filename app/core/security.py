@@ -1,11 +1,17 @@
 from datetime import datetime, timedelta, timezone
+import hashlib
+import time
+import uuid
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlmodel import Session, select
+from dataclasses import dataclass
 from typing import Optional
 
+from app.core import password_pool, token_denylist
+from app.core.cache import TTLCache
 from app.db.session import get_session
 from app.models.user import User
 
@@ -21,16 +27,67 @@ security = HTTPBearer(auto_error=False)
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
+REFRESH_TOKEN_EXPIRE_DAYS = 7
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Кэш аутентифицированных пользователей по subject токена (username).
+# Сбрасывается явно при смене роли; TTL ограничивает устаревание из-за изменений в других воркерах
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+_principals = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+
+# Режим без обращения к БД: access-токен несёт uid и role пользователя (выключен по умолчанию).
+# Смена роли вступает в силу с новым токеном (refresh или повторный вход)
+AUTH_ROLE_CLAIMS = os.getenv("AUTH_ROLE_CLAIMS", "false").lower() in ("1", "true", "yes")
+
+# Проверенные токены (payload) по sha256 токена - подпись не перепроверяется для
+# повторяющегося токена; запись живёт не дольше срока действия токена
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+_decoded_tokens = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Аутентифицированный пользователь запроса: только то, что нужно для проверки прав"""
+    id: int
+    username: str
+    role: str
+
+
+def invalidate_principal(username: str):
+    """Сбрасывает кэш пользователя после изменения его роли или удаления (вызывать после commit)"""
+    _principals.pop(username)
+
+
+def forget_decoded_tokens():
+    """Сбрасывает кэш проверенных токенов (роль в claims выданных токенов устарела)"""
+    _decoded_tokens.clear()
+
+
 def hash_password(password: str) -> str:
-    """Хеширование пароля"""
-    return pwd_context.hash(password)
+    """Хеширование пароля (в пуле password_pool, вызывающий поток ждёт результат)"""
+    return password_pool.run(pwd_context.hash, password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Проверка пароля"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Проверка пароля (в пуле password_pool, вызывающий поток ждёт результат)"""
+    return password_pool.run(pwd_context.verify, plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """Хеширование пароля для async-обработчиков: цикл событий не выполняет Argon2"""
+    return await password_pool.run_async(pwd_context.hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_pool.run_async(pwd_context.verify, plain_password, hashed_password)
+
+
+def _token_identity() -> dict:
+    """jti для отзыва одного токена; дробный iat - для отзыва всех токенов, выданных до момента"""
+    return {"jti": uuid.uuid4().hex, "iat": time.time()}
 
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
@@ -38,34 +95,63 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     now = datetime.now(timezone.utc)
     expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire, "type": "access"})
+    to_encode.update({"exp": expire, "type": "access", **_token_identity()})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def create_user_access_token(user) -> str:
+    """access-токен пользователя; в режиме AUTH_ROLE_CLAIMS - с uid и role"""
+    data = {"sub": user.username}
+    if AUTH_ROLE_CLAIMS:
+        data.update({"uid": user.id, "role": user.role})
+    return create_access_token(data)
+
+
 def create_refresh_token(data: dict):
     """Создание refresh токена"""
     to_encode = data.copy()
     now = datetime.now(timezone.utc)
-    expire = now + timedelta(days=7)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    expire = now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.update({"exp": expire, "type": "refresh", **_token_identity()})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def decode_token(token: str, expected_type: str = "access"):
-    """Декодирование токена с проверкой типа"""
+def _token_payload(token: str, expected_type: str) -> Optional[dict]:
+    """Проверенный payload токена (из кэша по sha256 или после проверки подписи); None - токен невалиден"""
+    key = hashlib.sha256(token.encode()).digest()
+    payload = _decoded_tokens.get(key)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return None
+        ttl = min(payload.get("exp", 0) - time.time(), TOKEN_CACHE_TTL)
+        if ttl > 0:
+            _decoded_tokens.set(key, payload, ttl=ttl)
+    if token_denylist.is_revoked(payload):
+        return None
+    if payload.get("type") != expected_type:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Неверный тип токена"
+        )
+    return payload
+
+
+def token_claims(token: str, expected_type: str = "access") -> Optional[dict]:
+    """Проверенный payload токена; None - токен невалиден, отозван или другого типа"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        token_type = payload.get("type")
-        if token_type != expected_type:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Неверный тип токена"
-            )
-        return payload.get("sub")
-    except JWTError:
+        return _token_payload(token, expected_type)
+    except HTTPException:
         return None
 
 
+def decode_token(token: str, expected_type: str = "access"):
+    """Декодирование токена с проверкой типа"""
+    payload = _token_payload(token, expected_type)
+    return payload.get("sub") if payload else None
+
+
 async def get_token_from_header_or_cookie(
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
@@ -91,25 +177,43 @@ async def get_token_from_header_or_cookie(
     )
 
 
+def get_optional_token(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+) -> Optional[str]:
+    """Токен из заголовка Authorization или куки access_token, если он передан"""
+    if credentials:
+        return credentials.credentials
+    return request.cookies.get("access_token")
+
+
 def get_current_user(
     token: str = Depends(get_token_from_header_or_cookie),
     session: Session = Depends(get_session)
 ):
-    """Получение текущего пользователя по токену"""
-    username = decode_token(token, expected_type="access")
+    """Получение текущего пользователя по токену (из кэша, без запроса к БД для известных пользователей)"""
+    token_denylist.sync(session)
+    payload = _token_payload(token, expected_type="access")
+    username = payload.get("sub") if payload else None
     if not username:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Невалидный токен"
         )
+    if AUTH_ROLE_CLAIMS and "uid" in payload and "role" in payload:
+        return Principal(id=payload["uid"], username=username, role=payload["role"])
 
-    user = session.exec(select(User).where(User.username == username)).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Пользователь не найден"
-        )
-    return user
+    principal = _principals.get(username)
+    if principal is None:
+        user = session.exec(select(User).where(User.username == username)).first()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Пользователь не найден"
+            )
+        principal = Principal(id=user.id, username=user.username, role=user.role)
+        _principals.set(username, principal)
+    return principal
 
 
 def admin_required(user=Depends(get_current_user)):
@@ -0,0 +1,91 @@
+# app/core/token_denylist.py
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlmodel import Session, select
+
+from app.models.revoked_token import RevokedToken
+
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# Отозванные токены в памяти процесса: проверка на каждом запросе - поиск в словаре.
+# Отзывы этого процесса применяются сразу после commit, других воркеров - при
+# инкрементальной синхронизации с таблицей revoked_token не чаще раза в DENYLIST_SYNC_SECONDS
+DENYLIST_SYNC_SECONDS = float(os.getenv("DENYLIST_SYNC_SECONDS", "5"))
+# Синхронизация перечитывает столько последних id: транзакция с меньшим id могла
+# завершиться позже уже прочитанной
+DENYLIST_SYNC_OVERLAP = 256
+
+_lock = threading.Lock()
+_jtis: Dict[str, float] = {}    # jti -> exp (unix time)
+_users: Dict[str, float] = {}   # username -> отозваны токены с iat раньше этого момента
+_expires: Dict[str, float] = {}  # username -> когда запись _users можно забыть
+_state = {"cursor": 0, "synced_at": None}
+
+
+def _timestamp(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def is_revoked(payload: dict) -> bool:
+    """Отозван ли проверенный токен (по jti или отзыву всех токенов пользователя)"""
+    jti = payload.get("jti")
+    if jti is not None and jti in _jtis:
+        return True
+    before = _users.get(payload.get("sub"))
+    return before is not None and payload.get("iat", 0) < before
+
+
+def apply(row: RevokedToken):
+    """Добавляет отзыв в память процесса (вызывать после commit)"""
+    expires_at = _timestamp(row.expires_at)
+    with _lock:
+        if row.jti:
+            _jtis[row.jti] = expires_at
+        if row.username and row.revoked_before:
+            before = _timestamp(row.revoked_before)
+            if before > _users.get(row.username, 0):
+                _users[row.username] = before
+                _expires[row.username] = expires_at
+
+
+def _prune(now: float):
+    with _lock:
+        for jti in [jti for jti, exp in _jtis.items() if exp <= now]:
+            del _jtis[jti]
+        for username in [name for name, exp in _expires.items() if exp <= now]:
+            del _expires[username]
+            _users.pop(username, None)
+
+
+def sync(session: Session, force: bool = False):
+    """Дочитывает новые строки revoked_token (не чаще раза в DENYLIST_SYNC_SECONDS)"""
+    now = time.monotonic()
+    synced_at: Optional[float] = _state["synced_at"]
+    if not force and synced_at is not None and now - synced_at < DENYLIST_SYNC_SECONDS:
+        return
+    _state["synced_at"] = now
+    rows = session.exec(
+        select(RevokedToken)
+        .where(RevokedToken.id > _state["cursor"] - DENYLIST_SYNC_OVERLAP)
+        .order_by(RevokedToken.id)
+    ).all()
+    for row in rows:
+        apply(row)
+    if rows:
+        _state["cursor"] = max(_state["cursor"], rows[-1].id)
+    _prune(time.time())
+
+
+def clear_denylist():
+    """Забывает отзывы в памяти (перечитаются при следующей синхронизации)"""
+    with _lock:
+        _jtis.clear()
+        _users.clear()
+        _expires.clear()
+    _state.update(cursor=0, synced_at=None)
@@ -0,0 +1,43 @@
+from collections import defaultdict
+from typing import Dict, List, Sequence, TypeVar
+
+from sqlalchemy import insert
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import Session, SQLModel
+
+ModelT = TypeVar("ModelT", bound=SQLModel)
+
+
+def bulk_insert(session: Session, instances: Sequence[ModelT]) -> List[ModelT]:
+    """
+    Вставка новых объектов моделей через INSERT ... RETURNING (один пакетный запрос на тип модели).
+
+    Сгенерированные БД значения (id и т.п.) записываются прямо в переданные объекты,
+    после чего объекты присоединяются к сессии как уже сохранённые - session.refresh не нужен.
+    Объекты не должны быть добавлены в сессию через session.add. Commit выполняет вызывающий код.
+    """
+    by_model: Dict[type, List[ModelT]] = defaultdict(list)
+    for obj in instances:
+        by_model[type(obj)].append(obj)
+
+    for model, objects in by_model.items():
+        table = model.__table__
+        # Автоинкрементный первичный ключ, не заданный явно, генерирует БД
+        generated = {
+            c.key for c in table.primary_key.columns
+            if c.autoincrement and all(getattr(obj, c.key) is None for obj in objects)
+        }
+        columns = [c for c in table.columns if c.key not in generated]
+        rows = [{c.key: getattr(obj, c.key) for c in columns} for obj in objects]
+
+        result = session.execute(
+            insert(table).returning(*table.columns, sort_by_parameter_order=True),
+            rows
+        )
+        for obj, row in zip(objects, result):
+            for key, value in row._mapping.items():
+                setattr(obj, key, value)
+            make_transient_to_detached(obj)
+            session.add(obj)
+
+    return list(instances)
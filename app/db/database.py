@@ -1,9 +1,13 @@
+from sqlalchemy import inspect, text
 from sqlmodel import SQLModel, create_engine
 from app.models.flight import Flight
 from app.models.booking import Booking
 from app.models.passenger import Passenger
 from app.models.user import User
 from app.models.airport import Airport
+from app.models.seat_map import FlightSeatMap
+from app.models.seat_hold import SeatHold
+from app.models.revoked_token import RevokedToken
 
 from dotenv import load_dotenv
 import os
@@ -16,6 +20,53 @@ engine = create_engine(DATABASE_URL, echo=True)
 def init_db():
     """Инициализация базы данных"""
     SQLModel.metadata.create_all(engine)
+    migrate_flight_number_uniqueness(engine)
+    # create_all не добавляет индексы в уже существующие таблицы - создаём недостающие
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    if engine.dialect.name == "postgresql":
+        _create_trigram_indexes()
+
+
+def migrate_flight_number_uniqueness(bind):
+    """
+    Номер рейса уникален в пределах даты вылета, а не глобально (расписания).
+    В существующих базах create_all не трогает таблицу flight: уникальный индекс
+    ix_flight_flight_number пересоздаётся обычным, добавляется uq_flight_number_date.
+    Повторный запуск ничего не меняет.
+    """
+    inspector = inspect(bind)
+    if not inspector.has_table("flight"):
+        return
+    indexes = {index["name"]: index for index in inspector.get_indexes("flight")}
+    constraints = {constraint["name"] for constraint in inspector.get_unique_constraints("flight")}
+    with bind.begin() as connection:
+        if indexes.get("ix_flight_flight_number", {}).get("unique"):
+            connection.execute(text("DROP INDEX ix_flight_flight_number"))
+            connection.execute(text("CREATE INDEX ix_flight_flight_number ON flight (flight_number)"))
+        if "uq_flight_number_date" not in constraints and "uq_flight_number_date" not in indexes:
+            if bind.dialect.name == "postgresql":
+                connection.execute(text(
+                    "ALTER TABLE flight ADD CONSTRAINT uq_flight_number_date UNIQUE (flight_number, departure_date)"
+                ))
+            else:
+                # SQLite не умеет добавлять ограничения в существующую таблицу - уникальный индекс равносилен
+                connection.execute(text(
+                    "CREATE UNIQUE INDEX uq_flight_number_date ON flight (flight_number, departure_date)"
+                ))
+
+
+def _create_trigram_indexes():
+    """GIN-индексы pg_trgm для поиска аэропортов по подстроке названия и кода"""
+    with engine.begin() as connection:
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_airport_name_trgm ON airport USING gin (lower(name) gin_trgm_ops)"
+        ))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_airport_icao_trgm ON airport USING gin (icao_code gin_trgm_ops)"
+        ))
 
 
 def close_db():
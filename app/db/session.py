@@ -3,6 +3,10 @@ from app.db.database import engine
 
 
 def get_session():
-    """Получение сессии БД"""
-    with Session(engine) as session:
-        yield session
\ No newline at end of file
+    """Получение сессии БД.
+
+    expire_on_commit=False: после commit объекты сохраняют значения (в т.ч. полученные
+    через INSERT ... RETURNING в app.db.bulk), и ответ строится без повторных SELECT.
+    """
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
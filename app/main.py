@@ -1,8 +1,10 @@
 # app/main.py
+import asyncio
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from fastapi_pagination import add_pagination
-from app.db.database import init_db, close_db
+from app.db.database import init_db, close_db, engine
+from app.controllers.hold_controller import sweep_holds_periodically
 
 # V1
 from app.api.v1 import auth_router as v1_auth, flight_router as v1_flight, passenger_router as v1_passenger
@@ -15,7 +17,10 @@ from app.api.v2 import booking_router as v2_booking, airport_router as v2_airpor
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    # Просроченные удержания мест освобождаются в фоне, даже если новых удержаний не создают
+    hold_sweeper = asyncio.create_task(sweep_holds_periodically(engine))
     yield
+    hold_sweeper.cancel()
     close_db()
 
 # 🔥 Главное приложение — с отключёнными docs, чтобы не было каши
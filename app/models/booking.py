@@ -11,7 +11,7 @@ def generate_booking_code(length=6):
 
 class Booking(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    booking_code: str
+    booking_code: str = Field(index=True)
     flight_id: int = Field(foreign_key="flight.id")
     passenger_id: int = Field(
         sa_column=Column(Integer, ForeignKey("passenger.id", ondelete="CASCADE"))
@@ -1,12 +1,23 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, UniqueConstraint
 from typing import Optional
 from datetime import date, time
 
 
 class Flight(SQLModel, table=True):
     __tablename__ = "flight"
+    __table_args__ = (
+        # Номер рейса повторяется по датам расписания, но не в пределах одного дня
+        UniqueConstraint("flight_number", "departure_date", name="uq_flight_number_date"),
+        # Табло аэропорта: рейсы аэропорта за дату в порядке времени
+        Index("ix_flight_departure_board", "departure_airport_icao", "departure_date", "departure_time"),
+        Index("ix_flight_arrival_board", "arrival_airport_icao", "departure_date", "arrival_time"),
+        # Поиск рейсов: маршрут + даты, авиакомпания + даты
+        Index("ix_flight_route", "departure_airport_icao", "arrival_airport_icao", "departure_date"),
+        Index("ix_flight_airline_date", "airline_code", "departure_date"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
-    flight_number: str = Field(unique=True, index=True)
+    flight_number: str = Field(index=True)
 
     airline_code: str = Field(max_length=3, foreign_key="airline.code")
 
@@ -0,0 +1,18 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class RevokedToken(SQLModel, table=True):
+    """
+    Отзыв токенов: один токен (jti) или все токены пользователя, выданные раньше revoked_before.
+    Строки читаются воркерами по возрастанию id (см. app/core/token_denylist.py)
+    """
+    __tablename__ = "revoked_token"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    jti: Optional[str] = Field(default=None, max_length=32)
+    username: Optional[str] = Field(default=None, max_length=50)
+    revoked_before: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # После этого момента отозванный токен истёк бы сам - строку можно удалить
+    expires_at: datetime = Field(index=True)
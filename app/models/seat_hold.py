@@ -0,0 +1,23 @@
+from sqlmodel import SQLModel, Field
+from typing import List, Optional
+from datetime import datetime
+from sqlalchemy import Column, Integer, ForeignKey
+
+
+class SeatHold(SQLModel, table=True):
+    """Временная бронь мест на рейсе (одна строка на рейс; рейсы одной брони объединены hold_code)"""
+    __tablename__ = "seat_hold"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    hold_code: str = Field(index=True, max_length=16)
+    flight_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("flight.id", ondelete="CASCADE"), nullable=False)
+    )
+    seats: str = Field(default="", description="Удерживаемые места через запятую")
+    seat_count: int
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Индекс по сроку действия: просроченные брони выбираются пачками по диапазону
+    expires_at: datetime = Field(index=True)
+
+    @property
+    def seat_list(self) -> List[str]:
+        return [s for s in self.seats.split(",") if s]
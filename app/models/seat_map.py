@@ -0,0 +1,16 @@
+from typing import Optional
+
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, Integer, ForeignKey, LargeBinary
+
+
+class FlightSeatMap(SQLModel, table=True):
+    """Карта занятости мест рейса (битовая карта, см. app.core.seat_inventory)"""
+    __tablename__ = "flight_seat_map"
+    flight_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("flight.id", ondelete="CASCADE"), primary_key=True)
+    )
+    capacity: int = Field(default=0, description="Количество мест в карте")
+    layout: Optional[str] = Field(default=None, max_length=500, description="Компоновка салона; None - типовая, 6 мест в ряду")
+    first_free: int = Field(default=0, description="Наименьший индекс свободного места")
+    bitmap: bytes = Field(sa_column=Column(LargeBinary, nullable=False), description="1 бит на место")
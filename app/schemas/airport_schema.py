@@ -1,7 +1,8 @@
 # app/schemas/airport_schema.py
 
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional
 
 # --- НОВОЕ: Множество допустимых префиксов из ТЗ ---
 VALID_ICAO_PREFIXES = {
@@ -53,4 +54,24 @@ class AirportResponse(BaseModel):
     name: str
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class BoardFlightResponse(BaseModel):
+    flightId: int
+    flightNumber: str
+    airlineCode: str
+    departureAirportIcao: str
+    arrivalAirportIcao: str
+    departure: datetime
+    arrival: datetime
+    totalSeats: int
+    freeSeats: int
+
+
+class BoardResponse(BaseModel):
+    airportIcao: str
+    direction: str
+    from_: datetime = Field(alias="from")
+    to: datetime
+    flights: List[BoardFlightResponse]
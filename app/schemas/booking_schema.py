@@ -1,6 +1,8 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
-from typing import Optional, List
+
+from app.schemas.flight_schema import FlightResponse
+from typing import Dict, Optional, List, Literal
 
 class BookingCreate(BaseModel):
     flightId: int
@@ -12,6 +14,9 @@ class BookingCreate(BaseModel):
     paymentType: str = Field(default="card", description="Тип оплаты: card, cash, online")
     additionalFees: float = Field(default=0.0, description="Дополнительные сборы")
     classType: str = Field(default="economy", description="Класс обслуживания: economy, business, first")
+    seatPreference: Optional[Literal["window", "aisle"]] = Field(
+        default=None, description="Предпочтение при автоматическом выборе мест: window, aisle"
+    )
 
 class BookingResponse(BaseModel):
     id: int
@@ -29,5 +34,80 @@ class BookingResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class BookingBulkCreate(BaseModel):
+    items: List[BookingCreate] = Field(..., min_length=1, max_length=1000, description="Бронирования пакета")
+    allOrNothing: bool = Field(default=False, description="Отменить весь пакет при ошибке в любом элементе")
+
+class BookingBulkCancel(BaseModel):
+    bookingCode: Optional[str] = Field(default=None, description="Код бронирования (PNR)")
+    passengerIds: Optional[List[int]] = Field(default=None, description="Только эти пассажиры бронирования")
+    flightIds: Optional[List[int]] = Field(default=None, description="Только эти плечи бронирования")
+    bookingIds: Optional[List[int]] = Field(default=None, max_length=1000, description="ID бронирований")
+
+    @model_validator(mode='after')
+    def check_target(self):
+        if bool(self.bookingCode) == bool(self.bookingIds):
+            raise ValueError('Укажите либо bookingCode, либо bookingIds')
+        if self.bookingIds and (self.passengerIds or self.flightIds):
+            raise ValueError('passengerIds и flightIds применяются только вместе с bookingCode')
+        return self
+
+class BookingCancelResult(BaseModel):
+    cancelled: int
+    bookingIds: List[int]
+    releasedSeats: Dict[int, int] = Field(description="Возвращённые места по рейсам: {flight_id: количество}")
+
+class BookingBulkItemResult(BaseModel):
+    index: int
+    success: bool
+    bookings: List[BookingResponse] = Field(default_factory=list)
+    error: Optional[str] = None
+
 class ConnectionAddPayload(BaseModel):
-    flightIds: List[int]
\ No newline at end of file
+    flightIds: List[int]
+
+class SeatHoldCreate(BaseModel):
+    flightId: int
+    seatCount: int = Field(..., ge=1, description="Количество удерживаемых мест на каждом рейсе")
+    connectionFlightIds: Optional[List[int]] = Field(default=None, description="ID рейсов для пересадок")
+    seats: Optional[List[str]] = Field(default=None, description="Номера мест на основном рейсе")
+    ttlSeconds: int = Field(default=900, ge=30, le=86400, description="Время удержания мест в секундах")
+
+class SeatHoldLegResponse(BaseModel):
+    flightId: int
+    seats: List[str]
+
+class SeatHoldResponse(BaseModel):
+    holdCode: str
+    expiresAt: datetime
+    legs: List[SeatHoldLegResponse]
+
+class SeatHoldConfirm(BaseModel):
+    passengerIds: List[int] = Field(..., min_length=1, description="ID пассажиров; лишние удерживаемые места освобождаются")
+    bookingCode: Optional[str] = Field(None)
+    baggageAllowed: bool = Field(default=False, description="Возможность багажа")
+    paymentType: str = Field(default="card", description="Тип оплаты: card, cash, online")
+    additionalFees: float = Field(default=0.0, description="Дополнительные сборы")
+    classType: str = Field(default="economy", description="Класс обслуживания: economy, business, first")
+
+
+class ItineraryPassengerResponse(BaseModel):
+    bookingId: int
+    passengerId: int
+    fullName: str
+    passportNumber: str
+    seat: str
+    classType: str
+    baggageAllowed: bool
+
+class ItineraryLegResponse(BaseModel):
+    flight: FlightResponse
+    passengers: List[ItineraryPassengerResponse]
+
+class ItineraryResponse(BaseModel):
+    """Полный маршрут по коду бронирования (PNR): все плечи и пассажиры"""
+    bookingCode: str
+    createdAt: datetime
+    paymentType: str
+    passengerCount: int
+    legs: List[ItineraryLegResponse]
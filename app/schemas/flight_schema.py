@@ -1,8 +1,10 @@
 from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict
 from datetime import date, time, datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 import re
 
+from app.core.cabin_layout import CabinLayout
+
 class FlightCreate(BaseModel):
     flightNumber: str = Field(..., description="Номер рейса в формате AAA-NNN")
     airlineCode: str = Field(..., min_length=3, max_length=3, description="Код авиакомпании")
@@ -14,6 +16,10 @@ class FlightCreate(BaseModel):
     totalSeats: int = Field(..., gt=0)
     basePrice: float = Field(default=0.0, description="Базовая цена билета")
     baggagePrice: float = Field(default=0.0, description="Цена багажа")
+    cabinLayout: Optional[str] = Field(
+        default=None, max_length=500,
+        description="Компоновка салона 'класс:рядов:схема;...', например 'business:3:AC-DF;economy:20:ABC-DEF'"
+    )
 
     @field_validator('flightNumber')
     @classmethod
@@ -34,6 +40,81 @@ class FlightCreate(BaseModel):
             raise ValueError(f'Префикс номера рейса ({prefix}) должен совпадать с кодом авиакомпании ({self.airlineCode})')
         return self
 
+    @model_validator(mode='after')
+    def check_cabin_layout(self):
+        if self.cabinLayout:
+            layout = CabinLayout.parse(self.cabinLayout)
+            if layout.capacity != self.totalSeats:
+                raise ValueError(f'totalSeats должно совпадать с количеством мест в компоновке салона ({layout.capacity})')
+            self.cabinLayout = layout.spec
+        return self
+
+class FlightScheduleCreate(BaseModel):
+    """Регулярный рейс: один номер, вылеты по дням недели в диапазоне дат"""
+    flightNumber: str = Field(..., description="Номер рейса в формате AAA-NNN")
+    airlineCode: str = Field(..., min_length=3, max_length=3, description="Код авиакомпании")
+    departureAirportIcao: str = Field(..., max_length=4)
+    arrivalAirportIcao: str = Field(..., max_length=4)
+    dateFrom: date
+    dateTo: date
+    daysOfWeek: List[int] = Field(
+        default=[1, 2, 3, 4, 5, 6, 7], min_length=1, description="Дни недели ISO: 1 - понедельник ... 7 - воскресенье"
+    )
+    departureTime: time
+    arrivalTime: time
+    totalSeats: int = Field(..., gt=0)
+    basePrice: float = Field(default=0.0, description="Базовая цена билета")
+    baggagePrice: float = Field(default=0.0, description="Цена багажа")
+    cabinLayout: Optional[str] = Field(default=None, max_length=500, description="Компоновка салона, как в FlightCreate")
+
+    @field_validator('flightNumber')
+    @classmethod
+    def validate_flight_number(cls, v):
+        if not re.match(r'^[A-Z]{3}-\d{3}$', v.upper()):
+            raise ValueError('Номер рейса должен быть строго в формате AAA-NNN')
+        return v.upper()
+
+    @field_validator('airlineCode', 'departureAirportIcao', 'arrivalAirportIcao')
+    @classmethod
+    def upper_codes(cls, v):
+        return v.upper()
+
+    @field_validator('daysOfWeek')
+    @classmethod
+    def validate_days(cls, v):
+        if any(day < 1 or day > 7 for day in v):
+            raise ValueError('Дни недели задаются числами от 1 (понедельник) до 7 (воскресенье)')
+        return sorted(set(v))
+
+    @model_validator(mode='after')
+    def check_schedule(self):
+        prefix = self.flightNumber.split('-')[0]
+        if prefix != self.airlineCode:
+            raise ValueError(f'Префикс номера рейса ({prefix}) должен совпадать с кодом авиакомпании ({self.airlineCode})')
+        if self.dateTo < self.dateFrom:
+            raise ValueError('dateTo не может быть раньше dateFrom')
+        if (self.dateTo - self.dateFrom).days > 366:
+            raise ValueError('Период расписания не может превышать год')
+        if self.cabinLayout:
+            layout = CabinLayout.parse(self.cabinLayout)
+            if layout.capacity != self.totalSeats:
+                raise ValueError(f'totalSeats должно совпадать с количеством мест в компоновке салона ({layout.capacity})')
+            self.cabinLayout = layout.spec
+        return self
+
+
+class ScheduledFlightRef(BaseModel):
+    flightNumber: str
+    departureDate: date
+
+
+class FlightScheduleResult(BaseModel):
+    created: int
+    flightIds: List[int]
+    # Даты, на которые рейс с этим номером уже был, - пропущены
+    skipped: List[ScheduledFlightRef]
+
+
 class FlightUpdate(BaseModel):
     flightNumber: Optional[str] = None
     airlineCode: Optional[str] = None
@@ -63,6 +144,51 @@ class FlightResponse(BaseModel):
     model_config = {"from_attributes": True, "populate_by_name": True}
 
 
+class SeatMapRowResponse(BaseModel):
+    row: int
+    classType: str
+    freeSeats: List[str]
+
+
+class SeatMapResponse(BaseModel):
+    flightId: int
+    cabinLayout: str
+    capacity: int
+    rows: List[SeatMapRowResponse]
+
+
+class FlightOccupancyResponse(BaseModel):
+    flightId: int
+    flightNumber: str
+    departureDate: date
+    totalSeats: int
+    freeSeats: int
+    bookedSeats: int
+    heldSeats: int
+    loadFactor: float = Field(..., description="Доля проданных мест, 0..1")
+    byClass: Dict[str, int]
+    withBaggage: int
+    withoutBaggage: int
+
+
+class RouteLegResponse(BaseModel):
+    flightId: int
+    flightNumber: str
+    departureAirportIcao: str
+    arrivalAirportIcao: str
+    departure: datetime
+    arrival: datetime
+    freeSeats: int
+
+
+class RouteResponse(BaseModel):
+    departure: datetime
+    arrival: datetime
+    durationMinutes: int
+    connections: int
+    legs: List[RouteLegResponse]
+
+
 class PassengerBrief(BaseModel):
     full_name: str = Field(alias="full_name")
     passport_number: str = Field(alias="passport_number")
@@ -4,11 +4,14 @@ from pathlib import Path
 from faker import Faker
 from sqlmodel import Session, select
 from app.db.database import engine
+from app.db.bulk import bulk_insert
 from app.models.airport import Airport
 from app.models.passenger import Passenger
 from app.models.flight import Flight
 from app.models.booking import Booking, generate_booking_code
 from app.models.airline import Airline  # ✅ НОВОЕ
+from app.models.seat_map import FlightSeatMap
+from app.core.seat_inventory import SeatInventory, SEAT_LETTERS
 from datetime import date, time, timedelta, datetime
 import random
 import re
@@ -122,16 +125,11 @@ def populate_database(
     print(f"✅ Сгенерировано {len(passengers)} пассажиров")
 
     # === 4. Вставка базовых сущностей в БД ===
-    with Session(engine) as session:
-        session.add_all(airlines)
-        session.add_all(airports)
-        session.add_all(passengers)
+    with Session(engine, expire_on_commit=False) as session:
+        # INSERT ... RETURNING: id сразу записываются в объекты, без refresh по каждой строке
+        bulk_insert(session, airlines + airports + passengers)
         session.commit()
 
-        for a in airlines: session.refresh(a)
-        for a in airports: session.refresh(a)
-        for p in passengers: session.refresh(p)
-
         # === 5. Рейсы ===
         used_flight_numbers = set()
         base_date = date.today()
@@ -186,15 +184,17 @@ def populate_database(
                 baggage_price=baggage_price
             ))
 
-        session.add_all(flights)
+        bulk_insert(session, flights)
         session.commit()
-        for f in flights: session.refresh(f)
         print(f"✅ Сгенерировано {len(flights)} рейсов")
 
         # === 6. Бронирования ===
         used_codes = set()
         bookings = []
 
+        # Карты мест рейсов: места бронирований не пересекаются
+        inventories = {f.id: SeatInventory.for_total_seats(f.total_seats) for f in flights}
+
         # Ограничиваем кол-во бронирований реальным количеством свободных мест
         total_free_seats = sum(f.free_seats for f in flights)
         target_bookings = min(count_bookings, total_free_seats)
@@ -203,7 +203,7 @@ def populate_database(
         payment_types = ["card", "cash", "online"]
         
         for _ in range(target_bookings):
-            eligible_flights = [f for f in flights if f.free_seats > 0]
+            eligible_flights = [f for f in flights if f.free_seats > 0 and inventories[f.id].next_free()]
             if not eligible_flights:
                 print("⚠️ Нет рейсов с доступными местами. Генерация бронирований завершена.")
                 break
@@ -232,10 +232,13 @@ def populate_database(
             additional_fees = round(random.uniform(0, 5000), 2)  # Доп сборы от 0 до 5000
             class_type = random.choice(["economy", "business", "first"])
             
-            # Генерируем номер места
-            row = random.randint(1, flight.total_seats // 6 + 1)
-            seat_letter = random.choice(['A', 'B', 'C', 'D', 'E', 'F'])
-            seat_num = f"{row}{seat_letter}"
+            # Генерируем номер места (случайное свободное, иначе ближайшее свободное)
+            inventory = inventories[flight.id]
+            row = random.randint(1, flight.total_seats // 6)
+            seat_num = f"{row}{random.choice(SEAT_LETTERS)}"
+            if not inventory.occupy(seat_num):
+                seat_num = inventory.next_free()
+                inventory.occupy(seat_num)
 
             bookings.append(Booking(
                 booking_code=code,
@@ -251,7 +254,11 @@ def populate_database(
             flight.free_seats -= 1
             session.add(flight)
 
-        session.add_all(bookings)
+        bulk_insert(session, bookings)
+        bulk_insert(session, [
+            FlightSeatMap(flight_id=flight_id, capacity=inv.capacity, first_free=inv.first_free, bitmap=inv.to_bytes())
+            for flight_id, inv in inventories.items()
+        ])
         session.commit()
         print(f"✅ Сгенерировано {len(bookings)} бронирований")
 
@@ -0,0 +1,95 @@
+"""Тесты для контроллера табло аэропорта.
+
+Проверяют выборку вылетов и прилётов за интервал, переиспользование снимка
+и его сброс при продаже билетов и изменении рейсов.
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.controllers.board_controller import get_airport_board
+from app.controllers.booking_controller import sell_ticket
+from app.controllers.flight_controller import create_flight, update_flight
+from app.controllers.passenger_controller import create_passenger
+from app.schemas.booking_schema import BookingCreate
+from app.schemas.flight_schema import FlightCreate, FlightUpdate
+from app.schemas.passenger_schema import PassengerCreate
+
+START = datetime(2026, 12, 12, 0, 0)
+END = datetime(2026, 12, 13, 12, 0)
+
+
+@pytest.mark.usefixtures("db_session")
+class TestBoardController:
+    """Набор тестов для проверки функциональности board_controller."""
+
+    def setup_flights(self, db_session, fake_flight_data):
+        """Создаёт дневной рейс и ночной рейс с прилётом на следующие сутки."""
+        code = fake_flight_data["airlineCode"]
+        day = create_flight(FlightCreate(**{**fake_flight_data, "flightNumber": f"{code}-201"}), db_session)
+        night = create_flight(FlightCreate(**{
+            **fake_flight_data, "flightNumber": f"{code}-202", "departureTime": "23:00:00", "arrivalTime": "02:30:00"
+        }), db_session)
+        return day, night
+
+    def count_selects(self, db_session):
+        statements = []
+        event.listen(db_session.bind, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        return statements
+
+    def test_departures_and_arrivals(self, db_session, fake_flight_data):
+        day, night = self.setup_flights(db_session, fake_flight_data)
+        board = get_airport_board(fake_flight_data["departureAirportIcao"], "departures", START, END, db_session)
+        assert [f["flightId"] for f in board["flights"]] == [day.id, night.id]
+
+        arrivals = get_airport_board(fake_flight_data["arrivalAirportIcao"], "arrivals", START, END, db_session)
+        assert [f["flightId"] for f in arrivals["flights"]] == [day.id, night.id]
+        assert arrivals["flights"][1]["arrival"] == datetime(2026, 12, 13, 2, 30)
+
+        # Окно только по первым суткам: ночной рейс прилетает позже
+        arrivals = get_airport_board(fake_flight_data["arrivalAirportIcao"], "arrivals", START,
+                                     datetime(2026, 12, 12, 23, 59), db_session)
+        assert [f["flightId"] for f in arrivals["flights"]] == [day.id]
+
+    def test_window_with_timezone_offset(self, db_session, fake_flight_data):
+        day, night = self.setup_flights(db_session, fake_flight_data)
+        start = START.replace(tzinfo=timezone(timedelta(hours=3)))
+        end = END.replace(tzinfo=timezone.utc)
+        board = get_airport_board(fake_flight_data["departureAirportIcao"], "departures", start, end, db_session)
+        assert [f["flightId"] for f in board["flights"]] == [day.id, night.id]
+
+    def test_snapshot_is_reused(self, db_session, fake_flight_data):
+        self.setup_flights(db_session, fake_flight_data)
+        icao = fake_flight_data["departureAirportIcao"]
+        get_airport_board(icao, "departures", START, END, db_session)
+        statements = self.count_selects(db_session)
+        get_airport_board(icao, "departures", START, END, db_session)
+        # Аэропорт проверяется по справочнику в памяти, рейсы - из снимка
+        assert not [s for s in statements if "FROM flight" in s or "FROM airport" in s]
+
+    def test_snapshot_follows_sale_and_update(self, db_session, fake_flight_data, fake_passenger_data):
+        day, _ = self.setup_flights(db_session, fake_flight_data)
+        flight_id = day.id
+        icao = fake_flight_data["departureAirportIcao"]
+        board = get_airport_board(icao, "departures", START, END, db_session)
+        assert board["flights"][0]["freeSeats"] == 150
+
+        passenger = create_passenger(PassengerCreate(**fake_passenger_data), db_session)
+        sell_ticket(BookingCreate(flightId=flight_id, passengerIds=[passenger.id]), db_session)
+        board = get_airport_board(icao, "departures", START, END, db_session)
+        assert board["flights"][0]["freeSeats"] == 149
+
+        update_flight(flight_id, FlightUpdate(departureTime="12:00:00"), db_session)
+        board = get_airport_board(icao, "departures", START, END, db_session)
+        assert board["flights"][0]["departure"] == datetime(2026, 12, 12, 12, 0)
+
+    def test_invalid_requests(self, db_session, fake_flight_data):
+        icao = fake_flight_data["departureAirportIcao"]
+        with pytest.raises(HTTPException) as exc:
+            get_airport_board(icao, "departures", END, START, db_session)
+        assert exc.value.status_code == 400
+        with pytest.raises(HTTPException) as exc:
+            get_airport_board("ZZZZ", "departures", START, END, db_session)
+        assert exc.value.status_code == 404
@@ -215,4 +215,193 @@ class TestBookingController:
         f2 = create_flight(FlightCreate(**f2_data), db_session)
 
         res = add_connections_to_booking(b.booking_code, [f2.id], db_session)
-        assert len(res) == 1
\ No newline at end of file
+        assert len(res) == 1
+
+    def test_seat_map_updated_on_sell_and_cancel(self, db_session, fake_flight_data, fake_passenger_data):
+        """Тестирует обновление карты мест при продаже и отмене билета.
+
+        Проверяет, что место помечается занятым без чтения бронирований и освобождается при отмене.
+        """
+        from app.controllers.inventory_controller import get_seat_inventory
+
+        f, p = self.setup_infra(db_session, fake_flight_data, fake_passenger_data)
+        b = sell_ticket(BookingCreate(flightId=f.id, passengerIds=[p.id], seats=["3C"]), db_session)[0]
+        _, inventory = get_seat_inventory(f, db_session)
+        assert not inventory.is_free("3C")
+
+        cancel_ticket(b.id, db_session)
+        _, inventory = get_seat_inventory(f, db_session)
+        assert inventory.is_free("3C")
+
+    def test_sell_seat_not_on_flight(self, db_session, fake_flight_data, fake_passenger_data):
+        """Тестирует ошибку при выборе места, которого нет на рейсе."""
+        f, p = self.setup_infra(db_session, fake_flight_data, fake_passenger_data)
+        with pytest.raises(HTTPException) as exc:
+            sell_ticket(BookingCreate(flightId=f.id, passengerIds=[p.id], seats=["99Z"]), db_session)
+        assert "отсутствует" in exc.value.detail
+
+    def test_bulk_partial_success(self, db_session, fake_flight_data, fake_passenger_data, max_flight_id):
+        """Тестирует пакетную продажу: ошибочный элемент не отменяет остальные."""
+        from app.controllers.booking_controller import sell_tickets_bulk
+
+        f, p = self.setup_infra(db_session, fake_flight_data, fake_passenger_data)
+        results = sell_tickets_bulk([
+            BookingCreate(flightId=f.id, passengerIds=[p.id]),
+            BookingCreate(flightId=max_flight_id + 1, passengerIds=[p.id]),
+            BookingCreate(flightId=f.id, passengerIds=[p.id]),
+        ], db_session)
+
+        assert [r["success"] for r in results] == [True, False, False]
+        assert results[0]["bookings"][0].id is not None
+        assert "уже имеет билет" in results[2]["error"]
+        db_session.refresh(f)
+        assert f.free_seats == 149
+
+    def test_bulk_all_or_nothing(self, db_session, fake_flight_data, fake_passenger_data):
+        """Тестирует режим «всё или ничего»: при ошибке ничего не записывается."""
+        from app.controllers.booking_controller import sell_tickets_bulk
+
+        f, p = self.setup_infra(db_session, fake_flight_data, fake_passenger_data)
+        p2 = create_passenger(PassengerCreate(**{**fake_passenger_data, "passportNumber": "5555-555555"}), db_session)
+        with pytest.raises(HTTPException) as exc:
+            sell_tickets_bulk([
+                BookingCreate(flightId=f.id, passengerIds=[p.id]),
+                BookingCreate(flightId=f.id, passengerIds=[p2.id], seats=["99Z"]),
+            ], db_session, all_or_nothing=True)
+        assert exc.value.status_code == 400
+        assert exc.value.detail == [{"index": 1, "error": "Место 99Z отсутствует на рейсе"}]
+
+    def test_bulk_failed_manual_seats_are_released(self, db_session, fake_flight_data, fake_passenger_data):
+        """Тестирует, что места, занятые отклонённым элементом пакета до ошибки, остаются в продаже."""
+        from app.controllers.booking_controller import sell_tickets_bulk
+
+        f, p = self.setup_infra(db_session, fake_flight_data, fake_passenger_data)
+        others = [
+            create_passenger(PassengerCreate(**{**fake_passenger_data, "passportNumber": f"5555-55555{i}"}), db_session)
+            for i in range(5)
+        ]
+        results = sell_tickets_bulk([
+            BookingCreate(flightId=f.id, passengerIds=[others[0].id, others[1].id], seats=["5A", "5A"]),
+            BookingCreate(flightId=f.id, passengerIds=[others[2].id, others[3].id], seats=["6A", "99Z"]),
+            BookingCreate(flightId=f.id, passengerIds=[others[4].id]),
+        ], db_session)
+        assert [r["success"] for r in results] == [False, False, True]
+
+        bookings = sell_ticket(BookingCreate(flightId=f.id, passengerIds=[p.id, others[0].id], seats=["5A", "6A"]),
+                               db_session)
+        assert sorted(b.seat for b in bookings) == ["5A", "6A"]
+
+    def test_group_seated_together_in_class_zone(self, db_session, fake_flight_data, fake_passenger_data):
+        """Тестирует подбор мест группе рядом в зоне класса по компоновке салона."""
+        fake_flight_data.update(totalSeats=20, cabinLayout="business:2:AC-DF;economy:2:ABC-DEF")
+        f, p = self.setup_infra(db_session, fake_flight_data, fake_passenger_data)
+        p2 = create_passenger(PassengerCreate(**{**fake_passenger_data, "passportNumber": "5555-555555"}), db_session)
+
+        res = sell_ticket(BookingCreate(flightId=f.id, passengerIds=[p.id, p2.id], classType="business"), db_session)
+        assert [b.seat for b in res] == ["1A", "1C"]
+
+        p3 = create_passenger(PassengerCreate(**{**fake_passenger_data, "passportNumber": "6666-666666"}), db_session)
+        with pytest.raises(HTTPException) as exc:
+            sell_ticket(BookingCreate(flightId=f.id, passengerIds=[p3.id], seats=["1D"], classType="economy"), db_session)
+        assert "не относится к классу" in exc.value.detail
+
+    def test_connection_validation_query_count_is_constant(self, db_session, fake_flight_data, fake_passenger_data):
+        """Тестирует, что число SELECT при продаже не зависит от числа пересадок."""
+        from sqlalchemy import event
+
+        f, p = self.setup_infra(db_session, fake_flight_data, fake_passenger_data)
+        p2 = create_passenger(PassengerCreate(**{**fake_passenger_data, "passportNumber": "5555-555555"}), db_session)
+        legs = [
+            create_flight(FlightCreate(**{**fake_flight_data, "flightNumber": f"{fake_flight_data['airlineCode']}-{900 + i}"}), db_session)
+            for i in range(4)
+        ]
+
+        first = BookingCreate(flightId=f.id, passengerIds=[p.id], connectionFlightIds=[legs[0].id])
+        second = BookingCreate(flightId=f.id, passengerIds=[p2.id], connectionFlightIds=[l.id for l in legs[1:]])
+        selects = []
+
+        def count_selects(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+
+        event.listen(db_session.bind, "before_cursor_execute", count_selects)
+        try:
+            sell_ticket(first, db_session)
+            one_leg = len(selects)
+            selects.clear()
+            sell_ticket(second, db_session)
+        finally:
+            event.remove(db_session.bind, "before_cursor_execute", count_selects)
+        assert len(selects) == one_leg
+
+    def test_itinerary_by_booking_code(self, db_session, fake_flight_data, fake_passenger_data):
+        """Тестирует маршрут по коду бронирования и его сброс из кэша при изменении."""
+        from sqlalchemy import event
+        from app.controllers.booking_controller import get_itinerary, add_connections_to_booking
+
+        f, p = self.setup_infra(db_session, fake_flight_data, fake_passenger_data)
+        f2 = create_flight(FlightCreate(**{**fake_flight_data, "flightNumber": f"{fake_flight_data['airlineCode']}-999"}), db_session)
+        sell_ticket(BookingCreate(flightId=f.id, passengerIds=[p.id], bookingCode="PNR001"), db_session)
+
+        itinerary = get_itinerary("PNR001", db_session)
+        assert [leg["flight"]["id"] for leg in itinerary["legs"]] == [f.id]
+        assert itinerary["legs"][0]["passengers"][0]["fullName"] == fake_passenger_data["fullName"]
+        assert itinerary["legs"][0]["flight"]["free_seats"] == 149
+
+        # Продажа по другому коду меняет свободные места, но не состав маршрута: он остаётся в кэше
+        p2 = create_passenger(PassengerCreate(**{**fake_passenger_data, "passportNumber": "5555-555555"}), db_session)
+        sell_ticket(BookingCreate(flightId=f.id, passengerIds=[p2.id], bookingCode="PNR002"), db_session)
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db_session.bind, "before_cursor_execute", listener)
+        try:
+            itinerary = get_itinerary("PNR001", db_session)
+        finally:
+            event.remove(db_session.bind, "before_cursor_execute", listener)
+        assert not [s for s in statements if "FROM booking" in s]
+        assert itinerary["legs"][0]["flight"]["free_seats"] == 148
+
+        add_connections_to_booking("PNR001", [f2.id], db_session)
+        assert len(get_itinerary("PNR001", db_session)["legs"]) == 2
+
+        with pytest.raises(HTTPException) as exc:
+            get_itinerary("NOSUCH", db_session)
+        assert exc.value.status_code == 404
+
+    def test_bulk_cancel_by_code_and_ids(self, db_session, fake_flight_data, fake_passenger_data):
+        """Тестирует групповую отмену: часть пассажиров по коду, затем остаток по id."""
+        from app.controllers.booking_controller import cancel_tickets
+        from app.schemas.booking_schema import BookingBulkCancel
+        from app.controllers.inventory_controller import get_seat_inventory
+
+        f, p = self.setup_infra(db_session, fake_flight_data, fake_passenger_data)
+        f2 = create_flight(FlightCreate(**{**fake_flight_data, "flightNumber": f"{fake_flight_data['airlineCode']}-999"}), db_session)
+        p2 = create_passenger(PassengerCreate(**{**fake_passenger_data, "passportNumber": "5555-555555"}), db_session)
+        sold = sell_ticket(BookingCreate(flightId=f.id, passengerIds=[p.id, p2.id], connectionFlightIds=[f2.id],
+                                         bookingCode="GRP001"), db_session)
+        rest = [b.id for b in sold if b.passenger_id == p.id]
+
+        deleted = cancel_tickets(BookingBulkCancel(bookingCode="GRP001", passengerIds=[p2.id]), db_session)
+        assert sorted(row["flight_id"] for row in deleted) == sorted([f.id, f2.id])
+        db_session.refresh(f)
+        db_session.refresh(f2)
+        assert (f.free_seats, f2.free_seats) == (149, 149)
+
+        assert len(cancel_tickets(BookingBulkCancel(bookingIds=rest), db_session)) == 2
+        db_session.refresh(f)
+        assert f.free_seats == 150
+        assert get_seat_inventory(f, db_session)[1].occupied_count() == 0
+
+        with pytest.raises(HTTPException) as exc:
+            cancel_tickets(BookingBulkCancel(bookingCode="GRP001"), db_session)
+        assert exc.value.status_code == 404
+
+    def test_bulk_cancel_requires_single_target(self):
+        """Тестирует проверку схемы: нужен либо код, либо список id."""
+        from pydantic import ValidationError
+        from app.schemas.booking_schema import BookingBulkCancel
+
+        with pytest.raises(ValidationError):
+            BookingBulkCancel()
+        with pytest.raises(ValidationError):
+            BookingBulkCancel(bookingIds=[1], passengerIds=[2])
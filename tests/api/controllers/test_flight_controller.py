@@ -9,9 +9,10 @@ from sqlmodel import select
 from app.models.flight import Flight  # ✅ Исправлен импорт
 from app.controllers.flight_controller import (
     create_flight, get_flight_by_id, delete_flight,
-    search_flights_by_arrival, delete_all_flights, update_flight, get_flight_with_passengers_by_number
+    search_flights_by_arrival, delete_all_flights, update_flight, get_flight_with_passengers_by_number,
+    create_flight_schedule, get_flight_by_number
 )
-from app.schemas.flight_schema import FlightCreate, FlightUpdate
+from app.schemas.flight_schema import FlightCreate, FlightUpdate, FlightScheduleCreate
 from app.schemas.passenger_schema import PassengerCreate
 from app.controllers.passenger_controller import create_passenger
 from app.controllers.booking_controller import sell_ticket
@@ -111,6 +112,21 @@ class TestFlightController:
                                         db_session)  # Ищем по имени, которое было сгенерировано как "Arrival"
         assert len(res) >= 1
 
+    def test_search_by_arrival_follows_airport_changes(self, db_session, fake_flight_data):
+        """Тестирует поиск по подстроке без учёта регистра и обновление индекса аэропортов."""
+        from app.controllers.airport_controller import get_airport_by_icao, update_airport
+        from app.schemas.airport_schema import AirportUpdate
+
+        f = create_flight(FlightCreate(**fake_flight_data), db_session)
+        assert [x.id for x in search_flights_by_arrival("rriv", db_session)] == [f.id]
+        assert [x.id for x in search_flights_by_arrival(fake_flight_data["arrivalAirportIcao"][1:].lower(), db_session)] == [f.id]
+
+        airport = get_airport_by_icao(fake_flight_data["arrivalAirportIcao"], db_session)
+        update_airport(airport.id, AirportUpdate(name="Pulkovo"), db_session)
+        assert search_flights_by_arrival("rriv", db_session) == []
+        assert [x.id for x in search_flights_by_arrival("pulk", db_session)] == [f.id]
+        assert search_flights_by_arrival("%", db_session) == []
+
     def test_delete_all(self, db_session, fake_flight_data):
         """Тестирует удаление всех рейсов.
         
@@ -121,6 +137,24 @@ class TestFlightController:
         # ✅ ИСПРАВЛЕНО: f.__class__ заменено на Flight
         assert db_session.exec(select(Flight)).all() == []
 
+    def test_delete_all_chunked(self, db_session, fake_flight_data, fake_passenger_data):
+        """Тестирует удаление всех рейсов порциями вместе с бронированиями и картами мест."""
+        from app.models.booking import Booking
+        from app.models.seat_map import FlightSeatMap
+
+        code = fake_flight_data["airlineCode"]
+        flight_ids = [
+            create_flight(FlightCreate(**{**fake_flight_data, "flightNumber": f"{code}-{400 + i}"}), db_session).id
+            for i in range(5)
+        ]
+        p = create_passenger(PassengerCreate(**fake_passenger_data), db_session)
+        sell_ticket(BookingCreate(flightId=flight_ids[-1], passengerIds=[p.id]), db_session)
+
+        assert delete_all_flights(db_session, chunk_size=2) == 5
+        assert db_session.exec(select(Flight)).all() == []
+        assert db_session.exec(select(Booking)).all() == []
+        assert db_session.exec(select(FlightSeatMap)).all() == []
+
     def test_search_flights_empty(self, db_session):
         """Тестирует поиск при отсутствии результатов.
         
@@ -147,4 +181,125 @@ class TestFlightController:
 
         flight, passengers = get_flight_with_passengers_by_number(fake_flight_data["flightNumber"], db_session)
         assert flight.id == f.id
-        assert len(passengers) == 1
\ No newline at end of file
+        assert len(passengers) == 1
+
+    def test_manifest_single_query(self, db_session, fake_flight_data, fake_passenger_data):
+        """Тестирует, что список пассажиров строится одним запросом независимо от числа бронирований."""
+        from sqlalchemy import event
+        from app.schemas.passenger_schema import PassengerCreate
+        from app.schemas.booking_schema import BookingCreate
+        from app.controllers.booking_controller import sell_ticket
+
+        f = create_flight(FlightCreate(**fake_flight_data), db_session)
+        passenger_ids = [
+            create_passenger(PassengerCreate(**{**fake_passenger_data, "passportNumber": f"1234-5678{i:02d}"}), db_session).id
+            for i in range(5)
+        ]
+        sell_ticket(BookingCreate(flightId=f.id, passengerIds=passenger_ids), db_session)
+        number = fake_flight_data["flightNumber"]
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db_session.bind, "before_cursor_execute", listener)
+        try:
+            _, passengers = get_flight_with_passengers_by_number(number, db_session)
+        finally:
+            event.remove(db_session.bind, "before_cursor_execute", listener)
+        assert len(passengers) == 5
+        assert all(p["passenger"]["full_name"] == fake_passenger_data["fullName"] for p in passengers)
+        assert not [s for s in statements if "FROM passenger" in s and "JOIN" not in s]
+        assert len(statements) <= 2
+
+    def schedule_data(self, fake_flight_data, **overrides):
+        data = {k: v for k, v in fake_flight_data.items() if k not in ("departureDate", "freeSeats")}
+        return FlightScheduleCreate(**{**data, "dateFrom": "2027-04-01", "dateTo": "2027-04-14",
+                                       "daysOfWeek": [1, 2, 3, 4, 5, 6], **overrides})
+
+    def test_create_schedule(self, db_session, fake_flight_data):
+        """Тестирует создание рейсов по расписанию: даты без воскресений, карты мест, пропуск существующих дат."""
+        from datetime import date
+        from app.models.seat_map import FlightSeatMap
+
+        create_flight(FlightCreate(**{**fake_flight_data, "departureDate": "2027-04-02"}), db_session)
+        result = create_flight_schedule([self.schedule_data(fake_flight_data)], db_session)
+        # 1-14 апреля 2027: 14 дней, из них 2 воскресенья, 2 апреля рейс уже есть
+        assert result["created"] == 11
+        assert result["skipped"] == [{"flightNumber": fake_flight_data["flightNumber"], "departureDate": date(2027, 4, 2)}]
+        flights = db_session.exec(select(Flight).where(Flight.id.in_(result["flightIds"]))).all()
+        assert all(f.departure_date.isoweekday() != 7 for f in flights)
+        seat_maps = db_session.exec(select(FlightSeatMap).where(FlightSeatMap.flight_id.in_(result["flightIds"]))).all()
+        assert len(seat_maps) == 11 and all(m.capacity == fake_flight_data["totalSeats"] for m in seat_maps)
+
+        # Повторная загрузка того же расписания ничего не создаёт
+        again = create_flight_schedule([self.schedule_data(fake_flight_data)], db_session)
+        assert again["created"] == 0 and len(again["skipped"]) == 12
+
+        flight = get_flight_by_number(fake_flight_data["flightNumber"], db_session, date(2027, 4, 3))
+        assert flight.departure_date == date(2027, 4, 3)
+
+    def test_create_schedule_validation(self, db_session, fake_flight_data):
+        """Тестирует проверку справочников и дублей в расписании."""
+        with pytest.raises(HTTPException) as exc:
+            create_flight_schedule([self.schedule_data(fake_flight_data, arrivalAirportIcao="EGXX")], db_session)
+        assert "EGXX" in exc.value.detail
+        schedule = self.schedule_data(fake_flight_data)
+        with pytest.raises(HTTPException) as exc:
+            create_flight_schedule([schedule, schedule], db_session)
+        assert "повторяется" in exc.value.detail
+        with pytest.raises(ValueError):
+            self.schedule_data(fake_flight_data, dateTo="2027-03-01")
+
+    def test_create_schedule_concurrent_insert(self, db_session, fake_flight_data, monkeypatch):
+        """Тестирует, что рейс, созданный параллельно после проверки дат, даёт 400, а не 500."""
+        from app.controllers import flight_controller
+
+        insert = flight_controller.bulk_insert
+
+        def insert_after_competitor(session, rows):
+            # Другой запрос успевает записать рейс на первую дату расписания
+            competitor = Flight(**rows[0].model_dump(exclude={"id"}))
+            insert(session, [competitor])
+            insert(session, rows)
+
+        monkeypatch.setattr(flight_controller, "bulk_insert", insert_after_competitor)
+        with pytest.raises(HTTPException) as exc:
+            create_flight_schedule([self.schedule_data(fake_flight_data)], db_session)
+        assert exc.value.status_code == 400
+        assert exc.value.detail == "Рейс с таким номером уже существует на эту дату"
+
+    def test_create_uses_reference_sets(self, db_session, fake_flight_data):
+        """Тестирует, что при создании рейса с прогретыми справочниками выполняются только INSERT."""
+        from sqlalchemy import event
+
+        # Как в get_session: объекты после commit не перечитываются
+        db_session.expire_on_commit = False
+        code = fake_flight_data["airlineCode"]
+        create_flight(FlightCreate(**{**fake_flight_data, "flightNumber": f"{code}-601"}), db_session)
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db_session.bind, "before_cursor_execute", listener)
+        try:
+            create_flight(FlightCreate(**{**fake_flight_data, "flightNumber": f"{code}-602"}), db_session)
+        finally:
+            event.remove(db_session.bind, "before_cursor_execute", listener)
+        assert statements and all(s.lstrip().upper().startswith("INSERT") for s in statements)
+
+        with pytest.raises(HTTPException) as exc:
+            create_flight(FlightCreate(**{**fake_flight_data, "arrivalAirportIcao": "EGXX"}), db_session)
+        assert "EGXX" in exc.value.detail
+        # Дубликат номера на дату отклоняется ограничением БД (rollback - последний шаг теста)
+        with pytest.raises(HTTPException) as exc:
+            create_flight(FlightCreate(**{**fake_flight_data, "flightNumber": f"{code}-602"}), db_session)
+        assert exc.value.detail == "Рейс с таким номером уже существует на эту дату"
+
+    def test_reference_sets_follow_writes(self, db_session, fake_flight_data):
+        """Тестирует, что новый аэропорт сразу доступен для рейсов, а удалённый - нет."""
+        from app.controllers.airport_controller import create_airport, delete_airport
+        from app.controllers.reference_controller import airport_exists
+        from app.schemas.airport_schema import AirportCreate
+
+        create_flight(FlightCreate(**fake_flight_data), db_session)
+        airport = create_airport(AirportCreate(icaoCode="EGYY", name="New"), db_session)
+        assert airport_exists("EGYY", db_session)
+        delete_airport(airport.id, db_session)
+        assert not airport_exists("EGYY", db_session)
@@ -0,0 +1,111 @@
+"""Тесты для контроллера удержания мест.
+
+Проверяют удержание, подтверждение, снятие и автоматическое освобождение
+просроченных удержаний.
+"""
+import pytest
+from sqlmodel import select
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from app.controllers.hold_controller import (
+    create_hold, confirm_hold, release_hold, sweep_expired_holds
+)
+from app.controllers.inventory_controller import get_seat_inventory
+from app.controllers.flight_controller import create_flight
+from app.controllers.passenger_controller import create_passenger
+from app.schemas.booking_schema import SeatHoldCreate, SeatHoldConfirm
+from app.schemas.flight_schema import FlightCreate
+from app.schemas.passenger_schema import PassengerCreate
+
+
+@pytest.mark.usefixtures("db_session")
+class TestHoldController:
+    """Набор тестов для проверки функциональности hold_controller."""
+
+    def test_hold_reserves_seats(self, db_session, fake_flight_data):
+        """Тестирует списание мест и занятие карты мест при удержании."""
+        f = create_flight(FlightCreate(**fake_flight_data), db_session)
+        holds = create_hold(SeatHoldCreate(flightId=f.id, seatCount=3), db_session)
+        assert holds[0].seat_list == ["1A", "1B", "1C"]
+        db_session.refresh(f)
+        assert f.free_seats == 147
+
+    def test_confirm_uses_held_seats(self, db_session, fake_flight_data, fake_passenger_data):
+        """Тестирует подтверждение удержания: места не списываются повторно, лишние освобождаются."""
+        f = create_flight(FlightCreate(**fake_flight_data), db_session)
+        p = create_passenger(PassengerCreate(**fake_passenger_data), db_session)
+        holds = create_hold(SeatHoldCreate(flightId=f.id, seatCount=2), db_session)
+
+        bookings = confirm_hold(holds[0].hold_code, SeatHoldConfirm(passengerIds=[p.id]), db_session)
+        assert [b.seat for b in bookings] == ["1A"]
+        db_session.refresh(f)
+        assert f.free_seats == 149
+        _, inventory = get_seat_inventory(f, db_session)
+        assert inventory.is_free("1B")
+
+    def test_confirm_checks_class_zone(self, db_session, fake_flight_data, fake_passenger_data):
+        """Тестирует, что места эконом-класса нельзя подтвердить как бизнес."""
+        fake_flight_data.update(totalSeats=20, cabinLayout="business:2:AC-DF;economy:2:ABC-DEF")
+        f = create_flight(FlightCreate(**fake_flight_data), db_session)
+        p = create_passenger(PassengerCreate(**fake_passenger_data), db_session)
+        holds = create_hold(SeatHoldCreate(flightId=f.id, seatCount=1, seats=["3A"]), db_session)
+
+        with pytest.raises(HTTPException) as exc:
+            confirm_hold(holds[0].hold_code, SeatHoldConfirm(passengerIds=[p.id], classType="business"), db_session)
+        assert exc.value.status_code == 400
+        assert "3A" in exc.value.detail
+        bookings = confirm_hold(holds[0].hold_code, SeatHoldConfirm(passengerIds=[p.id]), db_session)
+        assert bookings[0].seat == "3A" and bookings[0].class_type == "economy"
+
+    def test_release_hold(self, db_session, fake_flight_data):
+        """Тестирует досрочное снятие удержания."""
+        f = create_flight(FlightCreate(**fake_flight_data), db_session)
+        holds = create_hold(SeatHoldCreate(flightId=f.id, seatCount=4), db_session)
+        release_hold(holds[0].hold_code, db_session)
+        db_session.refresh(f)
+        assert f.free_seats == 150
+        with pytest.raises(HTTPException) as exc:
+            release_hold(holds[0].hold_code, db_session)
+        assert exc.value.status_code == 404
+
+    def test_sweep_expired(self, db_session, fake_flight_data):
+        """Тестирует пакетное освобождение просроченных удержаний."""
+        f = create_flight(FlightCreate(**fake_flight_data), db_session)
+        create_hold(SeatHoldCreate(flightId=f.id, seatCount=5, ttlSeconds=60), db_session)
+        create_hold(SeatHoldCreate(flightId=f.id, seatCount=1, ttlSeconds=60), db_session)
+
+        released = sweep_expired_holds(db_session, batch_size=1, now=datetime.utcnow() + timedelta(minutes=2))
+        assert released == 2
+        db_session.refresh(f)
+        assert f.free_seats == 150
+
+    def test_sell_takes_seats_of_expired_hold(self, db_session, fake_flight_data, fake_passenger_data):
+        """Тестирует продажу мест просроченного удержания без отдельного вызова очистки."""
+        from app.controllers.booking_controller import sell_ticket
+        from app.models.seat_hold import SeatHold
+        from app.schemas.booking_schema import BookingCreate
+
+        fake_flight_data.update(totalSeats=2)
+        f = create_flight(FlightCreate(**fake_flight_data), db_session)
+        p = create_passenger(PassengerCreate(**fake_passenger_data), db_session)
+        holds = create_hold(SeatHoldCreate(flightId=f.id, seatCount=2), db_session)
+        for hold in holds:
+            hold = db_session.get(SeatHold, hold.id)
+            hold.expires_at = datetime.utcnow() - timedelta(seconds=1)
+            db_session.add(hold)
+        db_session.commit()
+
+        # Освобождение удержаний входит в транзакцию продажи - один commit на всё
+        from sqlalchemy import event
+        commits = []
+        listener = lambda session: commits.append(session)
+        event.listen(db_session, "after_commit", listener)
+        try:
+            bookings = sell_ticket(BookingCreate(flightId=f.id, passengerIds=[p.id], seats=["1A"]), db_session)
+        finally:
+            event.remove(db_session, "after_commit", listener)
+        assert len(commits) == 1
+        assert bookings[0].seat == "1A"
+        db_session.refresh(f)
+        assert f.free_seats == 1
+        assert db_session.exec(select(SeatHold)).all() == []
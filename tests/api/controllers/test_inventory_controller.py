@@ -0,0 +1,108 @@
+"""Тесты для контроллера инвентаря мест.
+
+Проверяют атомарное списание и возврат мест рейса и работу карты мест.
+"""
+import pytest
+from fastapi import HTTPException
+from app.controllers.inventory_controller import get_seat_inventory, reserve_seats, release_seats
+from app.controllers.flight_controller import create_flight
+from app.schemas.flight_schema import FlightCreate
+
+
+@pytest.mark.usefixtures("db_session")
+class TestInventoryController:
+    """Набор тестов для проверки функциональности inventory_controller."""
+
+    def test_seat_map_created_with_flight(self, db_session, fake_flight_data):
+        """Тестирует создание пустой карты мест вместе с рейсом."""
+        f = create_flight(FlightCreate(**fake_flight_data), db_session)
+        seat_map, inventory = get_seat_inventory(f, db_session, lock=True)
+        assert seat_map.flight_id == f.id
+        assert inventory.capacity == 150
+        assert inventory.next_free() == "1A"
+
+    def test_reserve_and_release(self, db_session, fake_flight_data):
+        """Тестирует условное списание мест и их возврат."""
+        f = create_flight(FlightCreate(**fake_flight_data), db_session)
+        assert reserve_seats(f.id, 3, db_session) == 147
+        release_seats({f.id: 2}, db_session)
+        db_session.commit()
+        db_session.refresh(f)
+        assert f.free_seats == 149
+
+    def test_reserve_more_than_free(self, db_session, fake_flight_data):
+        """Тестирует отказ при попытке списать больше мест, чем свободно."""
+        f = create_flight(FlightCreate(**fake_flight_data), db_session)
+        with pytest.raises(HTTPException) as exc:
+            reserve_seats(f.id, 151, db_session)
+        assert "Недостаточно мест" in exc.value.detail
+        db_session.refresh(f)
+        assert f.free_seats == 150
+
+    def test_availability_write_through(self, db_session, fake_flight_data):
+        """Тестирует кэш доступности: значение обновляется продажей и возвратом только после commit."""
+        from app.controllers.inventory_controller import get_flight_snapshot, cached_free_seats, get_free_seats
+
+        f = create_flight(FlightCreate(**fake_flight_data), db_session)
+        flight_id = f.id
+        assert cached_free_seats(flight_id) is None
+        assert get_flight_snapshot(flight_id, db_session)["free_seats"] == 150
+
+        reserve_seats(flight_id, 3, db_session)
+        assert cached_free_seats(flight_id) == 150
+        db_session.commit()
+        assert cached_free_seats(flight_id) == 147
+
+        release_seats({flight_id: 1}, db_session)
+        db_session.commit()
+        assert get_free_seats([flight_id, -1], db_session) == {flight_id: 148}
+        assert get_flight_snapshot(-1, db_session) is None
+
+    def test_hot_flight_read_skips_database(self, client, admin_token, db_session, fake_flight_data, fake_passenger_data):
+        """Тестирует, что повторное чтение рейса отдаётся из кэша, а продажа видна сразу."""
+        from sqlalchemy import event
+        from app.controllers.booking_controller import sell_ticket
+        from app.controllers.passenger_controller import create_passenger
+        from app.schemas.booking_schema import BookingCreate
+        from app.schemas.passenger_schema import PassengerCreate
+
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        flight_id = create_flight(FlightCreate(**fake_flight_data), db_session).id
+        assert client.get(f"/api/v1/flights/{flight_id}", headers=headers).json()["free_seats"] == 150
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db_session.bind, "before_cursor_execute", listener)
+        try:
+            res = client.get(f"/api/v1/flights/{flight_id}", headers=headers)
+        finally:
+            event.remove(db_session.bind, "before_cursor_execute", listener)
+        assert res.status_code == 200
+        assert not [s for s in statements if "FROM flight" in s]
+
+        passenger = create_passenger(PassengerCreate(**fake_passenger_data), db_session)
+        sell_ticket(BookingCreate(flightId=flight_id, passengerIds=[passenger.id]), db_session)
+        assert client.get(f"/api/v1/flights/{flight_id}", headers=headers).json()["free_seats"] == 149
+
+    def test_missing_seat_map_locks_flight_before_build(self, db_session, fake_flight_data):
+        """Тестирует построение отсутствующей карты мест: сначала блокируется рейс, затем карта перечитывается."""
+        from sqlalchemy import event
+        from sqlmodel import delete
+        from app.controllers.inventory_controller import lock_seat_inventories
+        from app.models.seat_map import FlightSeatMap
+
+        f = create_flight(FlightCreate(**fake_flight_data), db_session)
+        db_session.exec(delete(FlightSeatMap).where(FlightSeatMap.flight_id == f.id))
+        db_session.commit()
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db_session.bind, "before_cursor_execute", listener)
+        try:
+            seat_map, inventory = lock_seat_inventories([f], db_session)[f.id]
+        finally:
+            event.remove(db_session.bind, "before_cursor_execute", listener)
+        assert seat_map.flight_id == f.id and inventory.next_free() == "1A"
+        flight_lock = next(i for i, s in enumerate(statements) if s.startswith("SELECT flight.id"))
+        assert any("FROM flight_seat_map" in s for s in statements[flight_lock:])
+        assert any("FROM booking" in s for s in statements[flight_lock:])
@@ -0,0 +1,78 @@
+"""Тесты для контроллера загрузки рейсов.
+
+Проверяют агрегаты по классу и багажу, выборку рейсов за день одним запросом
+и сброс кэша при изменении бронирований.
+"""
+import pytest
+from datetime import date
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.controllers.booking_controller import sell_ticket, cancel_ticket
+from app.controllers.flight_controller import create_flight
+from app.controllers.hold_controller import create_hold
+from app.controllers.occupancy_controller import get_occupancy
+from app.controllers.passenger_controller import create_passenger
+from app.schemas.booking_schema import BookingCreate, SeatHoldCreate
+from app.schemas.flight_schema import FlightCreate
+from app.schemas.passenger_schema import PassengerCreate
+
+DAY = date(2026, 12, 12)
+
+
+@pytest.mark.usefixtures("db_session")
+class TestOccupancyController:
+    """Набор тестов для проверки функциональности occupancy_controller."""
+
+    def setup_sales(self, db_session, fake_flight_data, fake_passenger_data):
+        """Два рейса дня; на первом - два билета эконом с багажом и один бизнес без багажа."""
+        code = fake_flight_data["airlineCode"]
+        first = create_flight(FlightCreate(**{**fake_flight_data, "flightNumber": f"{code}-501"}), db_session)
+        second = create_flight(FlightCreate(**{**fake_flight_data, "flightNumber": f"{code}-502"}), db_session)
+        passengers = [
+            create_passenger(PassengerCreate(**{**fake_passenger_data, "passportNumber": f"4321-00000{i}"}), db_session).id
+            for i in range(3)
+        ]
+        sell_ticket(BookingCreate(flightId=first.id, passengerIds=passengers[:2], baggageAllowed=True), db_session)
+        business = sell_ticket(BookingCreate(flightId=first.id, passengerIds=passengers[2:], classType="business"),
+                               db_session)
+        return first.id, second.id, business[0].id
+
+    def test_aggregates(self, db_session, fake_flight_data, fake_passenger_data):
+        first_id, second_id, _ = self.setup_sales(db_session, fake_flight_data, fake_passenger_data)
+        first, second = get_occupancy(db_session, [first_id, second_id])
+        assert first["bookedSeats"] == 3 and first["heldSeats"] == 0
+        assert first["byClass"] == {"economy": 2, "business": 1}
+        assert (first["withBaggage"], first["withoutBaggage"]) == (2, 1)
+        assert first["loadFactor"] == round(3 / 150, 4)
+        assert second["bookedSeats"] == 0 and second["byClass"] == {}
+
+    def test_day_in_one_query(self, db_session, fake_flight_data, fake_passenger_data):
+        first_id, second_id, _ = self.setup_sales(db_session, fake_flight_data, fake_passenger_data)
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db_session.bind, "before_cursor_execute", listener)
+        try:
+            stats = get_occupancy(db_session, departure_date=DAY, airline=fake_flight_data["airlineCode"])
+            # Второй запрос по тем же рейсам - из кэша
+            get_occupancy(db_session, [first_id, second_id])
+        finally:
+            event.remove(db_session.bind, "before_cursor_execute", listener)
+        assert [s["flightId"] for s in stats] == [first_id, second_id]
+        assert len(statements) == 1
+
+    def test_cache_follows_booking_changes(self, db_session, fake_flight_data, fake_passenger_data):
+        first_id, _, business_id = self.setup_sales(db_session, fake_flight_data, fake_passenger_data)
+        assert get_occupancy(db_session, [first_id])[0]["bookedSeats"] == 3
+
+        cancel_ticket(business_id, db_session)
+        stats = get_occupancy(db_session, [first_id])[0]
+        assert stats["bookedSeats"] == 2 and "business" not in stats["byClass"]
+
+        create_hold(SeatHoldCreate(flightId=first_id, seatCount=4), db_session)
+        assert get_occupancy(db_session, [first_id])[0]["heldSeats"] == 4
+
+    def test_filters_required(self, db_session):
+        with pytest.raises(HTTPException) as exc:
+            get_occupancy(db_session)
+        assert exc.value.status_code == 400
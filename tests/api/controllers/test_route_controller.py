@@ -0,0 +1,64 @@
+"""Тесты для контроллера поиска маршрутов.
+
+Проверяют поиск с пересадками по рейсам из БД, учёт свободных мест
+и обновление графа при изменении рейсов.
+"""
+import pytest
+from datetime import date
+from fastapi import HTTPException
+from sqlmodel import update
+
+from app.controllers.airport_controller import create_airport
+from app.controllers.flight_controller import create_flight, delete_flight
+from app.controllers.route_controller import search_routes
+from app.models.flight import Flight
+from app.schemas.airport_schema import AirportCreate
+from app.schemas.flight_schema import FlightCreate
+
+DAY = date(2026, 12, 12)
+
+
+@pytest.mark.usefixtures("db_session")
+class TestRouteController:
+    """Набор тестов для проверки функциональности route_controller."""
+
+    def setup_network(self, db_session, fake_flight_data):
+        """Создаёт прямой рейс A->B и маршрут с пересадкой A->C->B."""
+        create_airport(AirportCreate(icaoCode="EGZZ", name="Hub"), db_session)
+        code = fake_flight_data["airlineCode"]
+        dep, arr = fake_flight_data["departureAirportIcao"], fake_flight_data["arrivalAirportIcao"]
+
+        def make(number, origin, destination, dep_time, arr_time):
+            return create_flight(FlightCreate(**{
+                **fake_flight_data, "flightNumber": f"{code}-{number}", "departureAirportIcao": origin,
+                "arrivalAirportIcao": destination, "departureTime": dep_time, "arrivalTime": arr_time
+            }), db_session)
+
+        direct = make("100", dep, arr, "08:00:00", "18:00:00")
+        first = make("101", dep, "EGZZ", "07:00:00", "09:00:00")
+        second = make("102", "EGZZ", arr, "10:30:00", "13:00:00")
+        return dep, arr, direct, first, second
+
+    def test_search_with_connection(self, db_session, fake_flight_data):
+        dep, arr, direct, first, second = self.setup_network(db_session, fake_flight_data)
+        routes = search_routes(dep, arr, DAY, db_session)
+        assert [[leg["flightId"] for leg in r["legs"]] for r in routes] == [[first.id, second.id], [direct.id]]
+        assert routes[0]["connections"] == 1
+        assert routes[0]["durationMinutes"] == 360
+
+    def test_full_flights_are_skipped(self, db_session, fake_flight_data):
+        dep, arr, direct, first, second = self.setup_network(db_session, fake_flight_data)
+        db_session.exec(update(Flight).where(Flight.id == second.id).values(free_seats=0))
+        routes = search_routes(dep, arr, DAY, db_session, passengers=2)
+        assert [[leg["flightId"] for leg in r["legs"]] for r in routes] == [[direct.id]]
+
+    def test_graph_follows_flight_deletion(self, db_session, fake_flight_data):
+        dep, arr, direct, first, second = self.setup_network(db_session, fake_flight_data)
+        assert len(search_routes(dep, arr, DAY, db_session)) == 2
+        delete_flight(direct.id, db_session)
+        assert len(search_routes(dep, arr, DAY, db_session)) == 1
+
+    def test_same_airports_rejected(self, db_session):
+        with pytest.raises(HTTPException) as exc:
+            search_routes("EGZZ", "EGZZ", DAY, db_session)
+        assert exc.value.status_code == 400
@@ -0,0 +1,83 @@
+# tests/api/controllers/test_token_controller.py
+"""
+Тесты отзыва токенов (TokenController).
+
+Проверяет:
+- Отзыв одного токена при выходе
+- Отзыв всех токенов пользователя, выданных до момента отзыва
+- Подхват отзывов, сделанных другим воркером, и проверку без запросов к БД
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.controllers.token_controller import revoke_token, revoke_user_tokens
+from app.core import token_denylist
+from app.core.security import (
+    create_access_token, create_refresh_token, decode_token, get_current_user, token_claims
+)
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
+
+
+@pytest.fixture
+def user(db_session):
+    u = User(username="revoke_user", password="x", role="dispatcher")
+    db_session.add(u)
+    db_session.commit()
+    db_session.refresh(u)
+    return u
+
+
+class TestTokenController:
+
+    def test_logout_revokes_access_and_refresh(self, client, db_session, user):
+        access = create_access_token({"sub": user.username})
+        refresh = create_refresh_token({"sub": user.username})
+        headers = {"Authorization": f"Bearer {access}"}
+        assert client.get("/api/v2/auth/me", headers=headers).status_code == 200
+
+        assert client.post("/api/v2/auth/logout", params={"refresh_token": refresh}, headers=headers).status_code == 200
+        assert client.get("/api/v2/auth/me", headers=headers).status_code == 401
+        assert client.post("/api/v2/auth/refresh", params={"refresh_token": refresh}).status_code == 401
+
+    def test_revoke_all_keeps_newer_tokens(self, db_session, user):
+        old = create_access_token({"sub": user.username})
+        revoke_user_tokens(user.username, db_session)
+        new = create_access_token({"sub": user.username})
+
+        assert decode_token(old) is None
+        assert get_current_user(token=new, session=db_session).username == user.username
+        with pytest.raises(HTTPException) as exc:
+            get_current_user(token=old, session=db_session)
+        assert exc.value.status_code == 401
+
+    def test_revocation_from_other_worker_is_synced(self, db_session, user):
+        token = create_access_token({"sub": user.username})
+        get_current_user(token=token, session=db_session)
+
+        # Строка, записанная другим воркером, - в памяти этого процесса её ещё нет
+        claims = token_claims(token)
+        db_session.add(RevokedToken(jti=claims["jti"], expires_at=datetime.utcnow() + timedelta(minutes=5)))
+        db_session.commit()
+        assert decode_token(token) == user.username
+
+        token_denylist.sync(db_session, force=True)
+        assert decode_token(token) is None
+
+    def test_check_does_not_query_database(self, db_session, user):
+        revoke_token(create_access_token({"sub": user.username}), db_session)
+        token = create_access_token({"sub": user.username})
+        get_current_user(token=token, session=db_session)
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db_session.bind, "before_cursor_execute", listener)
+        try:
+            for _ in range(3):
+                get_current_user(token=token, session=db_session)
+        finally:
+            event.remove(db_session.bind, "before_cursor_execute", listener)
+        assert statements == []
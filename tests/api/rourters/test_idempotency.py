@@ -0,0 +1,53 @@
+"""Тесты заголовка Idempotency-Key на эндпоинтах создания.
+
+Повтор запроса с тем же ключом должен возвращать сохранённый ответ
+без повторного создания записей.
+"""
+# tests/api/rourters/test_idempotency.py
+import pytest
+from fastapi import status
+from sqlmodel import select, func
+
+from app.models.booking import Booking
+from app.models.passenger import Passenger
+
+
+@pytest.mark.usefixtures("db_session")
+class TestIdempotencyKey:
+    """Набор тестов повторной отправки запросов с Idempotency-Key."""
+
+    def test_passenger_retry_v1_is_replayed(self, client, db_session, admin_token, fake_passenger_data):
+        headers = {"Authorization": f"Bearer {admin_token}", "Idempotency-Key": "p-1"}
+        first = client.post("/api/v1/passengers", json=fake_passenger_data, headers=headers)
+        assert first.status_code == status.HTTP_201_CREATED, first.text
+        retry = client.post("/api/v1/passengers", json=fake_passenger_data, headers=headers)
+        assert retry.status_code == status.HTTP_201_CREATED, retry.text
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert db_session.exec(select(func.count(Passenger.id))).one() == 1
+
+    def test_passenger_without_key_is_not_replayed(self, client, admin_token, fake_passenger_data):
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        assert client.post("/api/v2/passengers", json=fake_passenger_data, headers=headers).status_code == 201
+        assert client.post("/api/v2/passengers", json=fake_passenger_data, headers=headers).status_code == 400
+
+    def test_key_reused_with_other_payload(self, client, admin_token, fake_passenger_data):
+        headers = {"Authorization": f"Bearer {admin_token}", "Idempotency-Key": "p-2"}
+        assert client.post("/api/v2/passengers", json=fake_passenger_data, headers=headers).status_code == 201
+        other = dict(fake_passenger_data, fullName="Другой Пассажир")
+        res = client.post("/api/v2/passengers", json=other, headers=headers)
+        assert res.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_booking_retry_v2_sells_once(self, client, db_session, admin_token, fake_flight_data, fake_passenger_data):
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        flight = client.post("/api/v2/flights", json=fake_flight_data, headers=headers).json()
+        passenger = client.post("/api/v2/passengers", json=fake_passenger_data, headers=headers).json()
+        payload = {"flightId": flight["id"], "passengerIds": [passenger["id"]]}
+
+        headers["Idempotency-Key"] = "b-1"
+        first = client.post("/api/v2/bookings", json=payload, headers=headers)
+        assert first.status_code == status.HTTP_201_CREATED, first.text
+        retry = client.post("/api/v2/bookings", json=payload, headers=headers)
+        assert retry.status_code == status.HTTP_201_CREATED
+        assert retry.json() == first.json()
+        assert db_session.exec(select(func.count(Booking.id))).one() == 1
@@ -0,0 +1,52 @@
+"""Тесты потоковой выгрузки списка пассажиров рейса (CSV и NDJSON)."""
+# tests/api/rourters/test_manifest_export.py
+import csv
+import io
+import json
+
+import pytest
+
+from app.controllers.booking_controller import sell_ticket
+from app.controllers.flight_controller import create_flight
+from app.controllers.passenger_controller import create_passenger
+from app.core.export import csv_stream, ndjson_stream
+from app.schemas.booking_schema import BookingCreate
+from app.schemas.flight_schema import FlightCreate
+from app.schemas.passenger_schema import PassengerCreate
+
+
+def test_streams_are_chunked():
+    rows = [{"id": i} for i in range(5)]
+    chunks = list(csv_stream(rows, ["id"], lambda r: [r["id"]], chunk_rows=2))
+    assert "".join(chunks).split() == ["id", "0", "1", "2", "3", "4"]
+    assert len(chunks) == 3
+    chunks = list(ndjson_stream(rows, chunk_rows=2))
+    assert [json.loads(line)["id"] for line in "".join(chunks).splitlines()] == [0, 1, 2, 3, 4]
+    assert len(chunks) == 3
+
+
+@pytest.mark.usefixtures("db_session")
+class TestManifestExport:
+    """Выгрузка списка пассажиров через API v1."""
+
+    def test_csv_and_ndjson(self, client, admin_token, db_session, fake_flight_data, fake_passenger_data):
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        f = create_flight(FlightCreate(**fake_flight_data), db_session)
+        p = create_passenger(PassengerCreate(**fake_passenger_data), db_session)
+        booking = sell_ticket(BookingCreate(flightId=f.id, passengerIds=[p.id]), db_session)[0]
+        number = fake_flight_data["flightNumber"]
+
+        res = client.get(f"/api/v1/flights/by-number/{number}/manifest.csv", headers=headers)
+        assert res.status_code == 200, res.text
+        assert res.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(res.text)))
+        assert [(r["booking_code"], r["seat"], r["full_name"]) for r in rows] == \
+               [(booking.booking_code, booking.seat, fake_passenger_data["fullName"])]
+
+        res = client.get(f"/api/v1/flights/by-number/{number}/manifest.ndjson", headers=headers)
+        assert res.status_code == 200
+        lines = [json.loads(line) for line in res.text.splitlines()]
+        assert lines[0]["passenger"]["passport_number"] == fake_passenger_data["passportNumber"]
+
+        res = client.get("/api/v1/flights/by-number/ZZZ-999/manifest.csv", headers=headers)
+        assert res.status_code == 404
@@ -90,7 +90,69 @@ class TestV2AdvancedFeatures:
                           headers=headers)
         assert res.status_code == 201, f"Booking: {res.text}"
 
-        # 6. Отменяем бронирование (покрывает DELETE v2 и логику возврата мест)
+        # 6. Маршрут по коду бронирования
+        pnr = client.get(f"/api/v2/bookings/pnr/{res.json()[0]['booking_code']}", headers=headers)
+        assert pnr.status_code == 200, f"PNR: {pnr.text}"
+        assert pnr.json()["legs"][0]["flight"]["flight_number"] == "TST-001"
+
+        # 7. Табло вылетов аэропорта учитывает проданное место
+        board = client.get(f"/api/v2/airports/{dep_icao}/board",
+                           params={"from": "2026-12-12T00:00:00", "to": "2026-12-12T23:59:00"}, headers=headers)
+        assert board.status_code == 200, f"Board: {board.text}"
+        assert board.json()["flights"][0]["freeSeats"] == 9
+        occupancy = client.get(f"/api/v2/flights/{flight['id']}/occupancy", headers=headers)
+        assert occupancy.status_code == 200, f"Occupancy: {occupancy.text}"
+        assert occupancy.json()["byClass"] == {"economy": 1}
+
+        # 8. Отменяем бронирование (покрывает DELETE v2 и логику возврата мест)
         booking_id = res.json()[0]["id"]
         cancel_res = client.delete(f"/api/v2/bookings/{booking_id}", headers=headers)
-        assert cancel_res.status_code == 204
\ No newline at end of file
+        assert cancel_res.status_code == 204
+
+    def test_flight_search_filters(self, client, admin_token, db_session, fake_flight_data):
+        """Тестирует фильтры и сортировку списка рейсов API v2 и использование индекса маршрута."""
+        from sqlalchemy import text
+        from app.controllers.flight_controller import create_flight
+        from app.schemas.flight_schema import FlightCreate
+
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        code = fake_flight_data["airlineCode"]
+        for number, day, price in (("301", "2026-12-12", 5000.0), ("302", "2026-12-13", 9000.0), ("303", "2026-12-20", 7000.0)):
+            create_flight(FlightCreate(**{**fake_flight_data, "flightNumber": f"{code}-{number}",
+                                          "departureDate": day, "basePrice": price}), db_session)
+
+        params = {"origin": fake_flight_data["departureAirportIcao"].lower(),
+                  "destination": fake_flight_data["arrivalAirportIcao"],
+                  "dateFrom": "2026-12-12", "dateTo": "2026-12-15", "sort_by": "basePrice", "order": "desc"}
+        res = client.get("/api/v2/flights", params=params, headers=headers)
+        assert res.status_code == 200, res.text
+        assert [f["flight_number"] for f in res.json()["items"]] == [f"{code}-302", f"{code}-301"]
+
+        res = client.get("/api/v2/flights", params={"maxPrice": 6000, "airline": code}, headers=headers)
+        assert [f["flight_number"] for f in res.json()["items"]] == [f"{code}-301"]
+
+        res = client.get("/api/v2/flights", params={"sort_by": "total_seats; DROP"}, headers=headers)
+        assert res.status_code == 400
+
+        query = ("SELECT * FROM flight WHERE departure_airport_icao = 'AAAA' "
+                 "AND arrival_airport_icao = 'BBBB' AND departure_date >= '2026-12-12' AND departure_date <= '2026-12-15'")
+        if db_session.bind.dialect.name == "postgresql":
+            # На почти пустой таблице планировщик выбрал бы полный просмотр - проверяем, что индекс применим
+            db_session.exec(text("SET LOCAL enable_seqscan = off"))
+            plan = db_session.exec(text(f"EXPLAIN {query}")).all()
+        else:
+            plan = db_session.exec(text(f"EXPLAIN QUERY PLAN {query}")).all()
+        assert "ix_flight_route" in " ".join(str(row) for row in plan)
+
+    def test_flight_schedule(self, client, admin_token, fake_flight_data):
+        """Тестирует пакетное создание рейсов по расписанию через API v2."""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        schedule = {k: v for k, v in fake_flight_data.items() if k not in ("departureDate", "freeSeats")}
+        schedule.update({"dateFrom": "2027-05-01", "dateTo": "2027-05-31", "daysOfWeek": [1, 3, 5]})
+        res = client.post("/api/v2/flights/schedule", json=[schedule], headers=headers)
+        assert res.status_code == 201, res.text
+        # Понедельники, среды и пятницы мая 2027
+        assert res.json()["created"] == 13
+
+        res = client.get("/api/v2/flights", params={"origin": schedule["departureAirportIcao"], "size": 50}, headers=headers)
+        assert res.json()["total"] == 13
@@ -0,0 +1,32 @@
+# tests/api/test_bulk_insert.py
+"""
+Тесты пакетной вставки app.db.bulk.bulk_insert.
+
+Проверяет:
+- Заполнение сгенерированных id из RETURNING в порядке переданных объектов
+- Вставку объектов разных моделей одним вызовом
+- Присоединение вставленных объектов к сессии
+"""
+from datetime import date
+from sqlalchemy import inspect
+from app.db.bulk import bulk_insert
+from app.models.airline import Airline
+from app.models.passenger import Passenger
+
+
+def test_bulk_insert_fills_ids_in_order(db_session):
+    """Проверяет, что id назначаются объектам в порядке передачи и объекты становятся сохранёнными."""
+    passengers = [
+        Passenger(passport_number=f"1000-00000{i}", passport_issued_by="UVMS", passport_issue_date=date(2020, 1, 1),
+                  full_name=f"Passenger {i}", birth_date=date(1990, 1, 1))
+        for i in range(3)
+    ]
+    airline = Airline(code="BLK", name="Bulk Air")
+
+    bulk_insert(db_session, passengers + [airline])
+    db_session.commit()
+
+    ids = [p.id for p in passengers]
+    assert None not in ids and ids == sorted(ids)
+    assert inspect(airline).persistent
+    assert db_session.get(Passenger, ids[1]).full_name == "Passenger 1"
@@ -0,0 +1,43 @@
+"""Тесты TTL/LRU-кэша процесса."""
+# tests/api/test_cache.py
+from app.core.cache import TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entry_expires_after_ttl():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=10, ttl=5, timer=timer)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    timer.now = 5
+    assert cache.get("a") is None
+    assert "a" not in cache
+
+
+def test_least_recently_used_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_pop_and_clear():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1, ttl=1000)
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "нет") == "нет"
+    cache.set("b", 2)
+    cache.clear()
+    assert len(cache) == 0
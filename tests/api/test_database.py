@@ -0,0 +1,29 @@
+"""Тесты обновления схемы существующей базы при инициализации."""
+# tests/api/test_database.py
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from app.db.database import migrate_flight_number_uniqueness
+
+
+def test_flight_number_unique_per_date_after_migration(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        # Схема до расписаний: номер рейса уникален глобально
+        connection.execute(text("CREATE TABLE flight (id INTEGER PRIMARY KEY, flight_number VARCHAR, departure_date DATE)"))
+        connection.execute(text("CREATE UNIQUE INDEX ix_flight_flight_number ON flight (flight_number)"))
+
+    migrate_flight_number_uniqueness(engine)
+    migrate_flight_number_uniqueness(engine)
+
+    indexes = {index["name"]: index for index in inspect(engine).get_indexes("flight")}
+    assert not indexes["ix_flight_flight_number"]["unique"]
+    assert indexes["uq_flight_number_date"]["unique"]
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO flight (flight_number, departure_date) VALUES ('SU-1', '2027-04-01')"))
+        connection.execute(text("INSERT INTO flight (flight_number, departure_date) VALUES ('SU-1', '2027-04-02')"))
+    with pytest.raises(IntegrityError):
+        with engine.begin() as connection:
+            connection.execute(text("INSERT INTO flight (flight_number, departure_date) VALUES ('SU-1', '2027-04-02')"))
+    engine.dispose()
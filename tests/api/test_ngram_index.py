@@ -0,0 +1,37 @@
+"""Тесты n-граммного индекса подстрок."""
+# tests/api/test_ngram_index.py
+from app.core.ngram_index import NgramIndex
+
+
+def make_index():
+    index = NgramIndex()
+    index.add("UUEE", "UUEE", "Sheremetyevo Intl")
+    index.add("UUWW", "UUWW", "Vnukovo Intl")
+    index.add("ULLI", "ULLI", None)
+    return index
+
+
+def test_short_and_long_queries():
+    index = make_index()
+    assert index.search("uu") == {"UUEE", "UUWW"}
+    assert index.search("INTL") == {"UUEE", "UUWW"}
+    assert index.search("metyevo") == {"UUEE"}
+    assert index.search("ULLI") == {"ULLI"}
+    assert index.search("") == set()
+
+
+def test_grams_do_not_cross_fields():
+    index = make_index()
+    # "EE" + "Sh" встречаются только на стыке кода и названия
+    assert index.search("eesh") == set()
+    assert index.search("vo int") == {"UUEE", "UUWW"}
+
+
+def test_update_and_remove():
+    index = make_index()
+    index.add("UUWW", "UUWW", "Moscow Vnukovo")
+    assert index.search("intl") == {"UUEE"}
+    assert index.search("moscow") == {"UUWW"}
+    index.remove("UUEE")
+    assert index.search("intl") == set()
+    assert len(index) == 2
@@ -0,0 +1,44 @@
+"""Тесты пула хеширования паролей."""
+# tests/api/test_password_pool.py
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import password_pool
+from app.core.security import hash_password_async, verify_password_async
+
+
+def test_hashing_runs_in_pool_threads():
+    caller = threading.current_thread().name
+    worker = password_pool.run(lambda: threading.current_thread().name)
+    assert worker != caller
+    assert worker.startswith("password-hash")
+
+
+def test_async_hash_and_verify():
+    async def scenario():
+        hashed = await hash_password_async("Secret#1")
+        return await verify_password_async("Secret#1", hashed), await verify_password_async("wrong", hashed)
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_full_queue_is_rejected_with_503(monkeypatch):
+    monkeypatch.setattr(password_pool, "PASSWORD_HASH_QUEUE", 0)
+    rejected = password_pool.pool_stats()["rejected"]
+    with pytest.raises(HTTPException) as exc:
+        password_pool.run(lambda: None)
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "1"
+    assert password_pool.pool_stats()["rejected"] == rejected + 1
+
+
+def test_stats_count_completed_tasks():
+    before = password_pool.pool_stats()
+    password_pool.run(lambda: None)
+    after = password_pool.pool_stats()
+    assert after["submitted"] == before["submitted"] + 1
+    assert after["completed"] == before["completed"] + 1
+    assert after["queued"] == 0 and after["running"] == 0
@@ -0,0 +1,51 @@
+"""Тесты ограничения попыток входа и регистрации."""
+# tests/api/test_rate_limit.py
+from app.core import password_pool, rate_limit
+from app.core.rate_limit import MemoryBucketBackend
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_refills_over_time():
+    timer = FakeTimer()
+    backend = MemoryBucketBackend(timer=timer)
+    assert backend.take("k", 2, 1.0) == 0
+    assert backend.take("k", 2, 1.0) == 0
+    assert backend.take("k", 2, 1.0) == 1.0
+    timer.now = 1.0
+    assert backend.take("k", 2, 1.0) == 0
+
+
+def test_least_recently_used_key_is_evicted():
+    backend = MemoryBucketBackend(maxsize=2)
+    for key in ("a", "b", "c"):
+        backend.take(key, 1, 1.0)
+    assert len(backend) == 2
+    # "a" вытеснен и снова начинает с полной корзины
+    assert backend.take("a", 1, 1.0) == 0
+
+
+def test_login_rejected_before_password_check(client, db_session, monkeypatch):
+    from app.core.security import hash_password
+    from app.models.user import User
+
+    db_session.add(User(username="stuffed_user", password=hash_password("Right123!"), role="guest"))
+    db_session.commit()
+    monkeypatch.setattr(rate_limit, "AUTH_RATE_USER_BURST", 2)
+    body = {"username": "stuffed_user", "password": "Wrong123!"}
+    for _ in range(2):
+        assert client.post("/api/v2/auth/login", json=body).status_code == 401
+
+    # v1 и v2 считают попытки вместе; отказ не доходит до Argon2
+    submitted = password_pool.pool_stats()["submitted"]
+    for url in ("/api/v1/auth/login", "/api/v2/auth/login"):
+        response = client.post(url, json=body)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) > 0
+    assert password_pool.pool_stats()["submitted"] == submitted
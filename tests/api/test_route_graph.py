@@ -0,0 +1,62 @@
+"""Тесты графа маршрутов (RouteGraph).
+
+Проверяет:
+- Поиск прямых рейсов и маршрутов с пересадками
+- Минимальное время стыковки и ограничение числа плеч
+- Инкрементальное обновление загруженного дня
+"""
+# tests/api/test_route_graph.py
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+
+from app.core.route_graph import RouteGraph
+
+DAY = date(2026, 12, 12)
+
+
+def flight(fid, origin, destination, dep, arr, day=DAY):
+    return SimpleNamespace(
+        id=fid, flight_number=f"TST-{fid:03d}", departure_airport_icao=origin, arrival_airport_icao=destination,
+        departure_date=day, departure_time=time(*dep), arrival_time=time(*arr)
+    )
+
+
+FLIGHTS = [
+    flight(1, "AAAA", "CCCC", (8, 0), (20, 0)),
+    flight(2, "AAAA", "BBBB", (7, 0), (9, 0)),
+    flight(3, "BBBB", "CCCC", (9, 30), (12, 0)),   # стыковка 30 минут
+    flight(4, "BBBB", "CCCC", (11, 0), (14, 0)),
+    flight(5, "BBBB", "DDDD", (22, 0), (1, 0)),    # прилёт на следующие сутки
+    flight(6, "DDDD", "CCCC", (6, 0), (8, 0), day=DAY + timedelta(days=1)),
+]
+
+
+def loader(day):
+    return [f for f in FLIGHTS if f.departure_date == day]
+
+
+def numbers(routes):
+    return [[leg.flight_id for leg in route] for route in routes]
+
+
+def test_routes_ordered_by_arrival_with_min_connection():
+    graph = RouteGraph()
+    routes = graph.search("AAAA", "CCCC", DAY, loader, min_connection=timedelta(minutes=60))
+    assert numbers(routes) == [[2, 4], [1], [2, 5, 6]]
+    routes = graph.search("AAAA", "CCCC", DAY, loader, min_connection=timedelta(minutes=30), limit=1)
+    assert numbers(routes) == [[2, 3]]
+
+
+def test_max_legs_and_exclude():
+    graph = RouteGraph()
+    assert numbers(graph.search("AAAA", "CCCC", DAY, loader, max_legs=2)) == [[2, 4], [1]]
+    assert numbers(graph.search("AAAA", "CCCC", DAY, loader, max_legs=2, exclude={4})) == [[1]]
+
+
+def test_incremental_upsert_and_remove():
+    graph = RouteGraph()
+    assert graph.search("AAAA", "EEEE", DAY, loader) == []
+    graph.upsert(flight(7, "AAAA", "EEEE", (10, 0), (11, 0)))
+    assert numbers(graph.search("AAAA", "EEEE", DAY, loader)) == [[7]]
+    graph.remove(7)
+    assert graph.search("AAAA", "EEEE", DAY, loader) == []
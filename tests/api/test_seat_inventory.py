@@ -0,0 +1,108 @@
+# tests/api/test_seat_inventory.py
+"""
+Тесты битовой карты мест рейса (SeatInventory).
+
+Проверяет:
+- Преобразование номера места в индекс и обратно
+- Занятие и освобождение мест
+- Поиск ближайшего свободного места
+- Изменение вместимости карты
+- Компоновку салона и подбор мест рядом, у окна или прохода
+"""
+import pytest
+
+from app.core.cabin_layout import CabinLayout
+from app.core.seat_inventory import SeatInventory
+
+
+def test_index_and_seat_roundtrip():
+    """Номер места и индекс взаимно однозначны в пределах вместимости."""
+    inv = SeatInventory.for_total_seats(150)
+    assert inv.capacity == 150
+    assert inv.index_of("1A") == 0
+    assert inv.index_of("2C") == 8
+    assert inv.seat_at(8) == "2C"
+    assert inv.index_of("26A") is None  # 25 рядов
+    assert inv.index_of("1G") is None
+    assert inv.index_of("abc") is None
+
+
+def test_occupy_release_and_next_free():
+    """Ближайшее свободное место сдвигается при занятии и возвращается при освобождении."""
+    inv = SeatInventory.for_total_seats(12)
+    assert inv.next_free() == "1A"
+    assert inv.occupy("1A")
+    assert not inv.occupy("1A")
+    assert inv.occupy("1B")
+    assert inv.next_free() == "1C"
+    assert inv.release("1A")
+    assert inv.is_free("1A")
+    assert inv.next_free() == "1A"
+    assert inv.occupied_count() == 1
+
+
+def test_full_inventory_has_no_next_free():
+    """Заполненная карта не возвращает свободных мест."""
+    inv = SeatInventory.for_total_seats(6)
+    inv.fill(["1A", "1B", "1C", "1D", "1E", "1F"])
+    assert inv.next_free() is None
+
+
+def test_roundtrip_bytes_and_resize():
+    """Карта восстанавливается из байтов и сохраняет занятые места при изменении вместимости."""
+    inv = SeatInventory.for_total_seats(18)
+    inv.fill(["1A", "3F"])
+    restored = SeatInventory(inv.capacity, inv.to_bytes(), inv.first_free)
+    assert not restored.is_free("3F")
+
+    smaller = restored.resized(12)
+    assert smaller.capacity == 12
+    assert not smaller.is_free("1A")
+    assert smaller.occupied_count() == 1
+    assert smaller.next_free() == "1B"
+
+
+def test_default_layout_keeps_remainder_row():
+    """Неполный последний ряд продаётся, а не отбрасывается."""
+    inv = SeatInventory.for_total_seats(10)
+    assert inv.capacity == 10
+    assert inv.exists("2D")
+    assert not inv.exists("2E")
+
+
+def test_group_is_seated_together_within_block():
+    """Группа сажается подряд без прохода между креслами."""
+    inv = SeatInventory.for_total_seats(12)
+    inv.fill(["1B", "2A"])
+    assert inv.allocate(3) == ["1D", "1E", "1F"]
+    assert inv.allocate(2) == ["2B", "2C"]
+
+
+def test_group_falls_back_to_same_row_and_adjacent_rows():
+    """Без блока подряд группа сажается в один ряд, затем в соседние ряды."""
+    inv = SeatInventory.for_total_seats(18)
+    inv.fill(["1B", "1E", "2B", "2E", "3A", "3B", "3C"])
+    assert inv.allocate(4) == ["1A", "1C", "1D", "1F"]
+    assert sorted(inv.allocate(5)) == sorted(["2A", "2C", "2D", "2F", "3D"])
+    assert inv.allocate(3) is None
+
+
+def test_cabin_layout_classes_and_preferences():
+    """Места подбираются в зоне класса с учётом предпочтения окно/проход."""
+    layout = CabinLayout.parse("business:2:AC-DF;economy:3:ABC-DEFG-HJK")
+    assert layout.capacity == 2 * 4 + 3 * 10
+    inv = SeatInventory(layout.capacity, layout=layout)
+    assert inv.pick("business", "aisle") == "1C"
+    assert inv.pick("economy", "window") == "3A"
+    assert inv.pick("economy", "aisle") == "3C"
+    assert inv.class_of("1A") == "business"
+    assert inv.allocate(4, "economy") == ["3D", "3E", "3F", "3G"]
+    assert inv.allocate(3, "first") == ["3H", "3J", "3K"]  # зоны first нет - любой блок салона
+    assert inv.free_count("business") == 7
+
+
+def test_invalid_layout_is_rejected():
+    """Ошибки формата компоновки сообщаются через ValueError."""
+    for spec in ["economy:0:ABC", "premium:3:ABC", "economy:3:AAB", "economy:3"]:
+        with pytest.raises(ValueError):
+            CabinLayout.parse(spec)
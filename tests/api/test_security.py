@@ -7,6 +7,7 @@
 - Создание и декодирование JWT токенов (access/refresh)
 - Обработку невалидных и истёкших токенов
 - Проверку ролей пользователей (admin_required, dispatcher_or_higher)
+- Кэширование пользователя по токену и его сброс при смене роли
 """
 import pytest
 from fastapi import HTTPException, status
@@ -15,6 +16,7 @@ from app.core.security import (
     create_access_token, create_refresh_token, decode_token,
     get_current_user, admin_required, dispatcher_or_higher
 )
+from app.controllers.user_controller import update_user_role
 from app.models.user import User
 
 
@@ -173,4 +175,95 @@ def test_dispatcher_or_higher_dispatcher_allowed(db_session):
     token = create_access_token({"sub": user.username})
     result = dispatcher_or_higher(user=get_current_user(token=token, session=db_session))
 
-    assert result.role == "dispatcher"
\ No newline at end of file
+    assert result.role == "dispatcher"
+
+
+def test_current_user_cached_until_role_change(db_session):
+    """
+    Повторная проверка токена не обращается к БД, а смена роли
+    сбрасывает кэш - новая роль действует сразу.
+    """
+    from sqlalchemy import event
+
+    user = User(username="cached_user", password=hash_password("pass"), role="guest")
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    token = create_access_token({"sub": user.username})
+
+    assert get_current_user(token=token, session=db_session).role == "guest"
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db_session.bind, "before_cursor_execute", listener)
+    try:
+        principal = get_current_user(token=token, session=db_session)
+    finally:
+        event.remove(db_session.bind, "before_cursor_execute", listener)
+    assert statements == []
+    assert principal.id == user.id and principal.username == "cached_user"
+    with pytest.raises(HTTPException):
+        admin_required(user=principal)
+
+    update_user_role(user.id, "admin", db_session)
+    assert admin_required(user=get_current_user(token=token, session=db_session)).role == "admin"
+
+
+def test_decoded_token_cached(monkeypatch):
+    """Подпись повторяющегося токена проверяется один раз."""
+    from app.core import security
+
+    token = create_access_token({"sub": "cached_token_user"})
+    calls = []
+    original = security.jwt.decode
+    monkeypatch.setattr(security.jwt, "decode", lambda *a, **kw: calls.append(1) or original(*a, **kw))
+
+    assert decode_token(token) == "cached_token_user"
+    assert decode_token(token) == "cached_token_user"
+    assert len(calls) == 1
+    # Тип токена проверяется и для записи из кэша
+    with pytest.raises(HTTPException):
+        decode_token(token, expected_type="refresh")
+
+
+def test_role_claims_resolve_without_database(monkeypatch, db_session):
+    """В режиме AUTH_ROLE_CLAIMS роль и id берутся из токена, а не из таблицы пользователей."""
+    from app.core import security
+    from app.controllers.user_controller import refresh_access_token
+
+    monkeypatch.setattr(security, "AUTH_ROLE_CLAIMS", True)
+    user = User(username="claims_admin", password="x", role="admin")
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+
+    token = security.create_user_access_token(user)
+    principal = admin_required(user=get_current_user(token=token, session=db_session))
+    assert (principal.id, principal.username, principal.role) == (user.id, "claims_admin", "admin")
+
+    # Новая роль попадает в токен при обновлении
+    update_user_role(user.id, "guest", db_session)
+    refreshed = refresh_access_token("claims_admin", db_session)
+    assert get_current_user(token=refreshed, session=db_session).role == "guest"
+
+
+def test_demoted_user_loses_admin_rights_in_claims_mode(monkeypatch, client, db_session):
+    """Смена роли в режиме AUTH_ROLE_CLAIMS отзывает токены с прежней ролью."""
+    from app.core import security
+
+    monkeypatch.setattr(security, "AUTH_ROLE_CLAIMS", True)
+    user = User(username="demoted_admin", password="x", role="admin")
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+
+    old_token = security.create_user_access_token(user)
+    headers = {"Authorization": f"Bearer {old_token}"}
+    assert client.get("/api/v1/auth/users", headers=headers).status_code == 200
+
+    update_user_role(user.id, "dispatcher", db_session)
+    assert client.get("/api/v1/auth/users", headers=headers).status_code == 401
+
+    new_token = security.create_user_access_token(db_session.get(User, user.id))
+    response = client.get("/api/v1/auth/users", headers={"Authorization": f"Bearer {new_token}"})
+    assert response.status_code == 403
@@ -47,6 +47,23 @@ def setup_db():
     yield
 
 
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """
+    Очищает кэши процесса между тестами.
+
+    Данные в БД откатываются после каждого теста, а кэши в памяти - нет,
+    поэтому без очистки тест мог бы получить ответ, сохранённый предыдущим тестом.
+    """
+    from app.core.cache import clear_all_caches
+    from app.core.token_denylist import clear_denylist
+    from app.core.rate_limit import reset_rate_limits
+    clear_all_caches()
+    clear_denylist()
+    reset_rate_limits()
+    yield
+
+
 @pytest.fixture(scope="function")
 def db_session():
     """